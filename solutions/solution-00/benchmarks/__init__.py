@@ -0,0 +1,11 @@
+""" Benchmarks for the persistence layer, run them from the solution root
+
+    python -m benchmarks.<name>
+"""
+import os
+
+from utils.constants import REPOSITORY_ENV_VAR
+
+# The benchmarks build their own repositories, the global one selected
+# in src.persistence must not need a database or an app context
+os.environ[REPOSITORY_ENV_VAR] = "memory"
@@ -0,0 +1,67 @@
+"""
+Benchmark for the conditional GET of `GET /amenities`
+
+Compares, for a collection that doesn't change between requests, the
+previous route (every object serialized on each request) against the
+conditional route answering from its response cache, and a request
+revalidating its ETag with If-None-Match (304). The time of a request
+is the mean over a number of requests made with the Flask test client,
+so it includes the overhead of the client.
+
+Usage:
+    python -m benchmarks.conditional_get [size ...]
+"""
+
+import os
+import sys
+from time import perf_counter
+
+DEFAULT_SIZES = (100, 1_000, 5_000)
+REQUESTS = 200
+
+
+def timed(request) -> float:
+    """Returns the mean time of a request in microseconds"""
+    start = perf_counter()
+
+    for _ in range(REQUESTS):
+        request()
+
+    return (perf_counter() - start) / REQUESTS * 1e6
+
+
+def main(sizes) -> None:
+    """Prints a table with the time per request of every case"""
+    # create_app also sets up the SQLAlchemy extension, keep it in memory
+    os.environ["DATABASE_URL"] = "sqlite://"
+    os.environ["REPOSITORY"] = "memory"
+
+    from src import create_app
+    from src.controllers.amenities import get_amenities
+    from src.models.amenity import Amenity
+    from src.persistence import repo
+
+    app = create_app()
+    app.add_url_rule("/before/amenities", "before_amenities", get_amenities)
+    client = app.test_client()
+
+    print(f"{'size':>9} {'before':>12} {'cached':>12} {'304':>12}")
+    for size in sizes:
+        repo.save_many([
+            Amenity(f"Amenity {i}")
+            for i in range(repo.count("amenity"), size)
+        ])
+        etag = client.get("/amenities").headers["ETag"]
+
+        before = timed(lambda: client.get("/before/amenities").data)
+        cached = timed(lambda: client.get("/amenities").data)
+        revalidated = timed(lambda: client.get(
+            "/amenities", headers={"If-None-Match": etag}
+        ).data)
+
+        print(f"{size:>9} {before:>9.0f} us {cached:>9.0f} us "
+              f"{revalidated:>9.0f} us")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,51 @@
+"""
+Benchmark for the serialization of the objects of a list endpoint
+
+Compares encoding the `to_dict()` of every review, as the list
+endpoints did, against joining their cached `to_json()`, the first
+time (the JSON is encoded and kept) and once it is cached.
+
+Usage:
+    python -m benchmarks.json_cache [size ...]
+"""
+
+import json
+import sys
+from time import perf_counter
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+
+
+def timed(serialize) -> float:
+    """Returns the time of a serialization in seconds"""
+    start = perf_counter()
+    serialize()
+
+    return perf_counter() - start
+
+
+def main(sizes) -> None:
+    """Prints a table with the time to serialize every review"""
+    from src.models.review import Review
+
+    encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+    print(f"{'size':>9} {'to_dict':>10} {'to_json (first)':>16} "
+          f"{'to_json (cached)':>17}")
+    for size in sizes:
+        reviews = [
+            Review("place", "user", f"comment {i}", i % 5)
+            for i in range(size)
+        ]
+
+        before = timed(lambda: ",".join(
+            encoder.encode(review.to_dict()) for review in reviews
+        ))
+        first = timed(lambda: ",".join(r.to_json() for r in reviews))
+        cached = timed(lambda: ",".join(r.to_json() for r in reviews))
+
+        print(f"{size:>9} {before:>9.2f}s {first:>15.2f}s {cached:>16.2f}s")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
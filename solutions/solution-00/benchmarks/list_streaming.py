@@ -0,0 +1,117 @@
+"""
+Benchmark for the peak memory of `GET /reviews`
+
+Compares the previous response (a list of every `to_dict()` serialized
+into one string by Flask) against the streamed JSON array. Every case
+runs in its own process, the RSS of the process is sampled while the
+response is consumed and the peak above the RSS before the request is
+reported.
+
+Usage:
+    python -m benchmarks.list_streaming [size ...]
+"""
+
+import os
+import subprocess
+import sys
+import threading
+from time import perf_counter, sleep
+
+DEFAULT_SIZES = (1_000_000,)
+CASES = ("list (before)", "stream (after)")
+PAGE_SIZE = 4096
+
+
+def rss() -> int:
+    """Returns the resident set size of the process in bytes"""
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * PAGE_SIZE
+
+
+class RSSSampler(threading.Thread):
+    """Samples the RSS of the process every millisecond"""
+
+    def __init__(self) -> None:
+        """Creates the stopped sampler"""
+        super().__init__(daemon=True)
+        self.peak = rss()
+        self.running = True
+
+    def run(self) -> None:
+        """Samples until stopped"""
+        while self.running:
+            self.peak = max(self.peak, rss())
+            sleep(0.001)
+
+    def stop(self) -> int:
+        """Stops the sampler and returns the peak RSS"""
+        self.running = False
+        self.join()
+        return max(self.peak, rss())
+
+
+def measure(case: str, size: int) -> None:
+    """Fills the repository and prints the peak RSS of one request"""
+    # create_app also sets up the SQLAlchemy extension, keep it in memory
+    os.environ["DATABASE_URL"] = "sqlite://"
+
+    from src import create_app
+    from src.models.review import Review
+    from src.persistence import repo
+
+    app = create_app()
+    # The list endpoint only reads the id map, the reviews are stored
+    # directly to skip maintaining the indexes
+    repo._data["review"] = {
+        review.id: review
+        for review in (
+            Review("place", "user", f"comment {i}", i % 5)
+            for i in range(size)
+        )
+    }
+    app.add_url_rule(
+        "/before/reviews",
+        "before_reviews",
+        lambda: ([review.to_dict() for review in Review.get_all()], 200),
+    )
+    path = "/before/reviews" if case == CASES[0] else "/reviews"
+
+    client = app.test_client()
+    before = rss()
+    sampler = RSSSampler()
+    sampler.start()
+    start = perf_counter()
+
+    response = client.get(path, buffered=False)
+    sent = sum(len(chunk) for chunk in response.response)
+    response.close()
+
+    elapsed = perf_counter() - start
+    peak = sampler.stop()
+
+    print(f"{(peak - before) / 2**20:.1f} {sent / 2**20:.1f} {elapsed:.2f}")
+
+
+def main(sizes) -> None:
+    """Prints a table with the peak memory per case"""
+    print(f"{'size':>9} {'response':<16} {'peak RSS':>12} "
+          f"{'body':>10} {'time':>8}")
+    for size in sizes:
+        for case in CASES:
+            output = subprocess.run(
+                [sys.executable, "-m", __spec__.name, "--case", case,
+                 str(size)],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout.split("\n")[-2]
+            peak, body, elapsed = output.split()
+            print(f"{size:>9} {case:<16} {peak:>9} MB "
+                  f"{body:>7} MB {elapsed:>7}s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--case"]:
+        measure(sys.argv[2], int(sys.argv[3]))
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,75 @@
+"""
+Benchmark for the user lookup of `POST /login`
+
+Compares finding the user by scanning every user, as the lookups
+without index did, against the index over the normalized emails, and
+reports the time of a whole login with the Flask test client, which
+is mostly the bcrypt check of the password. Every user shares one
+password hash, so only a single hash is computed.
+
+Usage:
+    python -m benchmarks.login [size ...]
+"""
+
+import os
+import sys
+from time import perf_counter
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+LOOKUPS = 20
+LOGINS = 5
+PASSWORD = "benchmark"
+
+
+def timed(request, times: int) -> float:
+    """Returns the mean time of a request in microseconds"""
+    start = perf_counter()
+
+    for _ in range(times):
+        request()
+
+    return (perf_counter() - start) / times * 1e6
+
+
+def main(sizes) -> None:
+    """Prints a table with the time of a lookup and of a login"""
+    # create_app also sets up the SQLAlchemy extension, keep it in memory
+    os.environ["DATABASE_URL"] = "sqlite://"
+    os.environ["REPOSITORY"] = "memory"
+
+    from src import create_app
+    from src.app_bcrypt import generate_password
+    from src.models.user import User
+    from src.persistence import repo
+    from src.persistence.repository import Repository
+
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        password_hash = generate_password(PASSWORD)
+
+    print(f"{'size':>9} {'scan':>12} {'index':>12} {'login':>12}")
+    for size in sizes:
+        repo.save_many([
+            User(f"user.{i}@example.com", "Bench", "Mark", password_hash,
+                 False)
+            for i in range(repo.count("user"), size)
+        ])
+        # The last user saved is the worst case of the scan
+        email = f"User.{size - 1}@Example.com"
+
+        scan = timed(lambda: Repository.find(
+            repo, "user", email=email.lower()
+        ), LOOKUPS)
+        index = timed(lambda: User.find_by_email(email), LOOKUPS)
+        login = timed(lambda: client.post(
+            "/login", json={"email": email, "password": PASSWORD}
+        ).data, LOGINS)
+
+        print(f"{size:>9} {scan:>9.0f} us {index:>9.0f} us "
+              f"{login:>9.0f} us")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,115 @@
+"""
+Benchmark for the MemoryRepository primary-key operations
+
+Compares the previous list based storage (linear scans) against the
+current `id -> object` map for `get`, `update` and `delete`.
+
+Usage:
+    python -m benchmarks.memory_repository [size ...]
+"""
+
+import sys
+from datetime import datetime
+from time import perf_counter
+
+from src.models.amenity import Amenity
+from src.persistence.memory import MemoryRepository
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+LOOKUPS = 200
+
+
+class ListMemoryRepository:
+    """The list based MemoryRepository, kept here as the baseline"""
+
+    def __init__(self) -> None:
+        """Creates the storage"""
+        self.data: dict[str, list] = {"amenity": []}
+
+    def get(self, model_name: str, obj_id: str):
+        """Get an object by its ID scanning the list"""
+        for obj in self.data[model_name]:
+            if obj.id == obj_id:
+                return obj
+        return None
+
+    def save(self, obj):
+        """Save an object"""
+        cls = obj.__class__.__name__.lower()
+
+        if obj not in self.data[cls]:
+            self.data[cls].append(obj)
+
+    def update(self, obj):
+        """Update an object"""
+        cls = obj.__class__.__name__.lower()
+
+        for i, o in enumerate(self.data[cls]):
+            if o.id == obj.id:
+                obj.updated_at = datetime.now()
+                self.data[cls][i] = obj
+                return obj
+        return None
+
+    def delete(self, obj) -> bool:
+        """Delete an object"""
+        cls = obj.__class__.__name__.lower()
+
+        if obj in self.data[cls]:
+            self.data[cls].remove(obj)
+            return True
+        return False
+
+
+def fill(repo, objects: list) -> None:
+    """Saves the objects directly in the storage of the repository"""
+    if isinstance(repo, ListMemoryRepository):
+        repo.data["amenity"] = list(objects)
+        return
+
+    for obj in objects:
+        repo.save(obj)
+
+
+def timed(operation, targets: list) -> float:
+    """Returns the mean time in microseconds of operation over targets"""
+    start = perf_counter()
+    for target in targets:
+        operation(target)
+    return (perf_counter() - start) / len(targets) * 1e6
+
+
+def run(size: int) -> dict[str, dict[str, float]]:
+    """Runs get/update/delete against both repositories"""
+    objects = [Amenity(name=f"amenity {i}") for i in range(size)]
+    step = max(size // LOOKUPS, 1)
+    # Pick targets spread over the whole collection, so the list scans
+    # pay their average cost and not the best case
+    targets = objects[::step][:LOOKUPS]
+
+    results = {}
+    for label, repo in (
+        ("list (before)", ListMemoryRepository()),
+        ("dict (after)", MemoryRepository()),
+    ):
+        fill(repo, objects)
+        results[label] = {
+            "get": timed(lambda o: repo.get("amenity", o.id), targets),
+            "update": timed(repo.update, targets),
+            "delete": timed(repo.delete, targets),
+        }
+    return results
+
+
+def main(sizes) -> None:
+    """Prints a table with the mean time per operation"""
+    print(f"{'size':>9} {'storage':<14} {'get':>12} {'update':>12} "
+          f"{'delete':>12}   (us/op)")
+    for size in sizes:
+        for label, times in run(size).items():
+            print(f"{size:>9} {label:<14} {times['get']:>12.2f} "
+                  f"{times['update']:>12.2f} {times['delete']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
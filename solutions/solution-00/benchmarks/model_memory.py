@@ -0,0 +1,114 @@
+"""
+Benchmark for the memory of the objects of the in-memory repositories
+
+Reports the bytes per object of every model, retained objects, fields
+and strings included, as stored before (attributes in an instance dict,
+a copy of the referenced ids in every object) and with the slotted
+models sharing the strings of their interned fields. The objects
+reference 1000 places, 5000 users and 100 cities, and every id is a
+string of its own as when it is read from a request or a file.
+
+Usage:
+    python -m benchmarks.model_memory [size]
+"""
+
+import gc
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime
+
+DEFAULT_SIZE = 50_000
+
+
+class Legacy:
+    """An object storing its attributes in an instance dict"""
+
+
+def fresh(value):
+    """Returns a copy of a value that doesn't share it with other objects"""
+    if isinstance(value, str):
+        return value.encode().decode()
+    if isinstance(value, datetime):
+        return value.replace()
+    return value
+
+
+def legacy(obj) -> Legacy:
+    """The object stored as before, with copies of its values"""
+    copy = Legacy()
+
+    for name in ("id", "created_at", "updated_at"):
+        setattr(copy, name, fresh(getattr(obj, name)))
+    for name in obj.__slots__:
+        setattr(copy, name, fresh(getattr(obj, name)))
+
+    return copy
+
+
+def factories() -> dict:
+    """Builds the i-th object of every model"""
+    from src.models.amenity import Amenity, PlaceAmenity
+    from src.models.city import City
+    from src.models.place import Place
+    from src.models.review import Review
+    from src.models.user import User
+
+    places = [str(uuid.uuid4()) for _ in range(1000)]
+    users = [str(uuid.uuid4()) for _ in range(5000)]
+    cities = [str(uuid.uuid4()) for _ in range(100)]
+    amenities = [str(uuid.uuid4()) for _ in range(50)]
+
+    return {
+        "Review": lambda i: Review(
+            fresh(places[i % 1000]), fresh(users[i % 5000]),
+            f"Comment number {i}", float(i % 5 + 1),
+        ),
+        "Place": lambda i: Place({
+            "name": f"Place {i}", "description": "A place to stay",
+            "address": f"{i} Main Street", "latitude": i / 1e5,
+            "longitude": -i / 1e5, "host_id": fresh(users[i % 5000]),
+            "city_id": fresh(cities[i % 100]), "price_per_night": 100,
+            "number_of_rooms": 2, "number_of_bathrooms": 1,
+            "max_guests": 4,
+        }),
+        "User": lambda i: User(
+            f"user{i}@example.com", "First", "Last", "x" * 60, False
+        ),
+        "City": lambda i: City(f"City {i}", fresh("UY")),
+        "Amenity": lambda i: Amenity(f"Amenity {i}"),
+        "PlaceAmenity": lambda i: PlaceAmenity(
+            fresh(places[i % 1000]), fresh(amenities[i % 50])
+        ),
+    }
+
+
+def measure(build, size: int) -> float:
+    """Returns the bytes retained per object built"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    objs = [build(i) for i in range(size)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+
+    tracemalloc.stop()
+    del objs
+
+    return used / size
+
+
+def main(size: int) -> None:
+    """Prints a table with the bytes per object of every model"""
+    print(f"{'model':<13} {'before':>12} {'after':>12} {'saved':>7}")
+    for model, build in factories().items():
+        before = measure(lambda i: legacy(build(i)), size)
+        after = measure(build, size)
+
+        print(f"{model:<13} {before:>8.0f} B/o {after:>8.0f} B/o "
+              f"{1 - after / before:>6.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if sys.argv[1:] else DEFAULT_SIZE)
@@ -0,0 +1,74 @@
+"""
+Benchmark for the analytical queries over the places
+
+Compares the price and capacity stats of the places inside a box, and
+the places inside the box sorted by price, answered by scanning the
+place objects against the column store of the MemoryRepository.
+
+Usage:
+    python -m benchmarks.place_columns [size ...]
+"""
+
+import random
+import sys
+from time import perf_counter
+
+DEFAULT_SIZES = (100_000, 1_000_000)
+FIELDS = ("price_per_night", "max_guests", "number_of_rooms",
+          "number_of_bathrooms")
+BOX = (-40.0, -70.0, 10.0, 20.0)
+
+
+def timed(query) -> float:
+    """Returns the time of a query in seconds"""
+    start = perf_counter()
+    query()
+
+    return perf_counter() - start
+
+
+def main(sizes) -> None:
+    """Prints a table with the time of each query on every path"""
+    from src.models.place import Place
+    from src.persistence.memory import MemoryRepository
+    from src.persistence.repository import Repository
+
+    rng = random.Random(0)
+
+    print(f"{'size':>9} {'stats (scan)':>13} {'stats (columns)':>16} "
+          f"{'sorted (scan)':>14} {'sorted (columns)':>17}")
+    for size in sizes:
+        repo = MemoryRepository()
+        repo.save_many([
+            Place({
+                "name": f"place {i}",
+                "city_id": "city",
+                "host_id": "host",
+                "latitude": rng.uniform(-90, 90),
+                "longitude": rng.uniform(-180, 180),
+                "price_per_night": rng.randint(10, 1000),
+                "max_guests": rng.randint(1, 10),
+                "number_of_rooms": rng.randint(1, 6),
+                "number_of_bathrooms": rng.randint(1, 4),
+            })
+            for i in range(size)
+        ])
+        ranges = {"max_guests": (2, None)}
+
+        scan = timed(lambda: Repository.aggregate(
+            repo, "place", FIELDS, ranges, BOX
+        ))
+        columns = timed(lambda: repo.aggregate("place", FIELDS, ranges, BOX))
+        scan_sorted = timed(lambda: Repository.select(
+            repo, "place", ranges, BOX, "-price_per_night"
+        ))
+        columns_sorted = timed(lambda: repo.select(
+            "place", ranges, BOX, "-price_per_night"
+        ))
+
+        print(f"{size:>9} {scan:>12.3f}s {columns:>15.3f}s "
+              f"{scan_sorted:>13.3f}s {columns_sorted:>16.3f}s")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
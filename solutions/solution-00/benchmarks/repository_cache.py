@@ -0,0 +1,78 @@
+"""
+Benchmark for the CachingRepository in front of the DBRepository
+
+Compares, on a SQLite file, an amenity read by id and an id matching no
+amenity read from the database against the same reads answered by the
+cache. The session is removed after each read, as at the end of a
+request, so its identity map doesn't answer the next one.
+
+Usage:
+    python -m benchmarks.repository_cache [size ...]
+"""
+
+import os
+import sys
+import tempfile
+from time import perf_counter
+
+DEFAULT_SIZES = (100, 1_000)
+READS = 500
+
+
+def timed(read) -> float:
+    """Returns the mean time of a read in microseconds"""
+    from src.db import db
+
+    start = perf_counter()
+
+    for _ in range(READS):
+        read()
+        db.session.remove()
+
+    return (perf_counter() - start) / READS * 1e6
+
+
+def main(sizes) -> None:
+    """Prints a table with the time of each read, direct and cached"""
+    directory = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory}/bench.db"
+    os.environ["REPOSITORY"] = "memory"
+
+    from src import create_app
+    from src.db import db
+    from src.models.db.amenity import Amenity
+    from src.persistence.caching import CachingRepository
+    from src.persistence.db import DBRepository
+
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        direct = DBRepository()
+        db.session.rollback()
+        cached = CachingRepository(direct)
+
+        print(f"{'size':>7} {'read':>6} {'direct':>12} {'cached':>12}")
+        for size in sizes:
+            amenities = []
+            for i in range(direct.count(Amenity), size):
+                amenity = Amenity(name=f"Amenity {i}")
+                amenity.id = f"amenity-{i}"
+                amenities.append(amenity)
+            cached.save_many(amenities)
+            db.session.remove()
+
+            reads = {
+                "get": lambda repo: repo.get(Amenity, "amenity-0"),
+                "404": lambda repo: repo.get(Amenity, "missing"),
+            }
+            for name, read in reads.items():
+                before = timed(lambda: read(direct))
+                after = timed(lambda: read(cached))
+
+                print(f"{size:>7} {name:>6} {before:>9.0f} us "
+                      f"{after:>9.0f} us")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
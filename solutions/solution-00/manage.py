@@ -6,5 +6,57 @@ from src import create_app
 cli = FlaskGroup(create_app=create_app)
 
 
+@cli.command("compact")
+def compact():
+    """
+    Folds the FileRepository journal into a new snapshot.
+    Run it while the server is stopped.
+    """
+    from src.persistence import repo
+
+    if not hasattr(repo, "compact"):
+        print(f"{repo.__class__.__name__} has nothing to compact")
+        return
+
+    repo.compact()
+    print("Storage compacted")
+
+
+@cli.command("rebuild-search")
+def rebuild_search():
+    """
+    Rebuilds the SQLite full-text tables from their model tables.
+    Run it after a VACUUM, which can renumber the rows they point to.
+    """
+    from src.db import db
+    from src.models.db.search import fts_table
+    from utils.constants import SEARCH_FIELDS
+
+    if db.engine.dialect.name != "sqlite":
+        print("Only the SQLite full-text tables need to be rebuilt")
+        return
+
+    with db.engine.begin() as connection:
+        for table in SEARCH_FIELDS:
+            fts = fts_table(table)
+            connection.exec_driver_sql(
+                f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"
+            )
+
+    print("Full-text search rebuilt")
+
+
+@cli.command("rebuild-stats")
+def rebuild_stats():
+    """
+    Recomputes the rating stats of the places, hosts and cities from
+    the reviews. Run it after moving a place to another host or city.
+    """
+    from src.models import get_class
+
+    count = get_class("RatingStats").rebuild()
+    print(f"Rating stats rebuilt from {count} reviews")
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,37 @@
+"""Add foreign key indexes
+
+Revision ID: 3f1c2a9d7e41
+Revises: dd2333ea9b59
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7e41'
+down_revision: Union[str, None] = 'dd2333ea9b59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('city', 'country_code'),
+    ('place', 'host_id'),
+    ('place', 'city_id'),
+    ('placeamenity', 'place_id'),
+    ('placeamenity', 'amenity_id'),
+    ('review', 'place_id'),
+    ('review', 'user_id'),
+]
+
+
+def upgrade() -> None:
+    for table, column in INDEXES:
+        op.create_index(f'ix_{table}_{column}', table, [column], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in reversed(INDEXES):
+        op.drop_index(f'ix_{table}_{column}', table_name=table)
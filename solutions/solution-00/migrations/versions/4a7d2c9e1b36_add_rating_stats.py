@@ -0,0 +1,39 @@
+"""Add rating stats
+
+Revision ID: 4a7d2c9e1b36
+Revises: e2d94b7a6c58
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4a7d2c9e1b36'
+down_revision: Union[str, None] = 'e2d94b7a6c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rating_stats',
+    sa.Column('scope', sa.String(length=16), nullable=False),
+    sa.Column('target_id', sa.String(length=256), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('histogram', sa.JSON(), nullable=False),
+    sa.Column('id', sa.String(length=256), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('id')
+    )
+    op.create_index(op.f('ix_rating_stats_target_id'), 'rating_stats', ['target_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rating_stats_target_id'), table_name='rating_stats')
+    op.drop_table('rating_stats')
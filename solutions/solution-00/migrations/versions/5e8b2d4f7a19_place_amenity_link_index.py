@@ -0,0 +1,38 @@
+"""Place amenity link index
+
+Revision ID: 5e8b2d4f7a19
+Revises: 7c3e5a1f9d24
+Create Date: 2026-10-19 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8b2d4f7a19'
+down_revision: Union[str, None] = '7c3e5a1f9d24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The links had a unique, required name, which no link could fill
+    with op.batch_alter_table('placeamenity') as batch_op:
+        batch_op.drop_column('name')
+        batch_op.create_index(
+            'ix_placeamenity_place_id_amenity_id',
+            ['place_id', 'amenity_id'],
+            unique=True,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('placeamenity') as batch_op:
+        batch_op.drop_index('ix_placeamenity_place_id_amenity_id')
+        batch_op.add_column(
+            sa.Column('name', sa.String(length=150), nullable=True)
+        )
+        batch_op.create_unique_constraint('uq_placeamenity_name', ['name'])
@@ -0,0 +1,28 @@
+"""Normalize user emails
+
+Revision ID: 7c3e5a1f9d24
+Revises: 4a7d2c9e1b36
+Create Date: 2026-10-18 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a1f9d24'
+down_revision: Union[str, None] = '4a7d2c9e1b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The users are looked up by their normalized email through the
+    # unique index, lower() matches casefold() for ASCII addresses
+    op.execute('UPDATE "user" SET email = lower(trim(email))')
+
+
+def downgrade() -> None:
+    # The original case of the emails is not kept
+    pass
@@ -0,0 +1,30 @@
+"""Add place position index
+
+Revision ID: 8b4e6f0c2d13
+Revises: 3f1c2a9d7e41
+Create Date: 2026-10-18 19:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6f0c2d13'
+down_revision: Union[str, None] = '3f1c2a9d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_place_latitude_longitude',
+        'place',
+        ['latitude', 'longitude'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_place_latitude_longitude', table_name='place')
@@ -0,0 +1,72 @@
+"""Rating stats star columns
+
+Revision ID: 9d1f3b7c5e82
+Revises: 5e8b2d4f7a19
+Create Date: 2026-10-19 02:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d1f3b7c5e82'
+down_revision: Union[str, None] = '5e8b2d4f7a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STARS = [f'stars_{s}' for s in range(1, 6)]
+
+
+def upgrade() -> None:
+    # A column per star, so the database increments them like the count
+    with op.batch_alter_table('rating_stats') as batch_op:
+        for name in STARS:
+            batch_op.add_column(sa.Column(
+                name, sa.Integer(), nullable=False, server_default='0'
+            ))
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text('SELECT id, histogram FROM rating_stats')
+    ).fetchall()
+
+    for obj_id, histogram in rows:
+        if isinstance(histogram, str):
+            histogram = json.loads(histogram)
+        connection.execute(
+            sa.text(
+                'UPDATE rating_stats SET '
+                + ', '.join(f'{name} = :{name}' for name in STARS)
+                + ' WHERE id = :id'
+            ),
+            {'id': obj_id, **dict(zip(STARS, histogram or [0] * 5))},
+        )
+
+    with op.batch_alter_table('rating_stats') as batch_op:
+        batch_op.drop_column('histogram')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('rating_stats') as batch_op:
+        batch_op.add_column(sa.Column('histogram', sa.JSON(), nullable=True))
+
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.text(f'SELECT id, {", ".join(STARS)} FROM rating_stats')
+    ).fetchall()
+
+    for obj_id, *histogram in rows:
+        connection.execute(
+            sa.text('UPDATE rating_stats SET histogram = :histogram '
+                    'WHERE id = :id'),
+            {'id': obj_id, 'histogram': json.dumps(histogram)},
+        )
+
+    with op.batch_alter_table('rating_stats') as batch_op:
+        batch_op.alter_column('histogram', nullable=False)
+        for name in STARS:
+            batch_op.drop_column(name)
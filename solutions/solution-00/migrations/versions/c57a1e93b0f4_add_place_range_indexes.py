@@ -0,0 +1,34 @@
+"""Add place range indexes
+
+Revision ID: c57a1e93b0f4
+Revises: 8b4e6f0c2d13
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c57a1e93b0f4'
+down_revision: Union[str, None] = '8b4e6f0c2d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = [
+    'price_per_night',
+    'max_guests',
+    'number_of_rooms',
+    'number_of_bathrooms',
+]
+
+
+def upgrade() -> None:
+    for column in COLUMNS:
+        op.create_index(f'ix_place_{column}', 'place', [column], unique=False)
+
+
+def downgrade() -> None:
+    for column in reversed(COLUMNS):
+        op.drop_index(f'ix_place_{column}', table_name='place')
@@ -0,0 +1,51 @@
+"""Add full text search
+
+Revision ID: e2d94b7a6c58
+Revises: c57a1e93b0f4
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from src.models.db.search import (
+    fts_table,
+    postgres_document,
+    sqlite_statements,
+)
+from utils.constants import SEARCH_FIELDS
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2d94b7a6c58'
+down_revision: Union[str, None] = 'c57a1e93b0f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    for table, columns in SEARCH_FIELDS.items():
+        if dialect == 'sqlite':
+            for statement in sqlite_statements(table, columns):
+                op.execute(statement)
+        elif dialect == 'postgresql':
+            op.execute(
+                f'CREATE INDEX ix_{table}_search ON {table} '
+                f'USING GIN ({postgres_document(columns)})'
+            )
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+
+    for table in SEARCH_FIELDS:
+        if dialect == 'sqlite':
+            fts = fts_table(table)
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts}_{trigger}')
+            op.execute(f'DROP TABLE IF EXISTS {fts}')
+        elif dialect == 'postgresql':
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_search')
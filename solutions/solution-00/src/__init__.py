@@ -8,7 +8,8 @@ from flask_jwt_extended import JWTManager
 
 from .app import app
 from .db import db
-from .app_bcrypt import bcrypt
+from .app_bcrypt import PasswordPoolBusy, passwords
+from .models.identity_map import debug_headers
 
 load_dotenv()
 cors = CORS()
@@ -32,9 +33,10 @@ def create_app(config_class="src.config.DevelopmentConfig") -> Flask:
     register_extensions(app)
     register_routes(app)
     register_handlers(app)
+    register_hooks(app)
 
     db.init_app(app)
-    bcrypt.init_app(app)
+    passwords.init_app(app)
     jwt.init_app(app)
     with app.app_context():
         db.create_all()
@@ -59,6 +61,8 @@ def register_routes(app: Flask) -> None:
     from src.routes.amenities import amenities_bp
     from src.routes.reviews import reviews_bp
     from src.routes.main import main_bp
+    from src.routes.search import search_bp
+    from src.routes.changes import changes_bp
 
     # Register the blueprints in the app
     app.register_blueprint(users_bp)
@@ -68,6 +72,27 @@ def register_routes(app: Flask) -> None:
     app.register_blueprint(reviews_bp)
     app.register_blueprint(amenities_bp)
     app.register_blueprint(main_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(changes_bp)
+
+
+def register_hooks(app: Flask) -> None:
+    """Register the request hooks for the Flask app"""
+
+    @app.before_request
+    def sync_repository():
+        """Catches up with the writes of the other workers"""
+        from src.persistence import repo
+
+        repo.sync()
+
+    @app.after_request
+    def identity_map_headers(response):
+        """Tells, in debug, how many lookups the identity map saved"""
+        if app.debug:
+            response.headers.update(debug_headers())
+
+        return response
 
 
 def register_handlers(app: Flask) -> None:
@@ -81,3 +106,15 @@ def register_handlers(app: Flask) -> None:
             {"error": "Bad request", "message": str(e)}, 400
         )
     )
+    app.errorhandler(410)(
+        lambda e: (
+            {"error": "Gone", "message": str(e)}, 410
+        )
+    )
+    app.errorhandler(PasswordPoolBusy)(
+        lambda e: (
+            {"error": "Service unavailable", "message": str(e)},
+            503,
+            {"Retry-After": "1"},
+        )
+    )
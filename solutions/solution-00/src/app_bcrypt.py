@@ -1,9 +1,165 @@
-from flask_bcrypt import Bcrypt
+"""
+Password hashing with bcrypt
 
-bcrypt = Bcrypt()
+The hashes are computed and checked in a small process pool, so a
+burst of logins can't hold every request thread on bcrypt rounds. When
+every worker is busy and `PASSWORD_QUEUE_DEPTH` calls are already
+waiting, the next one fails at once with `PasswordPoolBusy`, answered
+with a 503
+"""
 
-def generate_password(password: str):
-    return bcrypt.generate_password_hash(password).decode('utf-8')
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+import time
+from typing import Callable
 
-def check_password(password_hash: str, password_to_check: str):
-    return bcrypt.check_password_hash(password_hash, password_to_check)
+import bcrypt
+
+
+class PasswordPoolBusy(Exception):
+    """Every password worker is busy and their queue is full"""
+
+
+def hash_password(password: str, rounds: int) -> str:
+    """Hashes a password with the cost factor, run by the workers"""
+    salt = bcrypt.gensalt(rounds)
+
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """Checks a password against its hash, run by the workers"""
+    try:
+        return bcrypt.checkpw(
+            password.encode("utf-8"), password_hash.encode("utf-8")
+        )
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+
+def watch_server(server_pid: int) -> None:
+    """
+    Ends a worker once its server process is gone, run when the worker
+    starts, since a killed server leaves its workers waiting for calls
+    """
+    def watch():
+        """Polls the parent of the worker"""
+        while os.getppid() == server_pid:
+            time.sleep(1)
+        os._exit(0)
+
+    threading.Thread(target=watch, daemon=True).start()
+
+
+def hash_rounds(password_hash: str) -> int | None:
+    """Cost factor of a `$2b$<rounds>$...` hash, None if unreadable"""
+    try:
+        return int(password_hash.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+class PasswordPool:
+    """
+    Runs the password functions in a process pool sized by the app
+    config, started on first use by each server process
+
+    Without workers (`PASSWORD_WORKERS = 0`) they run in the calling
+    thread, as they do before `init_app`
+    """
+
+    rounds: int = 12
+    workers: int = 0
+    queue_depth: int = 0
+
+    def __init__(self) -> None:
+        """Creates a pool running the functions in the calling thread"""
+        self.__lock = threading.Lock()
+        self.__executor: ProcessPoolExecutor | None = None
+        self.__pid: int | None = None
+        self.__slots: threading.BoundedSemaphore | None = None
+
+    def init_app(self, app) -> None:
+        """Reads the cost factor and the pool size of the app"""
+        self.shutdown()
+
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        self.workers = app.config.get("PASSWORD_WORKERS", 0)
+        self.queue_depth = app.config.get("PASSWORD_QUEUE_DEPTH", 0)
+        self.__slots = threading.BoundedSemaphore(
+            self.workers + self.queue_depth
+        ) if self.workers else None
+
+    def __executor_of_process(self) -> ProcessPoolExecutor:
+        """The pool of this process, a forked server starts its own"""
+        with self.__lock:
+            if self.__executor is None or self.__pid != os.getpid():
+                # Spawned, a forked worker would keep the server socket
+                # open after the server exits
+                self.__executor = ProcessPoolExecutor(
+                    self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=watch_server,
+                    initargs=(os.getpid(),),
+                )
+                self.__pid = os.getpid()
+
+            return self.__executor
+
+    def run(self, function: Callable, *args):
+        """
+        Runs the function in a worker and waits for its result, raises
+        PasswordPoolBusy when the workers and their queue are full
+        """
+        slots = self.__slots
+
+        if slots is None:
+            return function(*args)
+
+        if not slots.acquire(blocking=False):
+            raise PasswordPoolBusy("Too many password checks in progress")
+
+        try:
+            future = self.__executor_of_process().submit(function, *args)
+        except BaseException:
+            slots.release()
+            raise
+
+        future.add_done_callback(lambda _: slots.release())
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died, the next call starts a new pool
+            self.shutdown()
+            raise
+
+    def shutdown(self) -> None:
+        """Stops the workers, the next call starts new ones"""
+        with self.__lock:
+            if self.__executor is not None and self.__pid == os.getpid():
+                self.__executor.shutdown(wait=False, cancel_futures=True)
+
+            self.__executor = None
+            self.__pid = None
+
+
+passwords = PasswordPool()
+
+
+def generate_password(password: str) -> str:
+    """Hashes a password with the cost factor of the app"""
+    return passwords.run(hash_password, password, passwords.rounds)
+
+
+def check_password(password_hash: str, password_to_check: str) -> bool:
+    """Checks a password against its hash"""
+    return passwords.run(verify_password, password_hash, password_to_check)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Whether the hash was made with another cost factor than the app's"""
+    return hash_rounds(password_hash) != passwords.rounds
@@ -24,6 +24,19 @@ def get_url_database():
     return "sqlite:///hbnb_dev.db"
 
 
+def get_password_workers():
+    """
+        Get the password processes of each server worker, the cores
+        split between the WEB_CONCURRENCY workers unless set.
+    """
+    workers = os.getenv("PASSWORD_WORKERS", None)
+    if workers:
+        return int(workers)
+
+    server_workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    return max(1, (os.cpu_count() or 2) // max(1, server_workers))
+
+
 class Config(ABC):
     """
     Initial configuration settings
@@ -35,6 +48,14 @@ class Config(ABC):
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Cost factor of the new password hashes, the hashes made with
+    # another one are rehashed when their user logs in
+    BCRYPT_LOG_ROUNDS = 12
+    # Processes hashing and checking the passwords (0 runs them in the
+    # request thread) and calls waiting for them before answering 503
+    PASSWORD_WORKERS = 2
+    PASSWORD_QUEUE_DEPTH = 16
+
 
 class DevelopmentConfig(Config):
     """
@@ -57,6 +78,8 @@ class DevelopmentConfig(Config):
         "SECRET_KEY", "key")
     DEBUG = True
 
+    BCRYPT_LOG_ROUNDS = 10
+
 
 class TestingConfig(Config):
     """
@@ -79,6 +102,9 @@ class TestingConfig(Config):
     JWT_SECRET_KEY = os.getenv(
         "SECRET_KEY", "key")
 
+    BCRYPT_LOG_ROUNDS = 4
+    PASSWORD_WORKERS = 0
+
 
 class ProductionConfig(Config):
     """
@@ -95,3 +121,8 @@ class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = get_url_database()
     JWT_SECRET_KEY = os.getenv(
         "SECRET_KEY", "key")
+
+    BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
+    # Every gunicorn worker starts its own pool: gunicorn reads its
+    # number of workers from WEB_CONCURRENCY, set it rather than `-w`
+    PASSWORD_WORKERS = get_password_workers()
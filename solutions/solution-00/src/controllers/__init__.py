@@ -1,10 +1,212 @@
 """ """
+from itertools import islice
+import json
+from typing import Callable, Iterable, Iterator
+from flask import Response, abort, request, stream_with_context
 from flask_jwt_extended import get_jwt_identity, get_jwt
 
+from utils.constants import (
+    DEFAULT_PAGE_SIZE,
+    MAX_BULK_SIZE,
+    MAX_PAGE_SIZE,
+    STREAM_CHUNK_ITEMS,
+)
+
 def get_jwt_data():
     claims = get_jwt()
     jwt_id = get_jwt_identity()
 
     is_admin = claims.get("is_admin", False)
 
-    return jwt_id, is_admin
\ No newline at end of file
+    return jwt_id, is_admin
+
+
+def parse_page() -> tuple[int | None, str | None]:
+    """
+    Parses the `limit` and `cursor` query parameters, limit is None
+    when neither is given, else DEFAULT_PAGE_SIZE unless set
+    """
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor")
+
+    if limit is None and cursor is None:
+        return None, None
+
+    limit = DEFAULT_PAGE_SIZE if limit is None else limit
+
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        abort(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    return limit, cursor
+
+
+def wants_count() -> bool:
+    """Whether the query string asks for `X-Total-Count`"""
+    return request.args.get("count", "").lower() in ("1", "true")
+
+
+def paginate(_cls) -> tuple[Iterable, dict]:
+    """
+    Returns the objects of a model for a list endpoint and its headers
+
+    Without `limit` nor `cursor` in the query string every object is
+    returned, as an iterator to be streamed by `json_list`. Otherwise a
+    page of `limit` objects ordered by id, after the id given as
+    `cursor`, and the next cursor in `X-Next-Cursor`.
+    `count=true` adds the total number of objects in `X-Total-Count`
+    """
+    limit, cursor = parse_page()
+    headers = {}
+
+    if limit is None:
+        objs = _cls.iter_all()
+    else:
+        objs, next_cursor = _cls.page(cursor, limit)
+
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+
+    if wants_count():
+        headers["X-Total-Count"] = str(_cls.count())
+
+    return objs, headers
+
+
+def paginate_list(objs: list) -> tuple[list, dict]:
+    """
+    Returns a page of the objects selected and ordered for a list
+    endpoint and its headers, like `paginate` does for a whole model:
+    every object without `limit` nor `cursor`, else `limit` objects
+    after the one whose id is `cursor`. `count=true` adds the number of
+    selected objects in `X-Total-Count`
+    """
+    limit, cursor = parse_page()
+    headers = {}
+
+    if wants_count():
+        headers["X-Total-Count"] = str(len(objs))
+
+    if limit is not None:
+        start = 0
+
+        if cursor is not None:
+            start = next(
+                (i + 1 for i, obj in enumerate(objs) if obj.id == cursor),
+                None,
+            )
+
+            if start is None:
+                abort(400, f"cursor {cursor} is not in the results")
+
+        if start + limit < len(objs):
+            headers["X-Next-Cursor"] = objs[start + limit - 1].id
+
+        objs = objs[start:start + limit]
+
+    return objs, headers
+
+
+def json_list(objs: Iterable, headers: dict | None = None) -> Response:
+    """
+    Streams a compact JSON array of the serialized objects
+
+    The array is joined from the `to_json()` of the objects, which the
+    in-memory models keep encoded while they don't change. The objects
+    are sent STREAM_CHUNK_ITEMS at a time while they are iterated, so
+    the memory used by the request does not grow with their number
+    """
+    objs = iter(objs)
+
+    def generate() -> Iterator[str]:
+        """Yields the array one chunk at a time"""
+        separator = "["
+
+        while chunk := [
+            obj.to_json() for obj in islice(objs, STREAM_CHUNK_ITEMS)
+        ]:
+            yield separator + ",".join(chunk)
+            separator = ","
+
+        yield "[]\n" if separator == "[" else "]\n"
+
+    return Response(
+        stream_with_context(generate()),
+        200,
+        headers,
+        mimetype="application/json",
+    )
+
+
+def read_items() -> list:
+    """
+    Returns the items of a bulk request body, a JSON array or NDJSON
+    (`Content-Type: application/x-ndjson`, one object per line)
+
+    Items that aren't a JSON object are replaced by a ValueError, so
+    they are reported with the other errors of the batch
+    """
+    if request.mimetype == "application/x-ndjson":
+        items = []
+
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"Invalid JSON: {e}"))
+    else:
+        items = request.get_json()
+
+        if not isinstance(items, list):
+            abort(400, "Expected a JSON array")
+
+    if len(items) > MAX_BULK_SIZE:
+        abort(413, f"A batch can't have more than {MAX_BULK_SIZE} items")
+
+    return [
+        item
+        if isinstance(item, (dict, Exception))
+        else ValueError("Expected a JSON object")
+        for item in items
+    ]
+
+
+def bulk_create(
+    create_many: Callable[[list[dict]], list],
+    check: Callable[[dict], None] | None = None,
+) -> tuple[dict, int]:
+    """
+    Creates the items of a bulk request with a model `create_many`
+
+    `check` can reject an item before it is created by raising a
+    ValueError. The response lists the created objects and the index
+    and message of every rejected item, its status is 201 when every
+    item was created and 207 when some were rejected
+    """
+    items = read_items()
+
+    if check:
+        for i, item in enumerate(items):
+            if isinstance(item, dict):
+                try:
+                    check(item)
+                except ValueError as e:
+                    items[i] = e
+
+    created = iter(create_many([x for x in items if isinstance(x, dict)]))
+    response = {"created": [], "errors": []}
+
+    for i, item in enumerate(items):
+        result = item if isinstance(item, Exception) else next(created)
+
+        if isinstance(result, KeyError):
+            response["errors"].append(
+                {"index": i, "error": f"Missing field: {result}"}
+            )
+        elif isinstance(result, Exception):
+            response["errors"].append({"index": i, "error": str(result)})
+        else:
+            response["created"].append(result.to_dict())
+
+    return response, 207 if response["errors"] else 201
@@ -3,6 +3,13 @@ Amenity controller module
 """
 
 from flask import abort, request
+from src.controllers import (
+    bulk_create,
+    get_jwt_data,
+    json_list,
+    paginate,
+    read_items,
+)
 from src.models.amenity import Amenity
 from src.models import get_class
 
@@ -10,9 +17,9 @@ from src.models import get_class
 def get_amenities():
     """Returns all amenities"""
     _cls = get_class("Amenity")
-    amenities: list[Amenity] = _cls.get_all()
+    amenities, headers = paginate(_cls)
 
-    return [amenity.to_dict() for amenity in amenities]
+    return json_list(amenities, headers)
 
 
 def create_amenity():
@@ -61,3 +68,109 @@ def delete_amenity(amenity_id: str):
         abort(404, f"Amenity with ID {amenity_id} not found")
 
     return "", 204
+
+
+def get_amenity_places(amenity_id: str):
+    """Returns the places having an amenity"""
+    if not get_class("Amenity").get(amenity_id):
+        abort(404, f"Amenity with ID {amenity_id} not found")
+
+    return json_list(get_class("PlaceAmenity").places_with(amenity_id))
+
+
+def check_place_host(place_id: str) -> None:
+    """Aborts unless the place exists and the user is its host or an admin"""
+    current_user, is_admin = get_jwt_data()
+    place = get_class("Place").get(place_id)
+
+    if not place:
+        abort(404, f"Place with ID {place_id} not found")
+
+    if place.host_id != current_user and not is_admin:
+        abort(403, "Prohibited to update this place.")
+
+
+def get_place_amenities(place_id: str):
+    """Returns the amenities of a place"""
+    if not get_class("Place").get(place_id):
+        abort(404, f"Place with ID {place_id} not found")
+
+    return json_list(get_class("PlaceAmenity").amenities_of(place_id))
+
+
+def add_place_amenity(place_id: str):
+    """Links an amenity to a place"""
+    check_place_host(place_id)
+
+    _cls = get_class("PlaceAmenity")
+    data = request.get_json()
+
+    if "amenity_id" not in data:
+        abort(400, "Missing field: 'amenity_id'")
+
+    amenity: Amenity | None = get_class("Amenity").get(data["amenity_id"])
+
+    if not amenity:
+        abort(404, f"Amenity with ID {data['amenity_id']} not found")
+
+    try:
+        _cls.create({"place_id": place_id, "amenity_id": amenity.id})
+    except ValueError as e:
+        abort(400, str(e))
+
+    return amenity.to_dict(), 201
+
+
+def add_place_amenities_bulk(place_id: str):
+    """
+    Links several amenities to a place from a JSON array or NDJSON body
+    of `{"amenity_id": ...}` objects
+    """
+    check_place_host(place_id)
+
+    _cls = get_class("PlaceAmenity")
+
+    return bulk_create(lambda items: _cls.create_many(
+        [item | {"place_id": place_id} for item in items]
+    ))
+
+
+def delete_place_amenity(place_id: str, amenity_id: str):
+    """Unlinks an amenity from a place"""
+    check_place_host(place_id)
+
+    if not get_class("PlaceAmenity").delete(place_id, amenity_id):
+        abort(404, f"Amenity with ID {amenity_id} not linked to the place")
+
+    return "", 204
+
+
+def delete_place_amenities_bulk(place_id: str):
+    """
+    Unlinks several amenities from a place, the body is read like the
+    one of `add_place_amenities_bulk`. The response lists the unlinked
+    amenity ids and the index and message of every other item, its
+    status is 200 when every amenity was unlinked and 207 otherwise
+    """
+    check_place_host(place_id)
+
+    items = read_items()
+    deleted = iter(get_class("PlaceAmenity").delete_many(
+        place_id,
+        [item.get("amenity_id") for item in items if isinstance(item, dict)],
+    ))
+    response = {"deleted": [], "errors": []}
+
+    for i, item in enumerate(items):
+        if isinstance(item, Exception):
+            response["errors"].append({"index": i, "error": str(item)})
+        elif next(deleted):
+            response["deleted"].append(item["amenity_id"])
+        else:
+            response["errors"].append({
+                "index": i,
+                "error": f"Amenity with ID {item.get('amenity_id')} "
+                "not linked to the place",
+            })
+
+    return response, 207 if response["errors"] else 200
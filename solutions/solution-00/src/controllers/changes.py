@@ -0,0 +1,45 @@
+"""
+Changes controller module
+"""
+
+from flask import abort, request
+from utils.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+
+def get_changes():
+    """
+    Returns the changes of the repository after the sequence number
+    `since`, oldest first, at most `limit` of them
+
+    Each change holds its `seq`, the `model`, the `id` of the object,
+    the `op` (save, update or delete) and the `fields` an update
+    changed, null when unknown. `X-Next-Cursor` holds the `since` of the
+    next call and `X-Changes-Epoch` the epoch of the log, given back as
+    `epoch`. A cursor whose changes are no longer kept, or of another
+    epoch, gets a 410 and the client syncs in full
+    """
+    from src.persistence import repo
+
+    since = request.args.get("since", 0, type=int)
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+
+    if since < 0:
+        abort(400, "since must be a sequence number")
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        abort(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    log = repo.changes
+    changes = None
+
+    if request.args.get("epoch", log.epoch) == log.epoch:
+        changes = log.since(since, limit)
+
+    if changes is None:
+        abort(410, f"The changes after {since} are no longer kept")
+
+    headers = {
+        "X-Next-Cursor": str(changes[-1]["seq"] if changes else since),
+        "X-Changes-Epoch": log.epoch,
+    }
+
+    return changes, 200, headers
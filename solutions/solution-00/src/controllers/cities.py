@@ -3,6 +3,7 @@ Cities controller module
 """
 
 from flask import request, abort
+from src.controllers import json_list, paginate
 from src.models.city import City
 from src.models import get_class
 
@@ -10,9 +11,9 @@ from src.models import get_class
 def get_cities():
     """Returns all cities"""
     _cls = get_class("City")
-    cities: list[City] = _cls.get_all()
+    cities, headers = paginate(_cls)
 
-    return [city.to_dict() for city in cities]
+    return json_list(cities, headers)
 
 
 def create_city():
@@ -3,6 +3,7 @@ Countries controller module
 """
 
 from flask import abort
+from src.controllers import json_list
 from src.models.city import City
 from src.models.country import Country
 from src.models import get_class
@@ -36,10 +37,6 @@ def get_country_cities(code: str):
     if not country:
         abort(404, f"Country with ID {code} not found")
 
-    cities: list[City] = _clsCity.get_all()
+    cities: list[City] = _clsCity.find(country_code=country.country_code)
 
-    country_cities = [
-        city.to_dict() for city in cities if city.country_code == country.country_code
-    ]
-
-    return country_cities
+    return json_list(cities)
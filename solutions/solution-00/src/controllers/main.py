@@ -4,7 +4,6 @@ Countries controller module
 from flask import abort, request
 from flask_jwt_extended import create_access_token, get_jwt_identity
 
-from src.app_bcrypt import bcrypt
 from src.models.user import User
 from src.models import get_class
 
@@ -15,14 +14,10 @@ def post_login():
     password = request.json.get('password', None)
 
     _cls = get_class("User")
-    users: list[User] | None = _cls.get_all()
+    user: User | None = _cls.find_by_email(email)
 
-    user: User = None
-    for _user in users:
-        if _user.email == email:
-            user = _user
-
-    if user and bcrypt.check_password_hash(user.password_hash, password):
+    if user and user.check_password(password):
+        user.rehash_password(password)
         additional_claims = {"is_admin": user.is_admin}
         access_token = create_access_token(identity=user.id, additional_claims=additional_claims)
         return { "access_token": access_token }, 201
@@ -36,6 +31,17 @@ def get_protected():
         'logged_in_as': current_user
     }
 
+
+def get_cache_stats():
+    """Counters of the repository cache, by model, for admins"""
+    from src.persistence import repo
+
+    if not hasattr(repo, "stats"):
+        abort(404, "The repository reads are not cached")
+
+    return repo.stats()
+
+
 def get_restricted():
     """Retrieve a page for user logged ADMIN, for test."""
     current_user = get_jwt_identity()
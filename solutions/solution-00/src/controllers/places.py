@@ -2,18 +2,183 @@
 Places controller module
 """
 
+from math import isfinite
+
+import numpy as np
 from flask import abort, request
 from flask_jwt_extended import get_jwt_identity
+from src.controllers import bulk_create, json_list, paginate, paginate_list
 from src.models.place import Place
 from src.models import get_class
+from utils.constants import GEO_DEFAULT_RADIUS_KM, PLACE_RANGE_FILTERS
+from utils.geo import bounding_box, haversine_km
+
+
+def parse_floats(name: str, count: int) -> list[float]:
+    """Parses a query parameter made of count comma separated numbers"""
+    try:
+        values = [float(v) for v in request.args[name].split(",")]
+    except ValueError:
+        values = []
+
+    if len(values) != count or not all(isfinite(v) for v in values):
+        abort(400, f"{name} must be {count} comma separated numbers")
+
+    return values
+
+
+def parse_ranges() -> dict[str, tuple]:
+    """
+    Parses the `min_<filter>` and `max_<filter>` query parameters into
+    `(low, high)` ranges over the fields of PLACE_RANGE_FILTERS
+    """
+    ranges = {}
+
+    for name, field in PLACE_RANGE_FILTERS.items():
+        bounds = []
+
+        for param in (f"min_{name}", f"max_{name}"):
+            bounds.append(
+                parse_floats(param, 1)[0] if param in request.args else None
+            )
+
+        if bounds != [None, None]:
+            ranges[field] = tuple(bounds)
+
+    return ranges
+
+
+def check_position(lat: float, lon: float) -> None:
+    """Aborts with a 400 when a latitude or longitude is out of range"""
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        abort(400, "Latitude must be in [-90, 90], longitude in [-180, 180]")
+
+
+def parse_box() -> tuple[float, float, float, float] | None:
+    """Parses the `bbox=south,west,north,east` query parameter, if any"""
+    if "bbox" not in request.args:
+        return None
+
+    south, west, north, east = parse_floats("bbox", 4)
+    check_position(south, west)
+    check_position(north, east)
+
+    if south > north:
+        abort(400, "bbox south must not be greater than north")
+
+    return south, west, north, east
+
+
+def parse_sort() -> str | None:
+    """
+    Parses the `sort` query parameter, the name of a filter of
+    PLACE_RANGE_FILTERS, prefixed with `-` for a descending order
+    """
+    sort = request.args.get("sort")
+
+    if sort is None:
+        return None
+
+    descending = sort.startswith("-")
+    field = PLACE_RANGE_FILTERS.get(sort.lstrip("-"))
+
+    if field is None:
+        abort(400, f"sort must be one of {', '.join(PLACE_RANGE_FILTERS)}, "
+                   "prefixed with - for a descending order")
+
+    return f"-{field}" if descending else field
 
 
 def get_places():
-    """Returns all places"""
+    """
+    Returns all places
+
+    `?near=lat,lon&radius_km=` returns the places within radius_km of
+    the point, sorted by distance and with their `distance_km`.
+    `?bbox=south,west,north,east` returns the places inside the box,
+    west is greater than east for a box crossing the antimeridian.
+
+    `min_price`, `max_price`, `min_guests`, `max_guests`, `min_rooms`,
+    `max_rooms`, `min_bathrooms` and `max_bathrooms` filter the places,
+    alone or together with `near` or `bbox`. `sort=price`, `-price`,
+    `guests`... orders them, by id otherwise
+
+    `limit` and `cursor` page the places like the other lists, the
+    cursor of a filtered or sorted list is the id of the last place
+    of the previous page
+    """
+    _cls = get_class("Place")
+    ranges = parse_ranges()
+
+    if "near" in request.args:
+        return get_places_near(_cls, ranges)
+
+    box = parse_box()
+    sort = parse_sort()
+
+    if box or ranges or sort:
+        places, headers = paginate_list(_cls.select(ranges, box, sort))
+    else:
+        places, headers = paginate(_cls)
+
+    return json_list(places, headers)
+
+
+def get_places_near(_cls, ranges: dict[str, tuple]):
+    """
+    Returns the places near a point matching the ranges, by distance,
+    paged like the other lists
+    """
+    lat, lon = parse_floats("near", 2)
+    check_position(lat, lon)
+
+    radius_km = GEO_DEFAULT_RADIUS_KM
+    if "radius_km" in request.args:
+        (radius_km,) = parse_floats("radius_km", 1)
+
+    if radius_km <= 0:
+        abort(400, "radius_km must be positive")
+
+    places = _cls.select(ranges, bounding_box(lat, lon, radius_km))
+    distances = haversine_km(
+        lat,
+        lon,
+        np.fromiter((p.latitude for p in places), float, len(places)),
+        np.fromiter((p.longitude for p in places), float, len(places)),
+    )
+    order = [
+        i for i in np.argsort(distances, kind="stable")
+        if distances[i] <= radius_km
+    ]
+    page, headers = paginate_list([places[i] for i in order])
+    distance_km = {
+        places[i].id: round(float(distances[i]), 3) for i in order
+    }
+
+    return [
+        place.to_dict() | {"distance_km": distance_km[place.id]}
+        for place in page
+    ], 200, headers
+
+
+def get_places_stats():
+    """
+    Returns the number of places selected by the filters of
+    `GET /places` (ranges and `bbox`) and the min, max and average of
+    their price, guests, rooms and bathrooms
+    """
     _cls = get_class("Place")
-    places: list[Place] = _cls.get_all()
+    summary = _cls.aggregate(
+        tuple(PLACE_RANGE_FILTERS.values()), parse_ranges(), parse_box()
+    )
 
-    return [place.to_dict() for place in places], 200
+    return {
+        "count": summary["count"],
+        **{
+            name: summary[field]
+            for name, field in PLACE_RANGE_FILTERS.items()
+        },
+    }, 200
 
 
 def create_place():
@@ -31,6 +196,13 @@ def create_place():
     return place.to_dict(), 201
 
 
+def create_places_bulk():
+    """Creates several places from a JSON array or NDJSON body"""
+    _cls = get_class("Place")
+
+    return bulk_create(_cls.create_many)
+
+
 def get_place_by_id(place_id: str):
     """Returns a place by ID"""
     _cls = get_class("Place")
@@ -42,6 +214,25 @@ def get_place_by_id(place_id: str):
     return place.to_dict(), 200
 
 
+def get_place_stats(place_id: str):
+    """
+    Returns the rating stats of a place, of its host and of its city
+    """
+    _cls = get_class("Place")
+    place: Place | None = _cls.get(place_id)
+
+    if not place:
+        abort(404, f"Place with ID {place_id} not found")
+
+    _stats = get_class("RatingStats")
+    targets = {"place": place.id, "host": place.host_id, "city": place.city_id}
+
+    return {
+        scope: _stats.of(scope, target_id).to_dict()
+        for scope, target_id in targets.items()
+    }, 200
+
+
 def update_place(place_id: str):
     """Updates a place by ID"""
     current_user = get_jwt_identity()
@@ -4,7 +4,12 @@ Reviews controller module
 
 from flask import abort, request
 
-from src.controllers import get_jwt_data
+from src.controllers import (
+    bulk_create,
+    get_jwt_data,
+    json_list,
+    paginate,
+)
 from src.models.review import Review
 from src.models import get_class
 
@@ -12,9 +17,9 @@ from src.models import get_class
 def get_reviews():
     """Returns all reviews"""
     _cls = get_class("Review")
-    reviews = _cls.get_all()
+    reviews, headers = paginate(_cls)
 
-    return [review.to_dict() for review in reviews], 200
+    return json_list(reviews, headers)
 
 
 def create_review(place_id: str):
@@ -41,24 +46,34 @@ def create_review(place_id: str):
     return review.to_dict(), 201
 
 
+def create_reviews_bulk():
+    """Creates several reviews from a JSON array or NDJSON body"""
+    current_user, is_admin = get_jwt_data()
+
+    _cls = get_class("Review")
+
+    def check(item: dict) -> None:
+        """Only admins can create reviews for other users"""
+        if not is_admin and item.get("user_id") != current_user:
+            raise ValueError("Prohibited to create this review.")
+
+    return bulk_create(_cls.create_many, check)
+
+
 def get_reviews_from_place(place_id: str):
     """Returns all reviews from a specific place"""
     _cls = get_class("Review")
-    reviews = _cls.get_all()
+    reviews = _cls.find(place_id=place_id)
 
-    return [
-        review.to_dict() for review in reviews if review.place_id == place_id
-    ], 200
+    return json_list(reviews)
 
 
 def get_reviews_from_user(user_id: str):
     """Returns all reviews from a specific user"""
     _cls = get_class("Review")
-    reviews = _cls.get_all()
+    reviews = _cls.find(user_id=user_id)
 
-    return [
-        review.to_dict() for review in reviews if review.user_id == user_id
-    ], 200
+    return json_list(reviews)
 
 
 def get_review_by_id(review_id: str):
@@ -0,0 +1,47 @@
+"""
+Search controller module
+"""
+
+from flask import abort, request
+from src.models import get_class
+from utils.constants import MAX_PAGE_SIZE, SEARCH_DEFAULT_LIMIT
+
+SEARCH_TYPES = {"place": "Place", "review": "Review"}
+
+
+def search():
+    """
+    Returns the places and reviews matching a full-text query
+
+    `q` holds words and "quoted phrases", the results contain all of
+    them and are sorted by relevance with their `score`. `type=place`
+    or `type=review` searches a single model, `limit` bounds the
+    results of each model
+    """
+    query = request.args.get("q", "").strip()
+
+    if not query:
+        abort(400, "Missing query parameter: q")
+
+    limit = request.args.get("limit", SEARCH_DEFAULT_LIMIT, type=int)
+
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        abort(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    types = list(SEARCH_TYPES)
+
+    if "type" in request.args:
+        if request.args["type"] not in SEARCH_TYPES:
+            abort(400, f"type must be one of {', '.join(SEARCH_TYPES)}")
+        types = [request.args["type"]]
+
+    results = {}
+
+    for model in types:
+        _cls = get_class(SEARCH_TYPES[model])
+        results[f"{model}s"] = [
+            obj.to_dict() | {"score": round(score, 4)}
+            for obj, score in _cls.search(query, limit)
+        ]
+
+    return results, 200
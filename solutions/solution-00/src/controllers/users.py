@@ -4,7 +4,12 @@ Users controller module
 
 from flask import abort, request
 
-from src.controllers import get_jwt_data
+from src.controllers import (
+    bulk_create,
+    get_jwt_data,
+    json_list,
+    paginate,
+)
 from src.models.user import User
 from src.models import get_class
 
@@ -12,9 +17,9 @@ from src.models import get_class
 def get_users():
     """Returns all users"""
     _cls = get_class("User")
-    users: list[User] = _cls.get_all()
+    users, headers = paginate(_cls)
 
-    return [user.to_dict() for user in users]
+    return json_list(users, headers)
 
 
 def create_user():
@@ -35,6 +40,13 @@ def create_user():
     return user.to_dict(), 201
 
 
+def create_users_bulk():
+    """Creates several users from a JSON array or NDJSON body"""
+    _cls = get_class("User")
+
+    return bulk_create(_cls.create_many)
+
+
 def get_user_by_id(user_id: str):
     """Returns a user by ID"""
     _cls = get_class("User")
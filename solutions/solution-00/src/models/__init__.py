@@ -3,8 +3,11 @@ import os
 from utils.constants import REPOSITORY_ENV_VAR
 
 from src.models.base import Base
-from src.models.amenity import Amenity
-from src.models.db.amenity import Amenity as AmenityDB
+from src.models.amenity import Amenity, PlaceAmenity
+from src.models.db.amenity import (
+    Amenity as AmenityDB,
+    PlaceAmenity as PlaceAmenityDB,
+)
 from src.models.city import City
 from src.models.db.city import City as CityDB
 from src.models.country import Country
@@ -15,6 +18,8 @@ from src.models.user import User
 from src.models.db.user import User as UserDB
 from src.models.review import Review
 from src.models.db.review import Review as ReviewDB
+from src.models.rating_stats import RatingStats
+from src.models.db.rating_stats import RatingStats as RatingStatsDB
 
 LIST_CLASSES = {
     "Amenity": [Amenity, AmenityDB],
@@ -22,7 +27,9 @@ LIST_CLASSES = {
     "Country": [Country, CountryDB],
     "Place" : [Place, PlaceDB],
     "User" : [User, UserDB],
-    "Review": [Review, ReviewDB]
+    "Review": [Review, ReviewDB],
+    "RatingStats": [RatingStats, RatingStatsDB],
+    "PlaceAmenity": [PlaceAmenity, PlaceAmenityDB],
 
 }
 
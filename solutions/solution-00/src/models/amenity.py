@@ -3,11 +3,14 @@ Amenity related functionality
 """
 
 from src.models.base import Base
+from src.models.place import Place
 
 
 class Amenity(Base):
     """Amenity representation"""
 
+    __slots__ = ("name",)
+
     name: str
 
     def __init__(self, name: str, **kw) -> None:
@@ -50,16 +53,25 @@ class Amenity(Base):
         if not amenity:
             return None
 
-        if "name" in data:
-            amenity.name = data["name"]
+        changed = amenity.assign(
+            {key: data[key] for key in ("name",) if key in data}
+        )
 
-        repo.update(amenity)
+        if changed:
+            repo.update(amenity, fields=changed)
 
         return amenity
 
 
 class PlaceAmenity(Base):
-    """PlaceAmenity representation"""
+    """
+    Link between a place and one of its amenities
+
+    The repositories look the links up by `(place_id, amenity_id)`, by
+    place and by amenity
+    """
+
+    __slots__ = ("place_id", "amenity_id")
 
     place_id: str
     amenity_id: str
@@ -90,41 +102,98 @@ class PlaceAmenity(Base):
         """Get a PlaceAmenity object by place_id and amenity_id"""
         from src.persistence import repo
 
-        place_amenities: list[PlaceAmenity] = repo.get_all("placeamenity")
+        return repo.find_one(
+            "placeamenity", place_id=place_id, amenity_id=amenity_id
+        )
+
+    @staticmethod
+    def amenities_of(place_id: str) -> list[Amenity]:
+        """Returns the amenities of a place, sorted by name"""
+        links = PlaceAmenity.find(place_id=place_id)
+        amenities = Amenity.get_many(link.amenity_id for link in links)
 
-        for place_amenity in place_amenities:
-            if (
-                place_amenity.place_id == place_id
-                and place_amenity.amenity_id == amenity_id
-            ):
-                return place_amenity
+        return sorted(amenities.values(), key=lambda amenity: amenity.name)
 
-        return None
+    @staticmethod
+    def places_with(amenity_id: str) -> list[Place]:
+        """Returns the places having an amenity"""
+        links = PlaceAmenity.find(amenity_id=amenity_id)
+
+        return list(Place.get_many(link.place_id for link in links).values())
 
     @staticmethod
     def create(data: dict) -> "PlaceAmenity":
         """Create a new PlaceAmenity object"""
-        from src.persistence import repo
+        result = PlaceAmenity.create_many([data])[0]
 
-        new_place_amenity = PlaceAmenity(**data)
+        if isinstance(result, Exception):
+            raise result
 
-        repo.save(new_place_amenity)
+        return result
 
-        return new_place_amenity
+    @staticmethod
+    def create_many(items: list[dict]) -> list["PlaceAmenity | Exception"]:
+        """
+        Link several amenities to places, the places, amenities and links
+        of the whole batch are looked up at once. Returns the new link or
+        the error of each item
+        """
+        places = Place.get_many(item.get("place_id") for item in items)
+        amenities = Amenity.get_many(item.get("amenity_id") for item in items)
+        linked = {
+            (link.place_id, link.amenity_id)
+            for link in PlaceAmenity.find_in("place_id", places)
+        }
+        results = []
+
+        for item in items:
+            try:
+                place_id, amenity_id = item["place_id"], item["amenity_id"]
+
+                if place_id not in places:
+                    raise ValueError(f"Place with ID {place_id} not found")
+                if amenity_id not in amenities:
+                    raise ValueError(f"Amenity with ID {amenity_id} not found")
+                if (place_id, amenity_id) in linked:
+                    raise ValueError(
+                        f"Amenity {amenity_id} already linked to the place"
+                    )
+
+                linked.add((place_id, amenity_id))
+                results.append(PlaceAmenity(**item))
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        return PlaceAmenity.save_many(results)
 
     @staticmethod
     def delete(place_id: str, amenity_id: str) -> bool:
         """Delete a PlaceAmenity object by place_id and amenity_id"""
+        return PlaceAmenity.delete_many(place_id, [amenity_id])[0]
+
+    @staticmethod
+    def delete_many(place_id: str, amenity_ids: list[str]) -> list[bool]:
+        """
+        Unlink several amenities from a place, its links are looked up
+        at once. Returns whether each amenity was linked
+        """
         from src.persistence import repo
 
-        place_amenity = PlaceAmenity.get(place_id, amenity_id)
+        links = {
+            link.amenity_id: link
+            for link in PlaceAmenity.find(place_id=place_id)
+        }
+        results = []
+
+        for amenity_id in amenity_ids:
+            link = links.pop(amenity_id, None)
 
-        if not place_amenity:
-            return False
+            if link:
+                repo.delete(link)
 
-        repo.delete(place_amenity)
+            results.append(link is not None)
 
-        return True
+        return results
 
     @staticmethod
     def update(entity_id: str, data: dict):
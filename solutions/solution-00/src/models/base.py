@@ -1,19 +1,54 @@
 """ Abstract base class for all models """
 
 from datetime import datetime
-from typing import Any, Optional
+from functools import partial
+import json
+import sys
+from typing import Any, Iterator, Optional
 import uuid
 from abc import ABC, abstractmethod
 
+# Encodes the objects like the JSON provider of the app, compact
+_encoder = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+# Tells apart the unset fields when an object is pickled
+_unset = object()
+
 
 class Base(ABC):
     """
     Base Interface for all models
+
+    The models only store the fields declared in their `__slots__`,
+    any other attribute set on an object goes to its `extras` dict,
+    which is only created for the objects that have some
     """
 
+    __slots__ = ("id", "created_at", "updated_at", "extras", "_json")
+
     id: str
     created_at: datetime
     updated_at: datetime
+    extras: dict[str, Any] | None
+    # `(json_stamp(), JSON)` of the object, dropped when an attribute is set
+    _json: tuple[Any, str] | None
+
+    # Every declared field of the class, set by __init_subclass__
+    _fields: frozenset[str] = frozenset(__slots__)
+    # Fields repeating the same few values, their strings are shared
+    _interned = frozenset(
+        ("country_code", "city_id", "host_id", "place_id", "user_id",
+         "amenity_id")
+    )
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Collects the declared fields of the class and of its bases"""
+        super().__init_subclass__(**kwargs)
+
+        cls._fields = frozenset(
+            name
+            for klass in cls.__mro__
+            for name in klass.__dict__.get("__slots__", ())
+        )
 
     def __init__(
         self,
@@ -26,6 +61,7 @@ class Base(ABC):
         Base class constructor
         If kwargs are provided, set them as attributes
         """
+        object.__setattr__(self, "extras", None)
 
         if kwargs:
             for key, value in kwargs.items():
@@ -37,6 +73,77 @@ class Base(ABC):
         self.created_at = created_at or datetime.now()
         self.updated_at = updated_at or datetime.now()
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        Sets a declared field, or else an extra attribute, and drops the
+        cached JSON of the object
+        """
+        if name in self._interned and type(value) is str:
+            value = sys.intern(value)
+
+        if name in self._fields or hasattr(type(self), name):
+            object.__setattr__(self, name, value)
+        else:
+            if self.extras is None:
+                object.__setattr__(self, "extras", {})
+            self.extras[name] = value
+
+        object.__setattr__(self, "_json", None)
+
+    def __getattr__(self, name: str) -> Any:
+        """Reads the extra attributes, called for the undeclared names"""
+        extras = object.__getattribute__(self, "extras")
+
+        if extras is None or name not in extras:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+        return extras[name]
+
+    def __getstate__(self) -> dict:
+        """Pickles the fields of the object, without its cached JSON"""
+        return {
+            name: value
+            for name in self._fields - {"_json"}
+            if (value := getattr(self, name, _unset)) is not _unset
+        }
+
+    def __setstate__(self, state: dict | tuple) -> None:
+        """
+        Restores a pickled object, also one pickled with an instance
+        dict before the models had slots
+        """
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+
+        object.__setattr__(self, "extras", None)
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def normalized(self, name: str, value: Any) -> Any:
+        """
+        Returns the value a field is stored with when set to value,
+        classes normalizing a field on set should override it
+        """
+        return value
+
+    def assign(self, data: dict) -> set[str]:
+        """
+        Sets the fields of data whose normalized value differs from the
+        current one, returns their names, empty when the update changes
+        nothing
+        """
+        changed = set()
+
+        for key, value in data.items():
+            if getattr(self, key, _unset) != self.normalized(key, value):
+                setattr(self, key, value)
+                changed.add(key)
+
+        return changed
+
     @classmethod
     def get(cls, id) -> "Any | None":
         """
@@ -44,11 +151,15 @@ class Base(ABC):
         of a class by its id
 
         If a class needs a different implementation,
-        it should override this method
+        it should override this method. The objects found are kept
+        for the rest of the request by the identity map
         """
+        from src.models.identity_map import lookup
         from src.persistence import repo
 
-        return repo.get(cls.__name__.lower(), id)
+        model_name = cls.__name__.lower()
+
+        return lookup(model_name, id, lambda: repo.get(model_name, id))
 
     @classmethod
     def get_all(cls) -> list["Any"]:
@@ -62,6 +173,163 @@ class Base(ABC):
 
         return repo.get_all(cls.__name__.lower())
 
+    @classmethod
+    def iter_all(cls) -> Iterator["Any"]:
+        """
+        This is a common method to iterate over all objects of a class
+        without loading them all at once when the repository can
+        """
+        from src.persistence import repo
+
+        return repo.iter_all(cls.__name__.lower())
+
+    @classmethod
+    def page(cls, after: str | None, limit: int) -> tuple[list, str | None]:
+        """
+        This is a common method to get a page of objects of a class
+        ordered by id, returns the objects and the next cursor
+        """
+        from src.persistence import repo
+
+        return repo.page(cls.__name__.lower(), after, limit)
+
+    @classmethod
+    def count(cls) -> int:
+        """This is a common method to count the objects of a class"""
+        from src.persistence import repo
+
+        return repo.count(cls.__name__.lower())
+
+    @classmethod
+    def find(cls, **equals) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class
+        whose fields equal the given values
+
+        The repository serves it from an index when it has one
+        """
+        from src.persistence import repo
+
+        return repo.find(cls.__name__.lower(), **equals)
+
+    @classmethod
+    def find_in(cls, field: str, values) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class
+        whose field is one of the given values
+        """
+        from src.persistence import repo
+
+        return repo.find_in(cls.__name__.lower(), field, values)
+
+    @classmethod
+    def find_range(cls, **ranges: tuple) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class whose
+        fields are inside the given (low, high) ranges, ordered by id
+        """
+        from src.persistence import repo
+
+        return repo.find_range(cls.__name__.lower(), **ranges)
+
+    @classmethod
+    def search(cls, query: str, limit: int) -> list[tuple["Any", float]]:
+        """
+        This is a common method to get the limit best (object, score)
+        pairs of a class for a full-text query, best first
+        """
+        from src.persistence import repo
+
+        return repo.search(cls.__name__.lower(), query, limit)
+
+    @classmethod
+    def find_within(
+        cls, box: tuple[float, float, float, float]
+    ) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class whose
+        latitude and longitude are inside a (south, west, north, east)
+        box, only meaningful for classes having a position
+        """
+        from src.persistence import repo
+
+        return repo.find_within(cls.__name__.lower(), box)
+
+    @classmethod
+    def select(
+        cls,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+    ) -> list["Any"]:
+        """
+        This is a common method to get the objects of a class whose
+        fields are inside the (low, high) ranges and whose position is
+        inside the box, ordered by the sort field (`-field` descending)
+        and then by id
+        """
+        from src.persistence import repo
+
+        return repo.select(cls.__name__.lower(), ranges, box, sort)
+
+    @classmethod
+    def aggregate(
+        cls,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        This is a common method to count the objects of a class selected
+        like `select` and to get the min, max and avg of their fields
+        """
+        from src.persistence import repo
+
+        return repo.aggregate(cls.__name__.lower(), fields, ranges, box)
+
+    @classmethod
+    def get_many(cls, ids) -> dict[str, "Any"]:
+        """
+        This is a common method to get several objects of a class
+        by their ids in one lookup, returns them by id. The ids found
+        earlier in the request are answered by the identity map
+        """
+        from src.models.identity_map import lookup_many
+
+        model_name = cls.__name__.lower()
+
+        return lookup_many(model_name, ids, partial(cls.find_in, "id"))
+
+    @staticmethod
+    def save_many(results: list, durable: bool = False) -> list:
+        """
+        This is a common method to save the objects of a bulk create
+        in one batch
+
+        results holds the new objects and the errors of the rejected
+        items, the objects the repository fails to save are replaced
+        by their error
+        """
+        from src.persistence import repo
+
+        objs = [obj for obj in results if not isinstance(obj, Exception)]
+        errors = iter(repo.save_many(objs, durable=durable))
+
+        return [
+            obj if isinstance(obj, Exception) else next(errors) or obj
+            for obj in results
+        ]
+
+    @classmethod
+    def find_one(cls, **equals) -> "Any | None":
+        """
+        This is a common method to get the first object of a class
+        whose fields equal the given values
+        """
+        from src.persistence import repo
+
+        return repo.find_one(cls.__name__.lower(), **equals)
+
     @classmethod
     def delete(cls, id) -> bool:
         """
@@ -71,6 +339,7 @@ class Base(ABC):
         If a class needs a different implementation,
         it should override this method
         """
+        from src.models.identity_map import forget
         from src.persistence import repo
 
         obj = cls.get(id)
@@ -78,12 +347,46 @@ class Base(ABC):
         if not obj:
             return False
 
+        forget(obj)
+
         return repo.delete(obj)
 
     @abstractmethod
     def to_dict(self) -> dict:
         """Returns the dictionary representation of the object"""
 
+    def json_stamp(self) -> Any:
+        """
+        Returns the state to_dict reads outside of the attributes of the
+        object, the cached JSON is encoded again when it changes
+
+        Classes whose to_dict reads other objects should override it
+        """
+        return None
+
+    def json_dict(self, stamp: Any) -> dict:
+        """
+        Returns the dictionary to_json encodes, given the json_stamp it
+        has just read
+
+        Classes whose stamp holds what to_dict reads should override it
+        """
+        return self.to_dict()
+
+    def to_json(self) -> str:
+        """
+        Returns the compact JSON of to_dict, encoded once and kept until
+        an attribute of the object is set or its json_stamp changes
+        """
+        stamp = self.json_stamp()
+        cached = getattr(self, "_json", None)
+
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, _encoder.encode(self.json_dict(stamp)))
+            object.__setattr__(self, "_json", cached)
+
+        return cached[1]
+
     @staticmethod
     @abstractmethod
     def create(data: dict) -> Any:
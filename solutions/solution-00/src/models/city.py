@@ -9,6 +9,8 @@ from src.models.country import Country
 class City(Base):
     """City representation"""
 
+    __slots__ = ("name", "country_code")
+
     name: str
     country_code: str
 
@@ -59,9 +61,9 @@ class City(Base):
         if not city:
             raise ValueError("City not found")
 
-        for key, value in data.items():
-            setattr(city, key, value)
+        changed = city.assign(data)
 
-        repo.update(city)
+        if changed:
+            repo.update(city, fields=changed)
 
         return city
@@ -22,6 +22,11 @@ class Country:
         self.name = name
         self.country_code = code
 
+    @property
+    def id(self) -> str:
+        """Countries are identified by their code"""
+        return self.country_code
+
     def __repr__(self) -> str:
         """Dummy repr"""
         return f"<Country {self.country_code} ({self.name})>"
@@ -45,10 +50,9 @@ class Country:
     @staticmethod
     def get(code: str) -> "Country | None":
         """Get a country by its code"""
-        for country in Country.get_all():
-            if country.country_code == code:
-                return country
-        return None
+        from src.persistence import repo
+
+        return repo.get("country", code)
 
     @staticmethod
     def create(name: str, code: str) -> "Country":
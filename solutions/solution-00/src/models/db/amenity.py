@@ -1,7 +1,7 @@
 """
 Amenity related functionality
 """
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from src.models.db.place import Place
@@ -49,35 +49,63 @@ class Amenity(BaseModel):
         if not amenity:
             return None
 
-        if "name" in data:
-            amenity.name = data["name"]
+        changed = amenity.assign(
+            {key: data[key] for key in ("name",) if key in data}
+        )
 
-        repo.update(amenity)
+        if changed:
+            repo.update(amenity, fields=changed)
 
         return amenity
 
 
 class PlaceAmenity(BaseModel):
-    """PlaceAmenity representation"""
-    __tablename__ = "placeamenity"
+    """
+    Link between a place and one of its amenities
 
-    name = Column(String(150), unique=True, nullable=False)
-    place_id = Column(String(256), ForeignKey(Place.id), nullable=False)
-    amenity_id = Column(String(256), ForeignKey(Amenity.id), nullable=False)
+    The links are looked up by the unique `(place_id, amenity_id)`
+    index and by the index over `amenity_id`
+    """
+    __tablename__ = "placeamenity"
 
-    place = relationship('Place', foreign_keys='PlaceAmenity.place_id')
-    amenity = relationship('Amenity', foreign_keys='PlaceAmenity.amenity_id')
+    place_id = Column(
+        String(256),
+        ForeignKey(Place.id),
+        nullable=False,
+        index=True,
+    )
+    amenity_id = Column(
+        String(256),
+        ForeignKey(Amenity.id),
+        nullable=False,
+        index=True,
+    )
+
+    place = relationship("Place", back_populates="amenities")
+    amenity = relationship("Amenity")
+
+    __table_args__ = (
+        Index(
+            "ix_placeamenity_place_id_amenity_id",
+            "place_id",
+            "amenity_id",
+            unique=True,
+        ),
+    )
 
     def __repr__(self) -> str:
         """Dummy repr"""
-        return f"<PlaceAmenity ({self.place.id} - {self.amenity.id})>"
+        return f"<PlaceAmenity ({self.place_id} - {self.amenity_id})>"
 
     def to_dict(self) -> dict:
-        """Dictionary representation of the object"""
+        """
+        Dictionary representation of the object, from the id columns so
+        that listing links doesn't load their place and amenity
+        """
         return {
             "id": self.id,
-            "place_id": self.place.id,
-            "amenity_id": self.amenity.id,
+            "place_id": self.place_id,
+            "amenity_id": self.amenity_id,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
@@ -87,45 +115,108 @@ class PlaceAmenity(BaseModel):
         """Get a PlaceAmenity object by place_id and amenity_id"""
         from src.persistence import repo
 
-        place_amenities: list[PlaceAmenity] = repo.get_all("placeamenity")
+        return repo.find_one(
+            PlaceAmenity, place_id=place_id, amenity_id=amenity_id
+        )
+
+    @staticmethod
+    def amenities_of(place_id: str) -> list[Amenity]:
+        """
+        Returns the amenities of a place, sorted by name, with one query
+        for the links and one for their amenities
+        """
+        links = PlaceAmenity.find(place_id=place_id)
+        amenities = Amenity.get_many(link.amenity_id for link in links)
+
+        return sorted(amenities.values(), key=lambda amenity: amenity.name)
 
-        for place_amenity in place_amenities:
-            if (
-                place_amenity.place_id == place_id
-                and place_amenity.amenity_id == amenity_id
-            ):
-                return place_amenity
+    @staticmethod
+    def places_with(amenity_id: str) -> list[Place]:
+        """Returns the places having an amenity"""
+        links = PlaceAmenity.find(amenity_id=amenity_id)
 
-        return None
+        return list(Place.get_many(link.place_id for link in links).values())
 
     @staticmethod
     def create(data: dict) -> "PlaceAmenity":
         """Create a new PlaceAmenity object"""
-        from src.persistence import repo
+        result = PlaceAmenity.create_many([data])[0]
+
+        if isinstance(result, Exception):
+            raise result
 
-        new_place_amenity = PlaceAmenity(**data)
+        return result
 
-        repo.save(new_place_amenity)
+    @staticmethod
+    def create_many(items: list[dict]) -> list["PlaceAmenity | Exception"]:
+        """
+        Link several amenities to places, the places, amenities and links
+        of the whole batch are looked up at once. Returns the new link or
+        the error of each item
+        """
+        places = Place.get_many(item.get("place_id") for item in items)
+        amenities = Amenity.get_many(item.get("amenity_id") for item in items)
+        linked = {
+            (link.place_id, link.amenity_id)
+            for link in PlaceAmenity.find_in("place_id", places)
+        }
+        results = []
+
+        for item in items:
+            try:
+                place_id, amenity_id = item["place_id"], item["amenity_id"]
+
+                if place_id not in places:
+                    raise ValueError(f"Place with ID {place_id} not found")
+                if amenity_id not in amenities:
+                    raise ValueError(f"Amenity with ID {amenity_id} not found")
+                if (place_id, amenity_id) in linked:
+                    raise ValueError(
+                        f"Amenity {amenity_id} already linked to the place"
+                    )
+
+                new_link = PlaceAmenity(**item)
+                new_link.generate_id()
 
-        return new_place_amenity
+                linked.add((place_id, amenity_id))
+                results.append(new_link)
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        return PlaceAmenity.save_many(results)
 
     @staticmethod
     def delete(place_id: str, amenity_id: str) -> bool:
         """Delete a PlaceAmenity object by place_id and amenity_id"""
+        return PlaceAmenity.delete_many(place_id, [amenity_id])[0]
+
+    @staticmethod
+    def delete_many(place_id: str, amenity_ids: list[str]) -> list[bool]:
+        """
+        Unlink several amenities from a place, its links are looked up
+        at once. Returns whether each amenity was linked
+        """
         from src.persistence import repo
 
-        place_amenity = PlaceAmenity.get(place_id, amenity_id)
+        links = {
+            link.amenity_id: link
+            for link in PlaceAmenity.find(place_id=place_id)
+        }
+        results = []
+
+        for amenity_id in amenity_ids:
+            link = links.pop(amenity_id, None)
 
-        if not place_amenity:
-            return False
+            if link:
+                repo.delete(link)
 
-        repo.delete(place_amenity)
+            results.append(link is not None)
 
-        return True
+        return results
 
     @staticmethod
     def update(entity_id: str, data: dict):
         """Not implemented, isn't needed"""
         raise NotImplementedError(
             "This method is defined only because of the Base class"
-        )
\ No newline at end of file
+        )
@@ -1,10 +1,14 @@
 import datetime
-from typing import Any
+from functools import partial
+from typing import Any, Iterator
 import uuid
 from sqlalchemy import Column, String, DateTime
 
 from src.db import db
 
+# Tells apart the attributes an object doesn't have
+_unset = object()
+
 
 class BaseModel(db.Model):
     """ Base class for all models """
@@ -30,6 +34,28 @@ class BaseModel(db.Model):
     def generate_id(self):
         self.id = str(uuid.uuid4())
 
+    def normalized(self, name: str, value: Any) -> Any:
+        """
+        Returns the value a field is stored with when set to value,
+        classes normalizing a field on set should override it
+        """
+        return value
+
+    def assign(self, data: dict) -> set[str]:
+        """
+        Sets the fields of data whose normalized value differs from the
+        current one, returns their names, empty when the update changes
+        nothing. The unchanged columns are left out of the UPDATE
+        """
+        changed = set()
+
+        for key, value in data.items():
+            if getattr(self, key, _unset) != self.normalized(key, value):
+                setattr(self, key, value)
+                changed.add(key)
+
+        return changed
+
     @classmethod
     def get(cls, id) -> "Any | None":
         """
@@ -37,11 +63,13 @@ class BaseModel(db.Model):
         of a class by its id
 
         If a class needs a different implementation,
-        it should override this method
+        it should override this method. The objects found are kept
+        for the rest of the request by the identity map
         """
+        from src.models.identity_map import lookup
         from src.persistence import repo
 
-        return repo.get(cls, id)
+        return lookup(cls.__name__.lower(), id, lambda: repo.get(cls, id))
 
     @classmethod
     def get_all(cls) -> list["Any"]:
@@ -55,6 +83,161 @@ class BaseModel(db.Model):
 
         return repo.get_all(cls)
 
+    @classmethod
+    def iter_all(cls) -> Iterator["Any"]:
+        """
+        This is a common method to iterate over all objects of a class
+        without loading them all at once when the repository can
+        """
+        from src.persistence import repo
+
+        return repo.iter_all(cls)
+
+    @classmethod
+    def page(cls, after: str | None, limit: int) -> tuple[list, str | None]:
+        """
+        This is a common method to get a page of objects of a class
+        ordered by id, returns the objects and the next cursor
+        """
+        from src.persistence import repo
+
+        return repo.page(cls, after, limit)
+
+    @classmethod
+    def count(cls) -> int:
+        """This is a common method to count the objects of a class"""
+        from src.persistence import repo
+
+        return repo.count(cls)
+
+    @classmethod
+    def find(cls, **equals) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class
+        whose fields equal the given values
+        """
+        from src.persistence import repo
+
+        return repo.find(cls, **equals)
+
+    @classmethod
+    def find_in(cls, field: str, values) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class
+        whose field is one of the given values
+        """
+        from src.persistence import repo
+
+        return repo.find_in(cls, field, values)
+
+    @classmethod
+    def find_range(cls, **ranges: tuple) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class whose
+        fields are inside the given (low, high) ranges, ordered by id
+        """
+        from src.persistence import repo
+
+        return repo.find_range(cls, **ranges)
+
+    @classmethod
+    def search(cls, query: str, limit: int) -> list[tuple["Any", float]]:
+        """
+        This is a common method to get the limit best (object, score)
+        pairs of a class for a full-text query, best first
+        """
+        from src.persistence import repo
+
+        return repo.search(cls, query, limit)
+
+    @classmethod
+    def find_within(
+        cls, box: tuple[float, float, float, float]
+    ) -> list["Any"]:
+        """
+        This is a common method to get all objects of a class whose
+        latitude and longitude are inside a (south, west, north, east)
+        box, only meaningful for classes having a position
+        """
+        from src.persistence import repo
+
+        return repo.find_within(cls, box)
+
+    @classmethod
+    def select(
+        cls,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+    ) -> list["Any"]:
+        """
+        This is a common method to get the objects of a class whose
+        fields are inside the (low, high) ranges and whose position is
+        inside the box, ordered by the sort field (`-field` descending)
+        and then by id
+        """
+        from src.persistence import repo
+
+        return repo.select(cls, ranges, box, sort)
+
+    @classmethod
+    def aggregate(
+        cls,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        This is a common method to count the objects of a class selected
+        like `select` and to get the min, max and avg of their fields
+        """
+        from src.persistence import repo
+
+        return repo.aggregate(cls, fields, ranges, box)
+
+    @classmethod
+    def get_many(cls, ids) -> dict[str, "Any"]:
+        """
+        This is a common method to get several objects of a class
+        by their ids in one lookup, returns them by id. The ids found
+        earlier in the request are answered by the identity map
+        """
+        from src.models.identity_map import lookup_many
+
+        model_name = cls.__name__.lower()
+
+        return lookup_many(model_name, ids, partial(cls.find_in, "id"))
+
+    @staticmethod
+    def save_many(results: list, durable: bool = False) -> list:
+        """
+        This is a common method to save the objects of a bulk create
+        in one batch
+
+        results holds the new objects and the errors of the rejected
+        items, the objects the repository fails to save are replaced
+        by their error
+        """
+        from src.persistence import repo
+
+        objs = [obj for obj in results if not isinstance(obj, Exception)]
+        errors = iter(repo.save_many(objs, durable=durable))
+
+        return [
+            obj if isinstance(obj, Exception) else next(errors) or obj
+            for obj in results
+        ]
+
+    @classmethod
+    def find_one(cls, **equals) -> "Any | None":
+        """
+        This is a common method to get the first object of a class
+        whose fields equal the given values
+        """
+        from src.persistence import repo
+
+        return repo.find_one(cls, **equals)
+
     @classmethod
     def delete(cls, id) -> bool:
         """
@@ -64,6 +247,7 @@ class BaseModel(db.Model):
         If a class needs a different implementation,
         it should override this method
         """
+        from src.models.identity_map import forget
         from src.persistence import repo
 
         obj = cls.get(id)
@@ -71,6 +255,8 @@ class BaseModel(db.Model):
         if not obj:
             return False
 
+        forget(obj)
+
         return repo.delete(obj)
 
     def to_dict(self):
@@ -80,4 +266,13 @@ class BaseModel(db.Model):
                 result[key] = value.isoformat()
             else:
                 result[key] = value
-        return result
\ No newline at end of file
+        return result
+
+    def to_json(self) -> str:
+        """
+        Returns the compact JSON of to_dict, encoded on each call as the
+        objects only live in the session of a request
+        """
+        from flask import current_app
+
+        return current_app.json.dumps(self.to_dict(), separators=(",", ":"))
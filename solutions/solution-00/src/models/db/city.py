@@ -13,7 +13,12 @@ class City(BaseModel):
     __tablename__ = "city"
 
     name = Column(String(120), nullable=False, unique=True)
-    country_code = Column(String(3), ForeignKey(Country.country_code), nullable=False)
+    country_code = Column(
+        String(3),
+        ForeignKey(Country.country_code),
+        nullable=False,
+        index=True,
+    )
 
     country = relationship('Country', foreign_keys='City.country_code')
 
@@ -58,9 +63,9 @@ class City(BaseModel):
         if not city:
             raise ValueError("City not found")
 
-        for key, value in data.items():
-            setattr(city, key, value)
+        changed = city.assign(data)
 
-        repo.update(city)
+        if changed:
+            repo.update(city, fields=changed)
 
         return city
\ No newline at end of file
@@ -38,10 +38,9 @@ class Country(BaseModel):
     @staticmethod
     def get(code: str) -> "Country | None":
         """Get a country by its code"""
-        for country in Country.get_all():
-            if country.country_code == code:
-                return country
-        return None
+        from src.persistence import repo
+
+        return repo.find_one(Country, country_code=code)
 
     @staticmethod
     def create(name: str, code: str) -> "Country":
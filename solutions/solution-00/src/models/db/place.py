@@ -1,12 +1,14 @@
 """
 Place related functionality
 """
-from sqlalchemy import Column, String, Float, ForeignKey, Integer
+from sqlalchemy import Column, String, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from src.models.db.city import City
 from src.models.db.user import User
 from .base_model import BaseModel
+from .search import full_text_search
+from utils.constants import SEARCH_FIELDS
 
 
 class Place(BaseModel):
@@ -18,19 +20,51 @@ class Place(BaseModel):
     address = Column(String, nullable=False)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
-    host_id = Column(String(256), ForeignKey(User.id), nullable=False)
-    city_id = Column(String(256), ForeignKey(City.id), nullable=False)
-    price_per_night = Column(Integer, nullable=False)
-    number_of_rooms = Column(Integer, nullable=False)
-    number_of_bathrooms = Column(Integer, nullable=False)
-    max_guests = Column(Integer, nullable=False)
+    host_id = Column(
+        String(256),
+        ForeignKey(User.id),
+        nullable=False,
+        index=True,
+    )
+    city_id = Column(
+        String(256),
+        ForeignKey(City.id),
+        nullable=False,
+        index=True,
+    )
+    price_per_night = Column(Integer, nullable=False, index=True)
+    number_of_rooms = Column(Integer, nullable=False, index=True)
+    number_of_bathrooms = Column(Integer, nullable=False, index=True)
+    max_guests = Column(Integer, nullable=False, index=True)
 
     amenities = relationship("PlaceAmenity", back_populates="place")
+    # Loaded along with the places to avoid a query per place payload
+    rating_stats = relationship(
+        "RatingStats",
+        primaryjoin="and_(foreign(RatingStats.target_id) == Place.id, "
+        "RatingStats.scope == 'place')",
+        viewonly=True,
+        uselist=False,
+        lazy="selectin",
+    )
+
+    # Serves the bounding box queries of `GET /places?near=` and `?bbox=`
+    __table_args__ = (
+        Index("ix_place_latitude_longitude", "latitude", "longitude"),
+    )
 
     def __repr__(self) -> str:
         """Dummy repr"""
         return f"<Place {self.id} ({self.name})>"
 
+    @property
+    def rating(self) -> dict:
+        """Review count and average rating of the place"""
+        if not self.rating_stats:
+            return {"count": 0, "average": None}
+
+        return self.rating_stats.summary()
+
     def to_dict(self) -> dict:
         """Dictionary representation of the object"""
         return {
@@ -46,6 +80,7 @@ class Place(BaseModel):
             "number_of_rooms": self.number_of_rooms,
             "number_of_bathrooms": self.number_of_bathrooms,
             "max_guests": self.max_guests,
+            "rating": self.rating,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
@@ -72,6 +107,36 @@ class Place(BaseModel):
 
         return new_place
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Place | Exception"]:
+        """
+        Create several places, the hosts and cities of the whole batch
+        are looked up at once. Returns the new place or the error of
+        each item
+        """
+        hosts = User.get_many(item.get("host_id") for item in items)
+        cities = City.get_many(item.get("city_id") for item in items)
+        results = []
+
+        for item in items:
+            try:
+                if item["host_id"] not in hosts:
+                    raise ValueError(
+                        f"User with ID {item['host_id']} not found"
+                    )
+                if item["city_id"] not in cities:
+                    raise ValueError(
+                        f"City with ID {item['city_id']} not found"
+                    )
+
+                new_place = Place(**item)
+                new_place.generate_id()
+                results.append(new_place)
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        return Place.save_many(results)
+
     @staticmethod
     def update(place_id: str, data: dict) -> "Place | None":
         """Update an existing place"""
@@ -82,9 +147,12 @@ class Place(BaseModel):
         if not place:
             return None
 
-        for key, value in data.items():
-            setattr(place, key, value)
+        changed = place.assign(data)
+
+        if changed:
+            repo.update(place, fields=changed)
+
+        return place
 
-        repo.update(place)
 
-        return place
\ No newline at end of file
+full_text_search(Place.__table__, SEARCH_FIELDS["place"])
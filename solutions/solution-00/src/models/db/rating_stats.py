@@ -0,0 +1,178 @@
+"""
+Rating aggregates related functionality
+"""
+from sqlalchemy import Column, Float, Integer, String
+
+from src.models.db.place import Place
+from .base_model import BaseModel
+
+SCOPES = ("place", "host", "city")
+
+
+def stats_id(scope: str, target_id: str) -> str:
+    """Id of the stats of a place, host or city"""
+    return f"{scope}:{target_id}"
+
+
+def star(rating) -> int:
+    """Histogram bucket of a rating, from 1 to 5 stars"""
+    return min(max(round(float(rating)), 1), 5)
+
+
+class RatingStats(BaseModel):
+    """
+    Running count, sum and histogram of the ratings of the reviews of a
+    place, of the places of a host or of the places of a city
+
+    They are kept up to date by `Review.create`, `Review.update` and
+    `Review.delete`, and recomputed from the reviews by `rebuild`.
+    The histogram is stored as a column per star, so every counter is
+    incremented by the database
+    """
+    __tablename__ = "rating_stats"
+
+    scope = Column(String(16), nullable=False)
+    target_id = Column(String(256), nullable=False, index=True)
+    count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+    stars_1 = Column(Integer, nullable=False, default=0)
+    stars_2 = Column(Integer, nullable=False, default=0)
+    stars_3 = Column(Integer, nullable=False, default=0)
+    stars_4 = Column(Integer, nullable=False, default=0)
+    stars_5 = Column(Integer, nullable=False, default=0)
+
+    def __init__(self, scope: str, target_id: str, **kw) -> None:
+        """Creates empty stats"""
+        super().__init__(scope=scope, target_id=target_id, **kw)
+
+        self.id = stats_id(scope, target_id)
+        self.count = kw.get("count", 0)
+        self.total = kw.get("total", 0.0)
+        self.histogram = list(kw.get("histogram") or [0] * 5)
+
+    def __repr__(self) -> str:
+        """Dummy repr"""
+        return f"<RatingStats {self.id} ({self.count})>"
+
+    @property
+    def histogram(self) -> list[int]:
+        """Number of ratings of 1 to 5 stars"""
+        return [getattr(self, f"stars_{s}") or 0 for s in range(1, 6)]
+
+    @histogram.setter
+    def histogram(self, histogram: list[int]) -> None:
+        """Sets the number of ratings of 1 to 5 stars"""
+        for s, n in enumerate(histogram, start=1):
+            setattr(self, f"stars_{s}", n)
+
+    @property
+    def average(self) -> float | None:
+        """Average rating, None without reviews"""
+        return round(self.total / self.count, 2) if self.count else None
+
+    def summary(self) -> dict:
+        """Count and average, as shown in the place payloads"""
+        return {"count": self.count, "average": self.average}
+
+    def to_dict(self) -> dict:
+        """Dictionary representation of the object"""
+        return {
+            "id": self.id,
+            "scope": self.scope,
+            "target_id": self.target_id,
+            "count": self.count,
+            "total": self.total,
+            "average": self.average,
+            "histogram": {
+                str(s): n for s, n in enumerate(self.histogram, start=1)
+            },
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    @staticmethod
+    def of(scope: str, target_id: str) -> "RatingStats":
+        """Returns the stats of a place, host or city, empty if unset"""
+        return RatingStats.get(stats_id(scope, target_id)) or RatingStats(
+            scope, target_id
+        )
+
+    @staticmethod
+    def deltas(
+        changes: list[tuple[str, float, int]]
+    ) -> dict[tuple[str, str], list]:
+        """
+        Sums `(place_id, rating, +1 or -1)` changes into the count, total
+        and histogram to add to the stats of each `(scope, target_id)`
+        """
+        places = Place.get_many(place_id for place_id, _, _ in changes)
+        deltas: dict[tuple[str, str], list] = {}
+
+        for place_id, rating, sign in changes:
+            place = places.get(place_id)
+            targets = [("place", place_id)]
+
+            if place:
+                targets += [("host", place.host_id), ("city", place.city_id)]
+
+            for target in targets:
+                delta = deltas.setdefault(target, [0, 0.0, [0] * 5])
+                delta[0] += sign
+                delta[1] += sign * float(rating)
+                delta[2][star(rating) - 1] += sign
+
+        return deltas
+
+    @staticmethod
+    def record(changes: list[tuple[str, float, int]]) -> list["RatingStats"]:
+        """
+        Applies `(place_id, rating, +1 or -1)` changes to the stats of
+        the places, and of their hosts and cities, and saves them
+
+        The counters are added to by the database (`count = count + d`),
+        so two reviews written at once, by this process or by another
+        worker, are both counted. Returns the changed stats
+        """
+        from src.persistence import repo
+
+        targets = {}
+        amounts = {}
+
+        for target, (count, total, histogram) in (
+            RatingStats.deltas(changes).items()
+        ):
+            targets[stats_id(*target)] = target
+            amounts[stats_id(*target)] = {
+                "count": count,
+                "total": total,
+                **{
+                    f"stars_{s}": n
+                    for s, n in enumerate(histogram, start=1)
+                },
+            }
+
+        return repo.increment(
+            RatingStats, amounts, lambda obj_id: RatingStats(*targets[obj_id])
+        )
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recomputes every stats from the reviews, returns the number of
+        reviews read. Run it with the server stopped, the reviews
+        written meanwhile could be counted twice
+        """
+        from src.models.db.review import Review
+        from src.persistence import repo
+
+        reviews = [(r.place_id, r.rating, 1) for r in Review.iter_all()]
+        stats = RatingStats.get_all()
+
+        for current in stats:
+            current.count, current.total = 0, 0.0
+            current.histogram = [0] * 5
+
+        repo.save_many(stats)
+        RatingStats.record(reviews)
+
+        return len(reviews)
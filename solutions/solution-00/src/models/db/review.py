@@ -4,16 +4,29 @@ Review related functionality
 from sqlalchemy import Column, String, Float, ForeignKey
 
 from src.models.db.place import Place
+from src.models.db.rating_stats import RatingStats
 from src.models.db.user import User
 from .base_model import BaseModel
+from .search import full_text_search
+from utils.constants import SEARCH_FIELDS
 
 
 class Review(BaseModel):
     """Review representation"""
     __tablename__ = "review"
 
-    place_id = Column(String(256), ForeignKey(Place.id), nullable=False)
-    user_id = Column(String(256), ForeignKey(User.id), nullable=False)
+    place_id = Column(
+        String(256),
+        ForeignKey(Place.id),
+        nullable=False,
+        index=True,
+    )
+    user_id = Column(
+        String(256),
+        ForeignKey(User.id),
+        nullable=False,
+        index=True,
+    )
     comment = Column(String, nullable=False)
     rating = Column(Float, nullable=False)
 
@@ -52,9 +65,65 @@ class Review(BaseModel):
         new_review.generate_id()
 
         repo.save(new_review)
+        RatingStats.record([(new_review.place_id, new_review.rating, 1)])
 
         return new_review
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Review | Exception"]:
+        """
+        Create several reviews, the users and places of the whole batch
+        are looked up at once. Returns the new review or the error of
+        each item
+        """
+        users = User.get_many(item.get("user_id") for item in items)
+        places = Place.get_many(item.get("place_id") for item in items)
+        results = []
+
+        for item in items:
+            try:
+                if item["user_id"] not in users:
+                    raise ValueError(
+                        f"User with ID {item['user_id']} not found"
+                    )
+                if item["place_id"] not in places:
+                    raise ValueError(
+                        f"Place with ID {item['place_id']} not found"
+                    )
+
+                new_review = Review(**item)
+                new_review.generate_id()
+                results.append(new_review)
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        results = Review.save_many(results)
+        created = [r for r in results if not isinstance(r, Exception)]
+
+        if created:
+            RatingStats.record(
+                [(review.place_id, review.rating, 1) for review in created]
+            )
+
+        return results
+
+    @classmethod
+    def delete(cls, id) -> bool:
+        """Delete a review and remove its rating from the stats"""
+        from src.models.identity_map import forget
+        from src.persistence import repo
+
+        review = cls.get(id)
+
+        if not review or not repo.delete(review):
+            return False
+
+        forget(review)
+
+        RatingStats.record([(review.place_id, review.rating, -1)])
+
+        return True
+
     @staticmethod
     def update(review_id: str, data: dict) -> "Review | None":
         """Update an existing review"""
@@ -65,9 +134,19 @@ class Review(BaseModel):
         if not review:
             raise ValueError("Review not found")
 
-        for key, value in data.items():
-            setattr(review, key, value)
+        old = (review.place_id, review.rating)
+
+        changed = review.assign(data)
+
+        if changed:
+            repo.update(review, fields=changed)
+
+        if old != (review.place_id, review.rating):
+            RatingStats.record([
+                (*old, -1), (review.place_id, review.rating, 1)
+            ])
+
+        return review
 
-        repo.update(review)
 
-        return review
\ No newline at end of file
+full_text_search(Review.__table__, SEARCH_FIELDS["review"])
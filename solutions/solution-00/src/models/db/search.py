@@ -0,0 +1,75 @@
+"""
+Full-text search support of the DB models
+
+SQLite keeps an FTS5 table per searchable model, filled by triggers on
+the model table. PostgreSQL indexes a `to_tsvector` expression of the
+searchable columns with GIN, `postgres_document` builds that expression
+"""
+
+from sqlalchemy import DDL, Table, event
+
+
+def fts_table(table: str) -> str:
+    """Name of the FTS5 table of a model table"""
+    return f"{table}_fts"
+
+
+def postgres_document(columns: tuple[str, ...]) -> str:
+    """SQL of the text search document of the columns in PostgreSQL"""
+    text = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+
+    return f"to_tsvector('simple', {text})"
+
+
+def sqlite_statements(table: str, columns: tuple[str, ...]) -> list[str]:
+    """
+    Statements creating the FTS5 table of a model table and the triggers
+    keeping it up to date, its rows share the rowid of the model rows
+    """
+    fts = fts_table(table)
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.rowid, {new});"
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {names}) "
+        f"VALUES ('delete', old.rowid, {old});"
+    )
+
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+        f"content='{table}', content_rowid='rowid', "
+        f"tokenize='unicode61 remove_diacritics 0')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} "
+        f"BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update "
+        f"AFTER UPDATE OF {names} ON {table} BEGIN {delete} {insert} END",
+        # Indexes the rows that existed before the table was created
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def full_text_search(table: Table, columns: tuple[str, ...]) -> None:
+    """Creates the full-text index of the columns with the table"""
+    for statement in sqlite_statements(table.name, columns):
+        event.listen(
+            table, "after_create", DDL(statement).execute_if(dialect="sqlite")
+        )
+
+    event.listen(
+        table,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {fts_table(table.name)}").execute_if(
+            dialect="sqlite"
+        ),
+    )
+    event.listen(
+        table,
+        "after_create",
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS ix_{table.name}_search "
+            f"ON {table.name} USING GIN ({postgres_document(columns)})"
+        ).execute_if(dialect="postgresql"),
+    )
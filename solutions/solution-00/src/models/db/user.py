@@ -4,13 +4,24 @@ user related functionality
 from copy import copy
 import uuid
 from sqlalchemy import Column, String, Boolean
+from sqlalchemy.orm import validates
 
 from .base_model import BaseModel
-from src.app_bcrypt import generate_password, check_password
+from src.app_bcrypt import (
+    check_password,
+    generate_password,
+    needs_rehash,
+)
+from utils.emails import normalize_email
 
 
 class User(BaseModel):
-    """User representation"""
+    """
+    User representation
+
+    The email is stored normalized (see `normalize_email`), so the
+    lookups of any case are answered by its unique index
+    """
     __tablename__ = "user"
 
     email = Column(String(120), unique=True, nullable=False)
@@ -23,12 +34,34 @@ class User(BaseModel):
         """Dummy repr"""
         return f"<User {self.id} ({self.email})>"
 
+    @validates("email")
+    def validate_email(self, key: str, email: str) -> str:
+        """Normalizes the email set on the user"""
+        return normalize_email(email)
+
+    def normalized(self, name: str, value):
+        """The email is stored normalized"""
+        return normalize_email(value) if name == "email" else value
+
     def set_password(self, password):
         self.password_hash = generate_password(password)
 
     def check_password(self, password):
         return check_password(self.password_hash, password)
 
+    def rehash_password(self, password: str) -> None:
+        """
+        Hashes again a checked password whose hash was made with another
+        cost factor than the current one, called on login
+        """
+        from src.persistence import repo
+
+        if not needs_rehash(self.password_hash):
+            return
+
+        self.set_password(password)
+        repo.update(self, durable=True)
+
     def to_dict(self) -> dict:
         """Dictionary representation of the object"""
         return {
@@ -42,16 +75,18 @@ class User(BaseModel):
             "updated_at": self.updated_at,
         }
 
+    @staticmethod
+    def find_by_email(email: str) -> "User | None":
+        """Returns the user with the email, in any case"""
+        return User.find_one(email=normalize_email(email))
+
     @staticmethod
     def create(user: dict) -> "User":
         """Create a new user"""
         from src.persistence import repo
 
-        users: list["User"] = User.get_all()
-
-        for u in users:
-            if u.email == user["email"]:
-                raise ValueError("User already exists")
+        if User.find_by_email(user["email"]):
+            raise ValueError("User already exists")
 
         user['password_hash'] = None
         password = copy(user['password'])
@@ -61,10 +96,44 @@ class User(BaseModel):
         new_user.set_password(password)
         new_user.id = str(uuid.uuid4())
 
-        repo.save(new_user)
+        repo.save(new_user, durable=True)
 
         return new_user
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["User | Exception"]:
+        """
+        Create several users, the emails of the whole batch are checked
+        at once. Returns the new user or the error of each item
+        """
+        emails = {
+            user.email
+            for user in User.find_in(
+                "email",
+                (normalize_email(item.get("email")) for item in items),
+            )
+        }
+        results = []
+
+        for item in items:
+            try:
+                if normalize_email(item["email"]) in emails:
+                    raise ValueError("User already exists")
+
+                data = dict(item)
+                password = data.pop("password")
+
+                new_user = User(**(data | {"password_hash": None}))
+                new_user.set_password(password)
+                new_user.id = str(uuid.uuid4())
+
+                emails.add(new_user.email)
+                results.append(new_user)
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        return User.save_many(results, durable=True)
+
     @staticmethod
     def update(user_id: str, data: dict) -> "User | None":
         """Update an existing user"""
@@ -76,12 +145,18 @@ class User(BaseModel):
             return None
 
         if "email" in data:
-            user.email = data["email"]
-        if "first_name" in data:
-            user.first_name = data["first_name"]
-        if "last_name" in data:
-            user.last_name = data["last_name"]
+            other = User.find_by_email(data["email"])
+
+            if other and other.id != user.id:
+                raise ValueError("User already exists")
+
+        changed = user.assign({
+            key: data[key]
+            for key in ("email", "first_name", "last_name")
+            if key in data
+        })
 
-        repo.update(user)
+        if changed:
+            repo.update(user, fields=changed)
 
         return user
\ No newline at end of file
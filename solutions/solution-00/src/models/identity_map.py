@@ -0,0 +1,89 @@
+"""
+Request scoped identity map of the models
+
+Within a request the same object is often looked up several times, by
+the controller and again by the model method it calls. `Base.get` and
+`BaseModel.get` keep the objects they find in a map stored on Flask `g`,
+so each id is read from the repository at most once per request.
+Outside of a request every lookup goes to the repository.
+"""
+
+from typing import Any, Callable
+
+from flask import g, has_request_context
+
+
+def lookup(model_name: str, obj_id, load: Callable[[], Any]) -> Any:
+    """
+    Object of a model by id, the one already found during the request
+    or else the one given by load, kept for the rest of the request
+    when it exists
+    """
+    if not isinstance(obj_id, str) or not has_request_context():
+        return load()
+
+    objs: dict = g.setdefault("identity_map", {})
+    g.identity_lookups = g.get("identity_lookups", 0) + 1
+
+    obj = objs.get((model_name, obj_id))
+
+    if obj is not None:
+        g.identity_saved = g.get("identity_saved", 0) + 1
+        return obj
+
+    obj = load()
+
+    if obj is not None:
+        objs[(model_name, obj_id)] = obj
+
+    return obj
+
+
+def lookup_many(
+    model_name: str, ids, load: Callable[[list], list]
+) -> dict[str, Any]:
+    """
+    Objects of a model by id, load only gets the ids not found yet
+    during the request and the objects it returns are kept
+    """
+    if not has_request_context():
+        return {obj.id: obj for obj in load(ids)}
+
+    objs: dict = g.setdefault("identity_map", {})
+    found, missing = {}, []
+
+    for obj_id in set(ids):
+        obj = objs.get((model_name, obj_id))
+
+        if obj is None:
+            missing.append(obj_id)
+        else:
+            found[obj_id] = obj
+
+    lookups = len(found) + len(missing)
+    g.identity_lookups = g.get("identity_lookups", 0) + lookups
+    g.identity_saved = g.get("identity_saved", 0) + len(found)
+
+    if missing:
+        for obj in load(missing):
+            found[obj.id] = obj
+            objs[(model_name, obj.id)] = obj
+
+    return found
+
+
+def forget(obj) -> None:
+    """Drops a deleted object from the map of the request"""
+    if has_request_context() and "identity_map" in g:
+        g.identity_map.pop((obj.__class__.__name__.lower(), obj.id), None)
+
+
+def debug_headers() -> dict[str, str]:
+    """Lookups made through the map and lookups it saved, if any"""
+    if not has_request_context() or "identity_lookups" not in g:
+        return {}
+
+    return {
+        "X-Identity-Map-Lookups": str(g.identity_lookups),
+        "X-Identity-Map-Saved": str(g.get("identity_saved", 0)),
+    }
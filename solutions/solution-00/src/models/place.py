@@ -10,6 +10,20 @@ from src.models.user import User
 class Place(Base):
     """Place representation"""
 
+    __slots__ = (
+        "name",
+        "description",
+        "address",
+        "latitude",
+        "longitude",
+        "host_id",
+        "city_id",
+        "price_per_night",
+        "number_of_rooms",
+        "number_of_bathrooms",
+        "max_guests",
+    )
+
     name: str
     description: str
     address: str
@@ -24,6 +38,8 @@ class Place(Base):
 
     def __init__(self, data: dict | None = None, **kw) -> None:
         """Dummy init"""
+        # `rating` is derived, to_dict only stores it for the clients
+        kw.pop("rating", None)
         super().__init__(**kw)
 
         if not data:
@@ -45,8 +61,38 @@ class Place(Base):
         """Dummy repr"""
         return f"<Place {self.id} ({self.name})>"
 
-    def to_dict(self) -> dict:
-        """Dictionary representation of the object"""
+    @property
+    def stats(self):
+        """
+        Rating stats of the place, None before its first review. They
+        are read past the identity map, which would keep the stats of
+        every place of a listing until the end of the request
+        """
+        from src.models.rating_stats import stats_id
+        from src.persistence import repo
+
+        return repo.get("ratingstats", stats_id("place", self.id))
+
+    @property
+    def rating(self) -> dict:
+        """Review count and average rating of the place"""
+        stats = self.stats
+
+        return stats.summary() if stats else {"count": 0, "average": None}
+
+    def json_stamp(self) -> dict:
+        """The rating of the payload, which changes with the stats"""
+        return self.rating
+
+    def json_dict(self, stamp: dict) -> dict:
+        """to_dict with the rating read for the stamp"""
+        return self.to_dict(rating=stamp)
+
+    def to_dict(self, rating: dict | None = None) -> dict:
+        """
+        Dictionary representation of the object, with the given rating
+        or else the current one
+        """
         return {
             "id": self.id,
             "name": self.name,
@@ -60,6 +106,7 @@ class Place(Base):
             "number_of_rooms": self.number_of_rooms,
             "number_of_bathrooms": self.number_of_bathrooms,
             "max_guests": self.max_guests,
+            "rating": self.rating if rating is None else rating,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
@@ -85,6 +132,34 @@ class Place(Base):
 
         return new_place
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Place | Exception"]:
+        """
+        Create several places, the hosts and cities of the whole batch
+        are looked up at once. Returns the new place or the error of
+        each item
+        """
+        hosts = User.get_many(item.get("host_id") for item in items)
+        cities = City.get_many(item.get("city_id") for item in items)
+        results = []
+
+        for item in items:
+            try:
+                if item["host_id"] not in hosts:
+                    raise ValueError(
+                        f"User with ID {item['host_id']} not found"
+                    )
+                if item["city_id"] not in cities:
+                    raise ValueError(
+                        f"City with ID {item['city_id']} not found"
+                    )
+
+                results.append(Place(data=item))
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        return Place.save_many(results)
+
     @staticmethod
     def update(place_id: str, data: dict) -> "Place | None":
         """Update an existing place"""
@@ -95,9 +170,9 @@ class Place(Base):
         if not place:
             return None
 
-        for key, value in data.items():
-            setattr(place, key, value)
+        changed = place.assign(data)
 
-        repo.update(place)
+        if changed:
+            repo.update(place, fields=changed)
 
         return place
@@ -0,0 +1,191 @@
+"""
+Rating aggregates related functionality
+"""
+
+from src.models.base import Base
+from src.models.place import Place
+
+SCOPES = ("place", "host", "city")
+
+
+def stats_id(scope: str, target_id: str) -> str:
+    """Id of the stats of a place, host or city"""
+    return f"{scope}:{target_id}"
+
+
+def star(rating) -> int:
+    """Histogram bucket of a rating, from 1 to 5 stars"""
+    return min(max(round(float(rating)), 1), 5)
+
+
+class RatingStats(Base):
+    """
+    Running count, sum and histogram of the ratings of the reviews of a
+    place, of the places of a host or of the places of a city
+
+    They are kept up to date by `Review.create`, `Review.update` and
+    `Review.delete`, and recomputed from the reviews by `rebuild`
+    """
+
+    __slots__ = ("scope", "target_id", "count", "total", "histogram")
+
+    scope: str
+    target_id: str
+    count: int
+    total: float
+    histogram: list[int]
+
+    def __init__(
+        self,
+        scope: str,
+        target_id: str,
+        count: int = 0,
+        total: float = 0.0,
+        histogram: list[int] | dict | None = None,
+        **kw,
+    ) -> None:
+        """Dummy init"""
+        # `average` is derived, to_dict only stores it for the clients
+        kw.pop("average", None)
+        super().__init__(**kw)
+
+        if isinstance(histogram, dict):
+            histogram = [histogram.get(str(s), 0) for s in range(1, 6)]
+
+        self.id = stats_id(scope, target_id)
+        self.scope = scope
+        self.target_id = target_id
+        self.count = count
+        self.total = total
+        self.histogram = list(histogram or [0] * 5)
+
+    def __repr__(self) -> str:
+        """Dummy repr"""
+        return f"<RatingStats {self.id} ({self.count})>"
+
+    @property
+    def average(self) -> float | None:
+        """Average rating, None without reviews"""
+        return round(self.total / self.count, 2) if self.count else None
+
+    def summary(self) -> dict:
+        """Count and average, as shown in the place payloads"""
+        return {"count": self.count, "average": self.average}
+
+    def to_dict(self) -> dict:
+        """Dictionary representation of the object"""
+        return {
+            "id": self.id,
+            "scope": self.scope,
+            "target_id": self.target_id,
+            "count": self.count,
+            "total": self.total,
+            "average": self.average,
+            "histogram": {
+                str(s): n for s, n in enumerate(self.histogram, start=1)
+            },
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+    @staticmethod
+    def of(scope: str, target_id: str) -> "RatingStats":
+        """Returns the stats of a place, host or city, empty if unset"""
+        return RatingStats.get(stats_id(scope, target_id)) or RatingStats(
+            scope, target_id
+        )
+
+    @staticmethod
+    def deltas(
+        changes: list[tuple[str, float, int]]
+    ) -> dict[tuple[str, str], list]:
+        """
+        Sums `(place_id, rating, +1 or -1)` changes into the count, total
+        and histogram to add to the stats of each `(scope, target_id)`
+        """
+        places = Place.get_many(place_id for place_id, _, _ in changes)
+        deltas: dict[tuple[str, str], list] = {}
+
+        for place_id, rating, sign in changes:
+            place = places.get(place_id)
+            targets = [("place", place_id)]
+
+            if place:
+                targets += [("host", place.host_id), ("city", place.city_id)]
+
+            for target in targets:
+                delta = deltas.setdefault(target, [0, 0.0, [0] * 5])
+                delta[0] += sign
+                delta[1] += sign * float(rating)
+                delta[2][star(rating) - 1] += sign
+
+        return deltas
+
+    @staticmethod
+    def record(changes: list[tuple[str, float, int]]) -> list["RatingStats"]:
+        """
+        Applies `(place_id, rating, +1 or -1)` changes to the stats of
+        the places, and of their hosts and cities, and saves them
+
+        The stats are read, added to and saved under the write lock of
+        the repository, so two reviews written at once, by this process
+        or by another worker sharing the versions, never both add to
+        the same count. Returns the changed stats
+        """
+        from src.persistence import repo
+
+        deltas = RatingStats.deltas(changes)
+
+        with repo.write_lock():
+            stats = {
+                current.id: current
+                for current in repo.find_in(
+                    "ratingstats", "id", [stats_id(*t) for t in deltas]
+                )
+            }
+            changed = []
+
+            for target, (count, total, histogram) in deltas.items():
+                current = stats.get(stats_id(*target)) or RatingStats(*target)
+                current.count += count
+                current.total += total
+                current.histogram = [
+                    n + d for n, d in zip(current.histogram, histogram)
+                ]
+                changed.append(current)
+
+            repo.save_many(changed)
+
+        return changed
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Recomputes every stats from the reviews, returns the number of
+        reviews read
+        """
+        from src.models.review import Review
+        from src.persistence import repo
+
+        with repo.write_lock():
+            reviews = [(r.place_id, r.rating, 1) for r in Review.iter_all()]
+            stats = RatingStats.get_all()
+
+            for current in stats:
+                current.count, current.total = 0, 0.0
+                current.histogram = [0] * 5
+
+            repo.save_many(stats)
+            RatingStats.record(reviews)
+
+        return len(reviews)
+
+    @staticmethod
+    def create(data: dict) -> "RatingStats":
+        """Stats are only created by the reviews"""
+        raise ValueError("Rating stats are kept by the reviews")
+
+    @staticmethod
+    def update(entity_id: str, data: dict) -> "RatingStats | None":
+        """Stats are only updated by the reviews"""
+        raise ValueError("Rating stats are kept by the reviews")
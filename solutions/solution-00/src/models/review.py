@@ -4,12 +4,15 @@ Review related functionality
 
 from src.models.base import Base
 from src.models.place import Place
+from src.models.rating_stats import RatingStats
 from src.models.user import User
 
 
 class Review(Base):
     """Review representation"""
 
+    __slots__ = ("place_id", "user_id", "comment", "rating")
+
     place_id: str
     user_id: str
     comment: str
@@ -60,9 +63,63 @@ class Review(Base):
         new_review = Review(**data)
 
         repo.save(new_review)
+        RatingStats.record([(new_review.place_id, new_review.rating, 1)])
 
         return new_review
 
+    @staticmethod
+    def create_many(items: list[dict]) -> list["Review | Exception"]:
+        """
+        Create several reviews, the users and places of the whole batch
+        are looked up at once. Returns the new review or the error of
+        each item
+        """
+        users = User.get_many(item.get("user_id") for item in items)
+        places = Place.get_many(item.get("place_id") for item in items)
+        results = []
+
+        for item in items:
+            try:
+                if item["user_id"] not in users:
+                    raise ValueError(
+                        f"User with ID {item['user_id']} not found"
+                    )
+                if item["place_id"] not in places:
+                    raise ValueError(
+                        f"Place with ID {item['place_id']} not found"
+                    )
+
+                results.append(Review(**item))
+            except (KeyError, TypeError, ValueError) as e:
+                results.append(e)
+
+        results = Review.save_many(results)
+        created = [r for r in results if not isinstance(r, Exception)]
+
+        if created:
+            RatingStats.record(
+                [(review.place_id, review.rating, 1) for review in created]
+            )
+
+        return results
+
+    @classmethod
+    def delete(cls, id) -> bool:
+        """Delete a review and remove its rating from the stats"""
+        from src.models.identity_map import forget
+        from src.persistence import repo
+
+        review = cls.get(id)
+
+        if not review or not repo.delete(review):
+            return False
+
+        forget(review)
+
+        RatingStats.record([(review.place_id, review.rating, -1)])
+
+        return True
+
     @staticmethod
     def update(review_id: str, data: dict) -> "Review | None":
         """Update an existing review"""
@@ -73,9 +130,16 @@ class Review(Base):
         if not review:
             raise ValueError("Review not found")
 
-        for key, value in data.items():
-            setattr(review, key, value)
+        old = (review.place_id, review.rating)
+
+        changed = review.assign(data)
+
+        if changed:
+            repo.update(review, fields=changed)
 
-        repo.update(review)
+        if old != (review.place_id, review.rating):
+            RatingStats.record([
+                (*old, -1), (review.place_id, review.rating, 1)
+            ])
 
         return review
@@ -1,28 +1,62 @@
 """ This module is responsible for selecting the repository
 to be used based on the environment variable REPOSITORY_ENV_VAR."""
 
+from contextlib import nullcontext
 import os
 
+from src.persistence.changes import SharedChangeLog
 from src.persistence.repository import Repository
-from utils.constants import REPOSITORY_ENV_VAR
+from src.persistence.versions import SharedVersions
+from utils.constants import (
+    MODEL_NAMES,
+    REPOSITORY_CACHE_ENV_VAR,
+    REPOSITORY_ENV_VAR,
+    REPOSITORY_VERSIONS_ENV_VAR,
+)
+
+repo: Repository  # or a CachingRepository wrapping it
+shared: SharedVersions | None = None
+
+# Only the stores outliving a process can be shared by several workers
+if os.getenv(REPOSITORY_VERSIONS_ENV_VAR) and os.getenv(
+    REPOSITORY_ENV_VAR
+) in ("db", "file", "pickle"):
+    shared = SharedVersions(
+        os.environ[REPOSITORY_VERSIONS_ENV_VAR], MODEL_NAMES
+    )
+
+# The workers load their data one at a time, none of them writing
+with shared.lock() if shared else nullcontext():
+    if os.getenv(key=REPOSITORY_ENV_VAR) == "db":
+        from src.persistence.db import DBRepository
+
+        repo = DBRepository()
+    elif os.getenv(REPOSITORY_ENV_VAR) == "file":
+        from src.persistence.file import FileRepository
+
+        repo = FileRepository()
+    elif os.getenv(REPOSITORY_ENV_VAR) == "pickle":
+        from src.persistence.pickled import PickleRepository
+
+        repo = PickleRepository()
+    else:
+        from src.persistence.memory import MemoryRepository
+
+        repo = MemoryRepository()
+
+    if shared:
+        repo.share_versions(shared)
+        repo.changes = SharedChangeLog(
+            f"{shared.filename}.changes", MODEL_NAMES
+        )
 
-repo: Repository
-
-if os.getenv(key=REPOSITORY_ENV_VAR) == "db":
-    from src.persistence.db import DBRepository
-
-    repo = DBRepository()
-elif os.getenv(REPOSITORY_ENV_VAR) == "file":
-    from src.persistence.file import FileRepository
-
-    repo = FileRepository()
-elif os.getenv(REPOSITORY_ENV_VAR) == "pickle":
-    from src.persistence.pickled import PickleRepository
+print(f"Using {repo.__class__.__name__} as repository")
 
-    repo = PickleRepository()
-else:
-    from src.persistence.memory import MemoryRepository
+if shared:
+    print(f"Sharing the write versions and changes in {shared.filename}")
 
-    repo = MemoryRepository()
+if os.getenv(REPOSITORY_CACHE_ENV_VAR) == "1":
+    from src.persistence.caching import CachingRepository
 
-print(f"Using {repo.__class__.__name__} as repository")
+    repo = CachingRepository(repo)
+    print("Caching the repository reads")
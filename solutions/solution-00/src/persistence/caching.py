@@ -0,0 +1,301 @@
+"""
+Read-through cache in front of a repository
+
+The CachingRepository keeps, for the models of REPOSITORY_CACHE_MODELS,
+the objects read by id with `get` and `find_in("id", ...)` in an LRU
+bounded by the size of the model. Each object is kept for the TTL of its
+model, and the ids that matched nothing for REPOSITORY_CACHE_NEGATIVE_TTL
+seconds, so repeated 404s don't reach the store either. The lists are
+left to the response cache of the conditional routes, rebuilding every
+object of a list from the cache is slower than loading the rows.
+
+Writes go through the cache, which drops the entries of the objects
+written. The writes made by another process are seen once the entries
+expire, or at the next `sync` when the versions are shared.
+"""
+
+from collections import OrderedDict
+import threading
+from time import monotonic
+from typing import Any, Callable
+
+from src.persistence.repository import Repository
+from utils.constants import (
+    REPOSITORY_CACHE_MODELS,
+    REPOSITORY_CACHE_NEGATIVE_TTL,
+)
+
+# Returned by ModelCache.get for a key it doesn't hold
+ABSENT = object()
+# Kept for the ids that matched no object
+NOT_FOUND = object()
+
+
+def model_key(model) -> str:
+    """Name of a model, given by name or by class"""
+    return model if isinstance(model, str) else model.__name__.lower()
+
+
+class ModelCache:
+    """
+    LRU of the objects of one model, each kept until its TTL ends
+
+    A read that misses takes a `token()` before going to the store, its
+    result is only kept if no write happened in between, so an object
+    read before a write can't be cached after it
+    """
+
+    def __init__(
+        self,
+        size: int,
+        ttl: float,
+        negative_ttl: float = REPOSITORY_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Creates an empty cache of at most size objects"""
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.__writes = 0
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        """Number of entries, expired or not"""
+        return len(self.__entries)
+
+    def token(self) -> int:
+        """Write count to give back to `put` after reading the store"""
+        return self.__writes
+
+    def __fresh(self, entry: tuple[float, Any] | None):
+        """Value of an entry, ABSENT when missing or expired"""
+        if entry is None:
+            self.misses += 1
+            return ABSENT
+
+        expires, value = entry
+
+        if expires <= self.clock():
+            self.expirations += 1
+            self.misses += 1
+            return ABSENT
+
+        self.hits += 1
+        if value is NOT_FOUND:
+            self.negative_hits += 1
+
+        return value
+
+    def get(self, key: str):
+        """Kept value of a key, NOT_FOUND for a missing id or ABSENT"""
+        with self.__lock:
+            value = self.__fresh(self.__entries.get(key))
+
+            if value is ABSENT:
+                self.__entries.pop(key, None)
+            else:
+                self.__entries.move_to_end(key)
+
+            return value
+
+    def put(self, key: str, value, token: int) -> None:
+        """Keeps the value of a key, evicting the least recently used"""
+        ttl = self.negative_ttl if value is NOT_FOUND else self.ttl
+
+        with self.__lock:
+            if ttl <= 0 or token != self.__writes:
+                return
+
+            self.__entries[key] = (self.clock() + ttl, value)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        """Drops a key after a write of its object"""
+        with self.__lock:
+            self.__writes += 1
+            self.__entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drops every entry"""
+        with self.__lock:
+            self.__writes += 1
+            self.__entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """Counters of the cache and its number of entries"""
+        return {
+            "entries": len(self.__entries),
+            "size": self.size,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class CachingRepository:
+    """
+    Wraps a repository, answering its reads of the cached models from
+    memory and passing everything else through
+
+    The objects are kept as returned by `detach` of the wrapped
+    repository and served through its `attach`, which lets the
+    DBRepository rebuild them in the session of each request, the
+    objects it can't detach are read from it every time
+    """
+
+    def __init__(
+        self,
+        inner: Repository,
+        models: dict[str, dict] = REPOSITORY_CACHE_MODELS,
+        negative_ttl: float = REPOSITORY_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        """Wraps the repository with a cache per model of models"""
+        self.inner = inner
+        self.caches = {
+            name: ModelCache(
+                negative_ttl=negative_ttl, clock=clock, **policy
+            )
+            for name, policy in models.items()
+        }
+
+    def __getattr__(self, name: str):
+        """Everything not cached is read from the wrapped repository"""
+        if name == "inner":
+            raise AttributeError(name)
+
+        return getattr(self.inner, name)
+
+    def get(self, model, obj_id: str):
+        """Get an object by id, from the cache when kept"""
+        cache = self.caches.get(model_key(model))
+
+        if cache is None:
+            return self.inner.get(model, obj_id)
+
+        kept = cache.get(obj_id)
+
+        if kept is NOT_FOUND:
+            return None
+        if kept is not ABSENT:
+            return self.inner.attach(model, kept)
+
+        token = cache.token()
+        obj = self.inner.get(model, obj_id)
+        kept = NOT_FOUND if obj is None else self.inner.detach(obj)
+
+        if kept is not None:
+            cache.put(obj_id, kept, token)
+
+        return obj
+
+    def find_in(self, model, field: str, values) -> list:
+        """
+        Get all objects of a model whose field is one of the values, by
+        id only the ids missing from the cache are read from the store
+        """
+        cache = self.caches.get(model_key(model))
+
+        if cache is None or field != "id":
+            return self.inner.find_in(model, field, values)
+
+        objs, missing = [], []
+
+        for value in set(values):
+            kept = cache.get(value)
+
+            if kept is ABSENT:
+                missing.append(value)
+            elif kept is not NOT_FOUND:
+                objs.append(self.inner.attach(model, kept))
+
+        if missing:
+            token = cache.token()
+            found = self.inner.find_in(model, field, missing)
+
+            for obj in found:
+                if (kept := self.inner.detach(obj)) is not None:
+                    cache.put(obj.id, kept, token)
+            for value in set(missing).difference(obj.id for obj in found):
+                cache.put(value, NOT_FOUND, token)
+
+            objs.extend(found)
+
+        return objs
+
+    def _invalidate(self, obj) -> None:
+        """Drops the cached object after a write of the object"""
+        cache = self.caches.get(obj.__class__.__name__.lower())
+
+        if cache is not None:
+            cache.invalidate(obj.id)
+
+    def save(self, obj, durable: bool = False) -> None:
+        """Save an object and drop its cache entries"""
+        try:
+            return self.inner.save(obj, durable=durable)
+        finally:
+            self._invalidate(obj)
+
+    def save_many(self, objs: list, durable: bool = False) -> list:
+        """Save several objects at once and drop their cache entries"""
+        try:
+            return self.inner.save_many(objs, durable=durable)
+        finally:
+            for obj in objs:
+                self._invalidate(obj)
+
+    def update(
+        self, obj, durable: bool = False, fields: set[str] | None = None
+    ):
+        """Update an object and drop its cache entries"""
+        try:
+            return self.inner.update(obj, durable=durable, fields=fields)
+        finally:
+            self._invalidate(obj)
+
+    def delete(self, obj, durable: bool = False) -> bool:
+        """Delete an object and drop its cache entries"""
+        try:
+            return self.inner.delete(obj, durable=durable)
+        finally:
+            self._invalidate(obj)
+
+    def sync(self) -> list[str]:
+        """
+        Catches up with the writes of the other processes and empties
+        the caches of the models they changed
+        """
+        stale = self.inner.sync()
+
+        for name in stale:
+            if name in self.caches:
+                self.caches[name].clear()
+
+        return stale
+
+    def reload(self) -> None:
+        """Reload the wrapped repository and empty the caches"""
+        self.inner.reload()
+
+        for cache in self.caches.values():
+            cache.clear()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Counters of the cache of every model"""
+        return {name: cache.stats() for name, cache in self.caches.items()}
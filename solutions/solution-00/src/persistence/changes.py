@@ -0,0 +1,193 @@
+"""
+Change log of the writes of a repository
+
+Every save, update and delete appends a change to the log: the model,
+the id of the object, the operation and the fields an update changed,
+numbered by a sequence that only grows. `GET /changes` lists the
+changes after a sequence number, so a client keeping the last number it
+read only downloads what changed since. The log keeps the last
+CHANGE_LOG_SIZE changes, `since` returns None for an older number and
+the client syncs in full.
+
+The ChangeLog belongs to its process. The workers sharing the write
+versions of their models share a SharedChangeLog instead, a ring of
+fixed size slots in a file every worker maps, so their sequence numbers
+agree.
+"""
+
+from collections import deque
+from itertools import islice
+import struct
+import threading
+from typing import Iterable
+import uuid
+
+from src.persistence.versions import HEADER, MappedFile
+from utils.constants import CHANGE_LOG_SIZE
+
+OPS = ("save", "update", "delete")
+# Sequence number of the last change, after the header
+LAST = struct.Struct("<Q")
+# Bytes of the id and of the comma separated fields in a slot
+ID_BYTES, FIELDS_BYTES = 125, 128
+# Sequence number, model, operation, whether the fields are known, id
+# and fields
+SLOT = struct.Struct(f"<QBBB{ID_BYTES}s{FIELDS_BYTES}s")
+
+
+def change(
+    seq: int, model: str, obj_id: str, op: str, fields: Iterable | None
+) -> dict:
+    """A change as listed, fields is None when every field may differ"""
+    return {
+        "seq": seq,
+        "model": model,
+        "id": obj_id,
+        "op": op,
+        "fields": None if fields is None else sorted(fields),
+    }
+
+
+class ChangeLog:
+    """The last changes of the repository of this process"""
+
+    epoch: str
+    size: int
+
+    def __init__(self, size: int = CHANGE_LOG_SIZE) -> None:
+        """Creates an empty log keeping the last size changes"""
+        # Tells apart the sequence numbers of two runs
+        self.epoch = uuid.uuid4().hex[:8]
+        self.size = size
+        self.__changes: deque[dict] = deque(maxlen=size)
+        self.__last = 0
+        self.__lock = threading.Lock()
+
+    def append(
+        self,
+        model: str,
+        op: str,
+        ids: Iterable[str],
+        fields: set[str] | None = None,
+    ) -> None:
+        """Appends a change of each object of a write"""
+        with self.__lock:
+            for obj_id in ids:
+                self.__last += 1
+                self.__changes.append(
+                    change(self.__last, model, obj_id, op, fields)
+                )
+
+    def last(self) -> int:
+        """Sequence number of the last change, 0 before the first"""
+        return self.__last
+
+    def since(self, seq: int, limit: int) -> list[dict] | None:
+        """
+        Up to limit changes after the sequence number seq, oldest first,
+        None when some of them are no longer kept or seq is unknown
+        """
+        with self.__lock:
+            first = self.__last - len(self.__changes) + 1
+
+            if seq > self.__last or seq + 1 < first:
+                return None
+
+            start = seq + 1 - first
+
+            return list(islice(self.__changes, start, start + limit))
+
+
+class SharedChangeLog(MappedFile):
+    """
+    The last changes of the repositories of the processes of a server,
+    in a ring of slots of a file mapped by every process using it.
+    The fields of an update too long for a slot are left out, as if
+    every field may differ
+    """
+
+    magic = b"HBNBCHG2"
+    models: tuple[str, ...]
+    size: int
+
+    def __init__(
+        self, filename: str, models: Iterable[str], size: int = CHANGE_LOG_SIZE
+    ) -> None:
+        """Maps the ring of the file, creating it when missing"""
+        self.models = tuple(models)
+        self.size = size
+
+        super().__init__(
+            filename, HEADER.size + LAST.size + SLOT.size * size
+        )
+
+    def __offset(self, seq: int) -> int:
+        """Offset of the slot of a sequence number"""
+        return HEADER.size + LAST.size + (seq % self.size) * SLOT.size
+
+    def append(
+        self,
+        model: str,
+        op: str,
+        ids: Iterable[str],
+        fields: set[str] | None = None,
+    ) -> None:
+        """Appends a change of each object of a write"""
+        names = b"" if fields is None else ",".join(sorted(fields)).encode()
+        known = fields is not None and len(names) <= FIELDS_BYTES
+
+        if not known:
+            names = b""
+
+        model_index = self.models.index(model)
+        op_index = OPS.index(op)
+
+        with self.lock() as mapping:
+            last = LAST.unpack_from(mapping, HEADER.size)[0]
+
+            for obj_id in ids:
+                last += 1
+                SLOT.pack_into(
+                    mapping,
+                    self.__offset(last),
+                    last,
+                    model_index,
+                    op_index,
+                    known,
+                    obj_id.encode(),
+                    names,
+                )
+
+            LAST.pack_into(mapping, HEADER.size, last)
+
+    def last(self) -> int:
+        """Sequence number of the last change, 0 before the first"""
+        return LAST.unpack_from(self._mapping(), HEADER.size)[0]
+
+    def since(self, seq: int, limit: int) -> list[dict] | None:
+        """
+        Up to limit changes after the sequence number seq, oldest first,
+        None when some of them are no longer kept or seq is unknown
+        """
+        with self.lock() as mapping:
+            last = LAST.unpack_from(mapping, HEADER.size)[0]
+
+            if seq > last or seq < last - self.size:
+                return None
+
+            changes = []
+
+            for number in range(seq + 1, min(last, seq + limit) + 1):
+                _, model_index, op_index, known, obj_id, names = (
+                    SLOT.unpack_from(mapping, self.__offset(number))
+                )
+                names = names.rstrip(b"\0").decode()
+                changes.append(change(
+                    number,
+                    self.models[model_index],
+                    obj_id.rstrip(b"\0").decode(),
+                    OPS[op_index],
+                    (names.split(",") if names else []) if known else None,
+                ))
+
+            return changes
@@ -12,17 +12,30 @@
     - reload (which can be empty)
 """
 from flask_sqlalchemy import SQLAlchemy
+from typing import Callable, Iterator
+from sqlalchemy import func, inspect, or_, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
 from src.models.db.base_model import BaseModel
-from src.persistence.repository import Repository
+from src.models.db.search import fts_table, postgres_document
+from src.persistence.indexes import TextIndex, parse_query
+from src.persistence.repository import Repository, sort_key
 from src.db import db
+from utils.constants import SEARCH_FIELDS, STREAM_BATCH_SIZE
 from utils.populate import populate_db
 
+# Relationship strategies loading the related objects with their parent
+EAGER_LOADS = frozenset(("joined", "selectin", "subquery", "immediate"))
+
+
 class DBRepository(Repository):
     """Dummy DB repository"""
     db: SQLAlchemy
 
     def __init__(self) -> None:
+        super().__init__()
         self.db = db
         self.reload()
 
@@ -30,31 +43,373 @@ class DBRepository(Repository):
         """Get all objects of a given model"""
         return db.session.query(model).all()
 
+    def iter_all(self, model) -> Iterator[BaseModel]:
+        """
+        Iterate over all objects of a given model, fetching the rows
+        STREAM_BATCH_SIZE at a time instead of loading the whole table
+        """
+        return iter(
+            self.db.session.query(model).yield_per(STREAM_BATCH_SIZE)
+        )
+
     def get(self, model, obj_id: str) -> BaseModel | None:
-        """Get an object by its ID"""
-        for obj in self.get_all(model):
-            if obj.id == obj_id:
-                return obj
-        return None
+        """
+        Get an object by its primary key, the session identity map
+        answers without a query when the object is already loaded
+        """
+        return self.db.session.get(model, obj_id)
+
+    def detach(self, obj) -> dict | None:
+        """
+        Column values of an object, kept by a CachingRepository since
+        the objects are expired and dropped with the session. None for
+        the models loading relationships along with them, like the
+        rating of the places, which the columns alone can't rebuild
+        """
+        mapper = inspect(obj).mapper
+
+        if any(rel.lazy in EAGER_LOADS for rel in mapper.relationships):
+            return None
+
+        return {
+            column.key: getattr(obj, column.key)
+            for column in mapper.column_attrs
+        }
+
+    def attach(self, model, kept: dict) -> BaseModel:
+        """
+        Object of the session holding the kept column values, added
+        without a query, or the one already loaded by the session
+        """
+        mapper = model.__mapper__
+        loaded = self.db.session.identity_map.get(
+            mapper.identity_key_from_primary_key(
+                [kept[column.key] for column in mapper.primary_key]
+            )
+        )
+
+        if loaded is not None:
+            return loaded
+
+        obj = mapper.class_manager.new_instance()
+
+        for key, value in kept.items():
+            set_committed_value(obj, key, value)
+
+        make_transient_to_detached(obj)
+        self.db.session.add(obj)
+
+        return obj
+
+    def find(self, model, **equals) -> list:
+        """Get all objects of a model filtered with a WHERE clause"""
+        return self.db.session.query(model).filter_by(**equals).all()
+
+    def find_in(self, model, field: str, values) -> list:
+        """
+        Get all objects of a model whose field is one of the values,
+        with an IN clause for every STREAM_BATCH_SIZE values
+        """
+        column = getattr(model, field)
+        values = list(set(values))
+        objs = []
+
+        for i in range(0, len(values), STREAM_BATCH_SIZE):
+            objs.extend(
+                self.db.session.query(model)
+                .filter(column.in_(values[i:i + STREAM_BATCH_SIZE]))
+                .all()
+            )
+
+        return objs
+
+    @staticmethod
+    def _filter(
+        query,
+        model,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ):
+        """
+        Adds to a query the WHERE clauses of the ranges over the columns
+        of a model and of the box over its latitude and longitude
+        """
+        for field, (low, high) in ranges.items():
+            column = getattr(model, field)
+
+            if low is not None:
+                query = query.filter(column >= low)
+            if high is not None:
+                query = query.filter(column <= high)
+
+        if box is not None:
+            south, west, north, east = box
+            latitude, longitude = model.latitude, model.longitude
+
+            if west <= east:
+                in_longitude = longitude.between(west, east)
+            else:
+                in_longitude = or_(longitude >= west, longitude <= east)
+
+            query = query.filter(latitude.between(south, north), in_longitude)
+
+        return query
+
+    def find_range(self, model, **ranges: tuple) -> list:
+        """
+        Get all objects of a model, ordered by id, whose fields are
+        inside the given ranges, with a WHERE clause on their columns
+        """
+        query = self._filter(self.db.session.query(model), model, ranges)
+
+        return query.order_by(model.id).all()
+
+    def select(
+        self,
+        model,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+    ) -> list:
+        """
+        Get the objects of a model selected by the ranges and the box
+        with WHERE clauses, ordered by the sort column then by id
+        """
+        query = self._filter(self.db.session.query(model), model, ranges, box)
+        field, descending = sort_key(sort)
+
+        if field is not None:
+            column = getattr(model, field)
+            query = query.order_by(
+                column.is_(None), column.desc() if descending else column
+            )
+
+        return query.order_by(model.id).all()
+
+    def aggregate(
+        self,
+        model,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        Count the objects of a model selected by the ranges and the box,
+        and get the min, max and mean of each field, in one query
+        """
+        columns = [getattr(model, field) for field in fields]
+        query = self.db.session.query(
+            func.count(model.id),
+            *(
+                aggregate(column)
+                for column in columns
+                for aggregate in (func.min, func.max, func.avg)
+            ),
+        )
+        row = self._filter(query, model, ranges, box).one()
+        summary: dict = {"count": row[0]}
+
+        for i, field in enumerate(fields):
+            low, high, mean = row[1 + 3 * i:4 + 3 * i]
+            summary[field] = {
+                "min": None if low is None else float(low),
+                "max": None if high is None else float(high),
+                "avg": None if mean is None else float(mean),
+            }
+
+        return summary
+
+    def search(self, model, query: str, limit: int) -> list:
+        """
+        Get the limit best `(object, score)` pairs of a model for a
+        full-text query, from the FTS5 table on SQLite and the GIN
+        index on PostgreSQL
+        """
+        words, phrases = parse_query(query)
+
+        if not words and not phrases:
+            return []
+
+        table = model.__tablename__
+        dialect = self.db.session.get_bind().dialect.name
+        # The words only hold \w characters, quoting them is enough
+        groups = [[word] for word in words] + phrases
+
+        if dialect == "sqlite":
+            fts = fts_table(table)
+            statement = text(
+                f"SELECT {table}.id, -bm25({fts}) AS score FROM {fts} "
+                f"JOIN {table} ON {table}.rowid = {fts}.rowid "
+                f"WHERE {fts} MATCH :query ORDER BY score DESC LIMIT :limit"
+            )
+            match = " ".join(f'"{" ".join(group)}"' for group in groups)
+        elif dialect == "postgresql":
+            document = postgres_document(SEARCH_FIELDS[table])
+            statement = text(
+                f"SELECT id, ts_rank_cd({document}, query) AS score "
+                f"FROM {table}, to_tsquery('simple', :query) query "
+                f"WHERE {document} @@ query ORDER BY score DESC LIMIT :limit"
+            )
+            match = " & ".join(
+                "(" + " <-> ".join(f"'{word}'" for word in group) + ")"
+                for group in groups
+            )
+        else:
+            # Other databases index the objects on each call
+            index = TextIndex(*SEARCH_FIELDS[table])
+            for obj in self.iter_all(model):
+                index.add(obj)
+            return index.search(words, phrases, limit)
+
+        rows = self.db.session.execute(
+            statement, {"query": match, "limit": limit}
+        ).all()
+        ids = [row.id for row in rows]
+        objs = {obj.id: obj for obj in self.find_in(model, "id", ids)}
+
+        return [(objs[row.id], row.score) for row in rows if row.id in objs]
+
+    def find_within(
+        self, model, box: tuple[float, float, float, float]
+    ) -> list:
+        """
+        Get all objects of a model inside the `(south, west, north,
+        east)` box, with a range query on the latitude and longitude
+        """
+        query = self.db.session.query(model)
+
+        return self._filter(query, model, {}, box).all()
+
+    def find_one(self, model, **equals) -> BaseModel | None:
+        """Get the first object of a model filtered with a WHERE clause"""
+        return self.db.session.query(model).filter_by(**equals).first()
+
+    def page(self, model, after: str | None, limit: int):
+        """Get a page of objects with a keyset query on the primary key"""
+        query = self.db.session.query(model)
+
+        if after is not None:
+            query = query.filter(model.id > after)
+
+        objs = query.order_by(model.id).limit(limit + 1).all()
+        next_cursor = objs[limit - 1].id if len(objs) > limit else None
+
+        return objs[:limit], next_cursor
+
+    def count(self, model) -> int:
+        """Number of objects of a model, counted by the database"""
+        return self.db.session.query(func.count(model.id)).scalar()
 
     def reload(self) -> None:
         """Populates the database with some dummy data"""
         populate_db(self)
 
-    def save(self, obj) -> None:
-        """Save an object to the repository"""
+    def save(self, obj, durable: bool = False) -> None:
+        """Save an object to the repository, commits are always durable"""
         self.db.session.add(obj)
         self.db.session.commit()
+        self._bump(obj.__class__.__name__.lower())
+        self._record("save", [obj])
+
+    def save_many(self, objs: list, durable: bool = False) -> list:
+        """
+        Save several objects in a single transaction
+
+        Every object is inserted inside its own SAVEPOINT, so an object
+        violating a constraint is rolled back alone, with a ValueError
+        holding the database message, and the others are committed
+        together
+        """
+        errors = []
+
+        for obj in objs:
+            try:
+                with self.db.session.begin_nested():
+                    self.db.session.add(obj)
+                errors.append(None)
+            except SQLAlchemyError as e:
+                errors.append(ValueError(str(getattr(e, "orig", e))))
+
+        self.db.session.commit()
 
-    def update(self, obj) -> BaseModel | None:
-        """Update an object in the repository"""
+        for model in {obj.__class__.__name__.lower() for obj in objs}:
+            self._bump(model)
+
+        self._record(
+            "save", [obj for obj, error in zip(objs, errors) if error is None]
+        )
+
+        return errors
+
+    def update(
+        self, obj, durable: bool = False, fields: set[str] | None = None
+    ) -> BaseModel | None:
+        """
+        Update an object in the repository, the flush only writes the
+        columns whose value changed, and updated_at
+        """
         self.db.session.commit()
+        self._bump(obj.__class__.__name__.lower())
+        self._record("update", [obj], fields)
+
+    def increment(
+        self,
+        model,
+        amounts: dict[str, dict[str, float]],
+        create: Callable[[str], BaseModel],
+    ) -> list[BaseModel]:
+        """
+        Adds amounts to numeric columns of objects, by id, in a single
+        transaction, and returns the objects
+
+        Each object is updated with `SET column = column + amount`, so
+        increments committed at the same time by other sessions are all
+        kept. A missing object is created with create(id) holding the
+        amounts, inside a SAVEPOINT, and incremented instead if another
+        session created it first
+        """
+        session = self.db.session
+
+        for obj_id, columns in amounts.items():
+            statement = (
+                update(model)
+                .where(model.id == obj_id)
+                .values({
+                    name: getattr(model, name) + amount
+                    for name, amount in columns.items()
+                })
+                .execution_options(synchronize_session=False)
+            )
+
+            if session.execute(statement).rowcount:
+                continue
+
+            try:
+                with session.begin_nested():
+                    obj = create(obj_id)
+                    for name, amount in columns.items():
+                        setattr(obj, name, amount)
+                    session.add(obj)
+            except SQLAlchemyError:
+                session.execute(statement)
+
+        session.commit()
+        self._bump(model.__name__.lower())
+
+        objs = self.find_in(model, "id", list(amounts))
+        self._record(
+            "update", objs, set().union(*amounts.values()) or None
+        )
+
+        return objs
 
-    def delete(self, obj) -> bool:
+    def delete(self, obj, durable: bool = False) -> bool:
         """Delete an object from the repository"""
         try:
             self.db.session.delete(obj)
             self.db.session.commit()
+            self._bump(obj.__class__.__name__.lower())
+            self._record("delete", [obj])
             return True
         except Exception:
             return False
@@ -4,67 +4,81 @@ This module exports a Repository that persists data in a JSON file
 
 from datetime import datetime
 import json
+import os
+import threading
+import zlib
 from src.models.base import Base
-from src.persistence.repository import Repository
-from utils.constants import FILE_STORAGE_FILENAME
+from src.persistence.flusher import Flusher, create_flusher, write_atomically
+from src.persistence.memory import MemoryRepository
+from utils.constants import (
+    FILE_JOURNAL_COMPACT_THRESHOLD,
+    FILE_JOURNAL_FILENAME,
+    FILE_STORAGE_FILENAME,
+    FILE_STORAGE_MODE_ENV_VAR,
+)
 
 
-class FileRepository(Repository):
-    """File Repository"""
+class FileRepository(MemoryRepository):
+    """
+    File Repository
 
+    The objects and their indexes live in memory like in the
+    MemoryRepository, every change is also written to disk.
+
+    By default the whole data is rewritten to the file on every change.
+    In journal mode (`FILE_STORAGE_MODE=journal`) each change is appended
+    to a journal as one checksummed record instead, an update only
+    records the fields it changed, `reload` replays the journal on top
+    of the snapshot and `compact` folds it back into the snapshot once
+    it reaches FILE_JOURNAL_COMPACT_THRESHOLD records.
+
+    When STORAGE_FLUSH_WINDOW_MS is set the writes are batched by a
+    background Flusher, pass `durable=True` to wait for the write
+    """
+
+    _private = False
     __filename = FILE_STORAGE_FILENAME
-    __data: dict[str, list] = {
-        "country": [],
-        "user": [],
-        "amenity": [],
-        "city": [],
-        "review": [],
-        "place": [],
-        "placeamenity": [],
-    }
-
-    def __init__(self) -> None:
-        """Calls reload method"""
-        self.reload()
+    __journal_filename = FILE_JOURNAL_FILENAME
 
-    def _save_to_file(self):
-        """Helper method to save the current object data to the file"""
-        serialized = {
-            k: [v.to_dict() for v in l if type(v) is not dict]
-            for k, l in self.__data.items()
-        }
+    journal: bool
+    _flusher: Flusher | None
 
-        with open(self.__filename, "w") as file:
-            json.dump(serialized, file)
+    def __init__(self, journal: bool | None = None) -> None:
+        """Selects the storage mode and calls reload method"""
+        if journal is None:
+            journal = os.getenv(FILE_STORAGE_MODE_ENV_VAR) == "journal"
 
-    def get_all(self, model_name: str):
-        """Get all objects of a given model"""
-        return self.__data.get(model_name, [])
+        self.journal = journal
+        self.__journal_records = 0
+        self.__pending: list[bytes] = []
+        self.__io_lock = threading.Lock()
+        self._flusher = create_flusher(self._flush)
 
-    def get(self, model_name: str, obj_id: str):
-        """Get an object by its ID"""
-        for obj in self.get_all(model_name):
-            if obj.id == obj_id:
-                return obj
-        return None
+        super().__init__()
 
-    def reload(self):
-        """Reloads the data from the file"""
-        file_data = {}
-        try:
-            with open(self.__filename, "r") as file:
-                file_data = json.load(file)
-        except FileNotFoundError:
-            from src.models.country import Country
+    def _save_to_file(self):
+        """
+        Helper method to save the current object data to the file
 
-            self.__data["country"] = [Country("Uruguay", "UY")]
+        The data is written to a temporary file first, so a crash never
+        leaves a half written snapshot behind
+        """
+        with self._lock:
+            serialized = {
+                k: [v.to_dict() for v in objs.values()]
+                for k, objs in self._data.items()
+            }
 
-            self._save_to_file()
+        write_atomically(self.__filename, json.dumps(serialized).encode())
 
+    @staticmethod
+    def _load(model: str, item: dict):
+        """Creates a model instance from its dictionary representation"""
         from src.models.amenity import Amenity, PlaceAmenity
         from src.models.city import City
         from src.models.country import Country
         from src.models.place import Place
+        from src.models.rating_stats import RatingStats
         from src.models.review import Review
         from src.models.user import User
 
@@ -74,59 +88,296 @@ class FileRepository(Repository):
             "country": Country,
             "place": Place,
             "placeamenity": PlaceAmenity,
+            "ratingstats": RatingStats,
             "review": Review,
             "user": User,
         }
 
+        if model == "country":
+            return Country(item["name"], item["country_code"])
+
+        instance: Base = models[model](**item)
+
+        if "created_at" in item:
+            instance.created_at = datetime.fromisoformat(item["created_at"])
+        if "updated_at" in item:
+            instance.updated_at = datetime.fromisoformat(item["updated_at"])
+
+        return instance
+
+    @staticmethod
+    def _patch(obj: Base, data: dict) -> None:
+        """Sets the changed fields of a patch record on an object"""
+        for key, value in data.items():
+            if key in ("created_at", "updated_at"):
+                value = datetime.fromisoformat(value)
+            setattr(obj, key, value)
+
+    def reload(self):
+        """Reloads the data from the file and replays the journal"""
+        file_data = {}
+        try:
+            with open(self.__filename, "r") as file:
+                file_data = json.load(file)
+        except FileNotFoundError:
+            pass
+
         for model, data in file_data.items():
             for item in data:
-                instance: Base = models[model](**item)
+                self._put(model, self._load(model, item))
 
-                if "created_at" in item:
-                    instance.created_at = datetime.fromisoformat(
-                        item["created_at"]
-                    )
-                if "updated_at" in item:
-                    instance.updated_at = datetime.fromisoformat(
-                        item["updated_at"]
+        replayed = self._replay_journal()
+
+        if not file_data and not replayed:
+            from src.models.country import Country
+
+            self.save(Country("Uruguay", "UY"))
+        elif replayed and not self.journal:
+            # The journal was left by a previous run in journal mode
+            self._compact()
+
+    @staticmethod
+    def _encode(record: dict) -> bytes:
+        """Encodes a journal record as `<crc32> <json>` line"""
+        payload = json.dumps(record).encode()
+
+        return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+    @staticmethod
+    def _decode(line: bytes) -> dict | None:
+        """Decodes a journal line, None if it is torn or corrupted"""
+        if not line.endswith(b"\n"):
+            return None
+
+        checksum, _, payload = line[:-1].partition(b" ")
+
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+
+    def _replay_journal(self) -> int:
+        """
+        Applies the journal records on top of the loaded snapshot
+
+        Replaying stops at the first torn or corrupted record, which can
+        only be the last write before a crash, and the journal is
+        truncated there. Returns the number of applied records
+        """
+        try:
+            file = open(self.__journal_filename, "rb+")
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        offset = 0
+
+        with file:
+            for line in file:
+                record = self._decode(line)
+
+                if record is None:
+                    print(f"Dropping corrupted journal tail at byte {offset}")
+                    file.truncate(offset)
+                    break
+
+                if record["op"] == "delete":
+                    self._pop(record["model"], record["id"])
+                elif record["op"] == "patch":
+                    obj = self.get(record["model"], record["id"])
+
+                    if obj is not None:
+                        self._patch(obj, record["data"])
+                        self._put(record["model"], obj)
+                else:
+                    self._put(
+                        record["model"],
+                        self._load(record["model"], record["data"]),
                     )
 
-                self.save(data=instance, save_to_file=False)
+                applied += 1
+                offset += len(line)
 
-    def save(self, data: Base, save_to_file=True):
-        """Save an object to the repository"""
-        model: str = data.__class__.__name__.lower()
+        self.__journal_records = applied
 
-        if model not in self.__data:
-            self.__data[model] = []
+        return applied
 
-        self.__data[model].append(data)
+    def _append(self, records: list[bytes]) -> None:
+        """Appends records to the journal, compacting it when too long"""
+        with open(self.__journal_filename, "ab") as file:
+            file.write(b"".join(records))
+            file.flush()
+            os.fsync(file.fileno())
 
-        if save_to_file:
-            self._save_to_file()
+        self.__journal_records += len(records)
 
-    def update(self, obj: Base):
-        """Update an object in the repository"""
-        cls = obj.__class__.__name__.lower()
+        if self.__journal_records >= FILE_JOURNAL_COMPACT_THRESHOLD:
+            self._compact()
 
-        for i, o in enumerate(self.__data[cls]):
-            if o.id == obj.id:
-                obj.updated_at = datetime.now()
-                self.__data[cls][i] = obj
+    def _flush(self) -> None:
+        """Writes the pending changes to disk"""
+        with self.__io_lock:
+            if not self.journal:
                 self._save_to_file()
-                return obj
+                return
 
-        return None
+            with self._lock:
+                records, self.__pending = self.__pending, []
 
-    def delete(self, obj: Base):
-        """Delete an object from the repository"""
-        class_name = obj.__class__.__name__.lower()
+            if records:
+                self._append(records)
+
+    def _refresh(self, model_names: list[str]) -> None:
+        """
+        Reloads the models written by other processes from the snapshot
+        and the journal, the objects of the other models are kept
+        """
+        objs: dict[str, dict] = {model: {} for model in model_names}
+
+        try:
+            with open(self.__filename, "r") as file:
+                file_data = json.load(file)
+        except FileNotFoundError:
+            file_data = {}
+
+        for model in model_names:
+            for item in file_data.get(model, []):
+                obj = self._load(model, item)
+                objs[model][obj.id] = obj
+
+        records = 0
+
+        try:
+            with open(self.__journal_filename, "rb") as file:
+                for line in file:
+                    record = self._decode(line)
+
+                    if record is None:
+                        break
+
+                    records += 1
+                    model = record["model"]
+
+                    if model not in objs:
+                        continue
+                    if record["op"] == "delete":
+                        objs[model].pop(record["id"], None)
+                    elif record["op"] == "patch":
+                        obj = objs[model].get(record["id"])
+
+                        if obj is not None:
+                            self._patch(obj, record["data"])
+                    else:
+                        obj = self._load(model, record["data"])
+                        objs[model][obj.id] = obj
+        except FileNotFoundError:
+            pass
+
+        self.__journal_records = records
+
+        for model, model_objs in objs.items():
+            self._replace(model, list(model_objs.values()))
 
-        if obj not in self.__data[class_name]:
-            return False
+    def _persist(
+        self,
+        op: str,
+        objs: list,
+        durable: bool = False,
+        fields: set[str] | None = None,
+    ) -> None:
+        """
+        Writes changes to disk, or queues them for the flusher. An update
+        whose changed fields are given is journaled as a patch of them
+        """
+        if self.journal:
+            records = []
 
-        self.__data[class_name].remove(obj)
+            for obj in objs:
+                record = {"op": op, "model": obj.__class__.__name__.lower()}
 
+                if op == "delete":
+                    record["id"] = obj.id
+                elif op == "update" and fields is not None:
+                    data = obj.to_dict()
+                    record["op"] = "patch"
+                    record["id"] = obj.id
+                    record["data"] = {
+                        key: data[key]
+                        for key in fields | {"updated_at"}
+                        if key in data
+                    }
+                else:
+                    record["data"] = obj.to_dict()
+
+                records.append(self._encode(record))
+
+            with self._lock:
+                self.__pending.extend(records)
+
+        # The other processes reload what they see in the files, so the
+        # writes are synchronous when the versions are shared
+        if self._flusher and self._shared is None:
+            self._flusher.request(durable)
+        else:
+            self._flush()
+
+    def _compact(self) -> None:
+        """Writes a new snapshot and removes the journal"""
         self._save_to_file()
 
+        if os.path.exists(self.__journal_filename):
+            os.remove(self.__journal_filename)
+
+        self.__journal_records = 0
+
+    def compact(self) -> None:
+        """Folds the journal into a new snapshot and removes the journal"""
+        self._flush()
+
+        with self.__io_lock:
+            self._compact()
+
+    def save(self, data: Base, save_to_file=True, durable=False):
+        """Save an object to the repository"""
+        with self._writing():
+            super().save(data)
+
+            if save_to_file:
+                self._persist("save", [data], durable)
+
+        return data
+
+    def save_many(self, objs: list, durable=False) -> list:
+        """Save several objects to the repository with a single write"""
+        with self._writing():
+            errors = super().save_many(objs)
+
+            if objs:
+                self._persist("save", objs, durable)
+
+        return errors
+
+    def update(self, obj: Base, durable=False, fields=None):
+        """
+        Update an object in the repository, the journal only records
+        the changed fields when they are given
+        """
+        with self._writing():
+            if super().update(obj, fields=fields) is None:
+                return None
+
+            self._persist("update", [obj], durable, fields)
+
+        return obj
+
+    def delete(self, obj: Base, durable=False):
+        """Delete an object from the repository"""
+        with self._writing():
+            if not super().delete(obj):
+                return False
+
+            self._persist("delete", [obj], durable)
+
         return True
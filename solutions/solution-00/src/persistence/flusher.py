@@ -0,0 +1,143 @@
+"""
+This module exports the helpers used by the repositories that write
+their data to disk: atomic file writes and a group-commit flusher
+"""
+
+import atexit
+import os
+import threading
+from time import monotonic
+from typing import Callable
+
+from utils.constants import (
+    STORAGE_FLUSH_MAX_OPS,
+    STORAGE_FLUSH_MAX_OPS_ENV_VAR,
+    STORAGE_FLUSH_WINDOW_ENV_VAR,
+)
+
+
+def write_atomically(filename: str, data: bytes) -> None:
+    """
+    Writes data to a temporary file, syncs it and renames it over
+    filename, so a crash never leaves a half written file behind
+    """
+    tmp_filename = f"{filename}.tmp"
+
+    with open(tmp_filename, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(tmp_filename, filename)
+
+
+class Flusher:
+    """
+    Background thread that coalesces the writes of a repository
+
+    Every change calls `request`, the thread waits until `window` seconds
+    have passed since the first pending request, or until `max_ops`
+    requests are pending, and then calls `flush` once for all of them.
+
+    `request(durable=True)` blocks until the flush covering the call has
+    completed and raises the error of that flush if it failed
+    """
+
+    window: float
+    max_ops: int
+
+    def __init__(
+        self, flush: Callable[[], None], window: float, max_ops: int
+    ) -> None:
+        """Starts the flusher thread"""
+        self.window = window
+        self.max_ops = max_ops
+
+        self.__flush = flush
+        self.__cond = threading.Condition()
+        self.__requested = 0
+        self.__flushed = 0
+        self.__failure: tuple[int, int, Exception] | None = None
+        self.__closed = False
+
+        self.__thread = threading.Thread(
+            target=self.__run, name="repository-flusher", daemon=True
+        )
+        self.__thread.start()
+        atexit.register(self.close)
+
+    def request(self, durable: bool = False) -> None:
+        """Asks for a flush, waits for it when durable is True"""
+        with self.__cond:
+            self.__requested += 1
+            seq = self.__requested
+            self.__cond.notify_all()
+
+            if not durable:
+                return
+
+            while self.__flushed < seq:
+                self.__cond.wait()
+
+            failure = self.__failure
+            if failure and failure[0] < seq <= failure[1]:
+                raise failure[2]
+
+    def close(self) -> None:
+        """Flushes the pending changes and stops the thread"""
+        with self.__cond:
+            self.__closed = True
+            self.__cond.notify_all()
+
+        self.__thread.join()
+
+    def __run(self) -> None:
+        """Flushes the pending requests once per window"""
+        while True:
+            with self.__cond:
+                while self.__requested == self.__flushed:
+                    if self.__closed:
+                        return
+                    self.__cond.wait()
+
+                deadline = monotonic() + self.window
+                while (
+                    self.__requested - self.__flushed < self.max_ops
+                    and not self.__closed
+                ):
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+
+                start, target = self.__flushed, self.__requested
+
+            error = None
+            try:
+                self.__flush()
+            except Exception as e:
+                print(f"Flushing the repository failed: {e!r}")
+                error = e
+
+            with self.__cond:
+                self.__flushed = target
+                if error is not None:
+                    self.__failure = (start, target, error)
+                self.__cond.notify_all()
+
+
+def create_flusher(flush: Callable[[], None]) -> Flusher | None:
+    """
+    Creates a Flusher configured from the environment, or None when
+    STORAGE_FLUSH_WINDOW_MS is not set and writes must be synchronous
+    """
+    window_ms = float(os.getenv(STORAGE_FLUSH_WINDOW_ENV_VAR, "0"))
+
+    if window_ms <= 0:
+        return None
+
+    max_ops = int(
+        os.getenv(STORAGE_FLUSH_MAX_OPS_ENV_VAR, STORAGE_FLUSH_MAX_OPS)
+    )
+
+    return Flusher(flush, window_ms / 1000, max_ops)
@@ -0,0 +1,696 @@
+"""
+This module exports the secondary indexes used by the in-process
+repositories (memory, file and pickle)
+"""
+
+from bisect import bisect_left, bisect_right, insort
+import heapq
+from math import floor, inf, log
+from operator import itemgetter
+import re
+from typing import Any, Callable, Iterator
+
+import numpy as np
+
+from utils.constants import (
+    COLUMN_STORE_FIELDS,
+    GEO_CELL_DEGREES,
+    SEARCH_FIELDS,
+)
+
+TOKEN_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits a text in case folded words"""
+    return TOKEN_RE.findall(text.casefold())
+
+
+def parse_query(query: str) -> tuple[list[str], list[list[str]]]:
+    """
+    Splits a search query in its words and its "quoted phrases",
+    phrases of a single word are returned as words
+    """
+    phrases = [tokenize(phrase) for phrase in PHRASE_RE.findall(query)]
+    words = tokenize(PHRASE_RE.sub(" ", query))
+
+    words += [phrase[0] for phrase in phrases if len(phrase) == 1]
+
+    return words, [phrase for phrase in phrases if len(phrase) > 1]
+
+
+class HashIndex:
+    """
+    Maps the values of one or more fields to the objects having them
+
+    The index remembers the key each object was indexed with, so it can
+    move an object that was modified in place when `update` is called
+    """
+
+    fields: tuple[str, ...]
+
+    def __init__(self, *fields: str) -> None:
+        """Creates an empty index over the given fields"""
+        self.fields = fields
+        self.__entries: dict[tuple, dict[str, Any]] = {}
+        self.__keys: dict[str, tuple] = {}
+
+    def key(self, obj) -> tuple:
+        """Returns the key of an object in this index"""
+        return tuple(getattr(obj, field, None) for field in self.fields)
+
+    def add(self, obj) -> None:
+        """Adds an object to the index"""
+        key = self.key(obj)
+
+        self.__entries.setdefault(key, {})[obj.id] = obj
+        self.__keys[obj.id] = key
+
+    def remove(self, obj) -> None:
+        """Removes an object from the index"""
+        key = self.__keys.pop(obj.id, None)
+
+        if key is None:
+            return
+
+        bucket = self.__entries[key]
+        del bucket[obj.id]
+
+        if not bucket:
+            del self.__entries[key]
+
+    def update(self, obj) -> None:
+        """Moves an object whose indexed fields have changed"""
+        if self.__keys.get(obj.id) == self.key(obj):
+            return
+
+        self.remove(obj)
+        self.add(obj)
+
+    def lookup(self, key: tuple) -> list:
+        """Returns the objects indexed with the given key"""
+        return list(self.__entries.get(key, {}).values())
+
+
+class SortedIndex:
+    """
+    Keeps the objects sorted by one field, for pages and range scans
+
+    The entries are `(value, id)` tuples in a sorted list, so bisect
+    finds the bounds of a range and the scan costs the size of the result.
+    Values are converted with `cast`, objects whose value is missing or
+    can't be converted are left out of the index
+    """
+
+    field: str
+
+    def __init__(self, field: str, cast: Callable | None = None) -> None:
+        """Creates an empty index over the given field"""
+        self.field = field
+        self.__cast = cast
+        self.__entries: list[tuple] = []
+        self.__values: dict[str, Any] = {}
+        self.__objs: dict[str, Any] = {}
+
+    def key(self, obj) -> Any:
+        """Returns the value of an object in this index, None if unset"""
+        value = getattr(obj, self.field, None)
+
+        if value is None or self.__cast is None:
+            return value
+
+        try:
+            return self.__cast(value)
+        except (TypeError, ValueError):
+            return None
+
+    def add(self, obj) -> None:
+        """Adds an object to the index"""
+        value = self.key(obj)
+
+        if value is None:
+            return
+
+        insort(self.__entries, (value, obj.id))
+        self.__values[obj.id] = value
+        self.__objs[obj.id] = obj
+
+    def remove(self, obj) -> None:
+        """Removes an object from the index"""
+        if obj.id not in self.__values:
+            return
+
+        entry = (self.__values.pop(obj.id), obj.id)
+        del self.__entries[bisect_left(self.__entries, entry)]
+        del self.__objs[obj.id]
+
+    def update(self, obj) -> None:
+        """Moves an object whose indexed field has changed"""
+        if obj.id in self.__values and self.__values[obj.id] == self.key(obj):
+            self.__objs[obj.id] = obj
+            return
+
+        self.remove(obj)
+        self.add(obj)
+
+    def bounds(self, low: Any = None, high: Any = None) -> tuple[int, int]:
+        """Returns the slice of the entries with low <= value <= high"""
+        start = 0 if low is None else bisect_left(
+            self.__entries, low, key=itemgetter(0)
+        )
+        end = len(self.__entries) if high is None else bisect_right(
+            self.__entries, high, key=itemgetter(0)
+        )
+
+        return start, max(start, end)
+
+    def count_between(self, low: Any = None, high: Any = None) -> int:
+        """Number of objects with low <= value <= high, None is unbounded"""
+        start, end = self.bounds(low, high)
+
+        return end - start
+
+    def between(self, low: Any = None, high: Any = None) -> list:
+        """Returns the objects with low <= value <= high, None is unbounded"""
+        start, end = self.bounds(low, high)
+
+        return [self.__objs[obj_id] for _, obj_id in self.__entries[start:end]]
+
+    def page(self, after: tuple | None, limit: int) -> list:
+        """
+        Returns up to limit objects following the `(value, id)` entry
+        after, or from the start of the index when after is None
+        """
+        start = 0 if after is None else bisect_right(self.__entries, after)
+
+        return [
+            self.__objs[obj_id]
+            for _, obj_id in self.__entries[start:start + limit]
+        ]
+
+    def __len__(self) -> int:
+        """Number of indexed objects"""
+        return len(self.__entries)
+
+
+class GridIndex:
+    """
+    Buckets the objects in cells of `cell` degrees of latitude and
+    longitude, for bounding box and radius queries
+
+    `within` returns the objects of the cells overlapping a box, the
+    caller filters them with the exact box. Objects without a valid
+    position are left out of the index
+    """
+
+    lat_field: str
+    lon_field: str
+    cell: float
+
+    def __init__(
+        self,
+        lat_field: str = "latitude",
+        lon_field: str = "longitude",
+        cell: float = GEO_CELL_DEGREES,
+    ) -> None:
+        """Creates an empty index over the given position fields"""
+        self.lat_field = lat_field
+        self.lon_field = lon_field
+        self.cell = cell
+        self.__cells: dict[tuple[int, int], dict[str, Any]] = {}
+        self.__keys: dict[str, tuple[int, int]] = {}
+
+    def key(self, obj) -> tuple[int, int] | None:
+        """Returns the cell of an object, None without a valid position"""
+        try:
+            lat = float(getattr(obj, self.lat_field))
+            lon = float(getattr(obj, self.lon_field))
+        except (AttributeError, TypeError, ValueError):
+            return None
+
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+            return None
+
+        return floor(lat / self.cell), floor(lon / self.cell)
+
+    def add(self, obj) -> None:
+        """Adds an object to the index"""
+        key = self.key(obj)
+
+        if key is None:
+            return
+
+        self.__cells.setdefault(key, {})[obj.id] = obj
+        self.__keys[obj.id] = key
+
+    def remove(self, obj) -> None:
+        """Removes an object from the index"""
+        key = self.__keys.pop(obj.id, None)
+
+        if key is None:
+            return
+
+        cell = self.__cells[key]
+        del cell[obj.id]
+
+        if not cell:
+            del self.__cells[key]
+
+    def update(self, obj) -> None:
+        """Moves an object whose position has changed"""
+        if obj.id in self.__keys and self.__keys[obj.id] == self.key(obj):
+            return
+
+        self.remove(obj)
+        self.add(obj)
+
+    def __span(
+        self, south: float, west: float, north: float, east: float
+    ) -> tuple[range, list[int]]:
+        """
+        Returns the rows and the columns of the cells overlapping the
+        box, `west > east` for a box crossing the antimeridian
+        """
+        rows = range(floor(south / self.cell), floor(north / self.cell) + 1)
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180.0), (-180.0, east)]
+        cols = [
+            col
+            for start, end in spans
+            for col in range(
+                floor(start / self.cell), floor(end / self.cell) + 1
+            )
+        ]
+
+        return rows, cols
+
+    def __overlapping(
+        self, rows: range, cols: list[int]
+    ) -> Iterator[dict[str, Any]]:
+        """Yields the occupied cells of the rows and the columns"""
+        if len(rows) * len(cols) > len(self.__cells):
+            # A large box is cheaper to answer from the occupied cells
+            rows, cols = set(rows), set(cols)
+            return (
+                objs
+                for (row, col), objs in self.__cells.items()
+                if row in rows and col in cols
+            )
+
+        return (
+            self.__cells[(row, col)]
+            for row in rows
+            for col in cols
+            if (row, col) in self.__cells
+        )
+
+    def within(
+        self, south: float, west: float, north: float, east: float
+    ) -> list:
+        """
+        Returns the objects of the cells overlapping the box,
+        `west > east` for a box crossing the antimeridian
+        """
+        cells = self.__overlapping(*self.__span(south, west, north, east))
+
+        return [obj for objs in cells for obj in objs.values()]
+
+    def count_within(
+        self,
+        south: float,
+        west: float,
+        north: float,
+        east: float,
+        limit: float = inf,
+    ) -> int:
+        """
+        Number of objects `within` returns for the box. Past limit, or
+        when more than limit cells would be read to count them, it
+        returns some larger number instead
+        """
+        rows, cols = self.__span(south, west, north, east)
+
+        if min(len(rows) * len(cols), len(self.__cells)) > limit:
+            return max(len(self.__keys), floor(limit) + 1)
+
+        count = 0
+
+        for objs in self.__overlapping(rows, cols):
+            count += len(objs)
+
+            if count > limit:
+                break
+
+        return count
+
+
+class TextIndex:
+    """
+    Inverted index over the words of one or more text fields
+
+    Every word maps to the objects containing it and the positions of
+    the word in them, so `search` finds the objects containing every
+    word of a query, checks the phrases on the positions and ranks the
+    matches with BM25
+    """
+
+    fields: tuple[str, ...]
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, *fields: str) -> None:
+        """Creates an empty index over the given fields"""
+        self.fields = fields
+        self.__postings: dict[str, dict[str, list[int]]] = {}
+        self.__lengths: dict[str, int] = {}
+        self.__texts: dict[str, tuple] = {}
+        self.__objs: dict[str, Any] = {}
+        self.__total_length = 0
+
+    def key(self, obj) -> tuple:
+        """Returns the indexed texts of an object"""
+        return tuple(
+            str(getattr(obj, field, None) or "") for field in self.fields
+        )
+
+    def __words(self, texts: tuple):
+        """Yields the words of the texts with their position"""
+        position = 0
+
+        for text in texts:
+            for word in tokenize(text):
+                yield word, position
+                position += 1
+            # Leaves a gap so phrases never span two fields
+            position += 1
+
+    def add(self, obj) -> None:
+        """Adds an object to the index"""
+        texts = self.key(obj)
+        length = 0
+
+        for word, position in self.__words(texts):
+            self.__postings.setdefault(word, {}).setdefault(
+                obj.id, []
+            ).append(position)
+            length += 1
+
+        self.__texts[obj.id] = texts
+        self.__lengths[obj.id] = length
+        self.__objs[obj.id] = obj
+        self.__total_length += length
+
+    def remove(self, obj) -> None:
+        """Removes an object from the index"""
+        texts = self.__texts.pop(obj.id, None)
+
+        if texts is None:
+            return
+
+        for word in {word for word, _ in self.__words(texts)}:
+            postings = self.__postings[word]
+            del postings[obj.id]
+
+            if not postings:
+                del self.__postings[word]
+
+        self.__total_length -= self.__lengths.pop(obj.id)
+        del self.__objs[obj.id]
+
+    def update(self, obj) -> None:
+        """Reindexes an object whose texts have changed"""
+        if self.__texts.get(obj.id) == self.key(obj):
+            self.__objs[obj.id] = obj
+            return
+
+        self.remove(obj)
+        self.add(obj)
+
+    def __has_phrase(self, obj_id: str, phrase: list[str]) -> bool:
+        """Whether the words of the phrase follow each other in an object"""
+        positions = [set(self.__postings[word][obj_id]) for word in phrase]
+
+        return any(
+            all(start + i in positions[i] for i in range(1, len(phrase)))
+            for start in positions[0]
+        )
+
+    def search(
+        self, words: list[str], phrases: list[list[str]], limit: int
+    ) -> list[tuple[Any, float]]:
+        """
+        Returns the limit best `(object, score)` pairs of the objects
+        containing every word and phrase, by decreasing BM25 score
+        """
+        terms = set(words).union(*phrases)
+        postings = [self.__postings.get(term) for term in terms]
+
+        if not terms or not all(postings):
+            return []
+
+        # Intersecting from the rarest word keeps the candidates few
+        postings.sort(key=len)
+        matches = [
+            obj_id
+            for obj_id in postings[0]
+            if all(obj_id in other for other in postings[1:])
+            and all(self.__has_phrase(obj_id, phrase) for phrase in phrases)
+        ]
+
+        count = len(self.__lengths)
+        average_length = self.__total_length / count
+        idfs = [
+            log(1 + (count - len(p) + 0.5) / (len(p) + 0.5))
+            for p in postings
+        ]
+
+        def score(obj_id: str) -> float:
+            """BM25 score of an object for the terms"""
+            norm = self.k1 * (
+                1 - self.b
+                + self.b * self.__lengths[obj_id] / average_length
+            )
+            return sum(
+                idf * len(p[obj_id]) * (self.k1 + 1)
+                / (len(p[obj_id]) + norm)
+                for idf, p in zip(idfs, postings)
+            )
+
+        return heapq.nlargest(
+            limit,
+            ((self.__objs[obj_id], score(obj_id)) for obj_id in matches),
+            key=itemgetter(1),
+        )
+
+
+class ColumnStore:
+    """
+    Keeps numeric fields of the objects in contiguous NumPy columns, so
+    filters, sorts and aggregates run as vectorized operations instead
+    of reading every object
+
+    Row i of the columns holds the values of `objs[i]`. A removed row is
+    replaced by the last one, so the rows stay dense. A missing or non
+    numeric value is stored as NaN, which no range matches
+    """
+
+    fields: tuple[str, ...]
+
+    def __init__(self, *fields: str, capacity: int = 1024) -> None:
+        """Creates an empty store of the given fields"""
+        self.fields = fields
+        self.__positions = {field: i for i, field in enumerate(fields)}
+        self.__columns = np.full((len(fields), capacity), np.nan)
+        # Id of the object of each row, as fixed width strings sorted in
+        # C, widened for a longer id
+        self.__ids = np.empty(capacity, dtype=str)
+        self.__objs: list = []
+        self.__rows: dict[str, int] = {}
+
+    def key(self, obj) -> list[float]:
+        """Returns the values of an object in this store"""
+        values = []
+
+        for field in self.fields:
+            try:
+                values.append(float(getattr(obj, field)))
+            except (AttributeError, TypeError, ValueError):
+                values.append(np.nan)
+
+        return values
+
+    def add(self, obj) -> None:
+        """Adds an object in a new row"""
+        row = len(self.__objs)
+
+        if row == self.__columns.shape[1]:
+            grown = np.full((len(self.fields), 2 * row), np.nan)
+            grown[:, :row] = self.__columns
+            self.__columns = grown
+            ids = np.empty(2 * row, dtype=self.__ids.dtype)
+            ids[:row] = self.__ids
+            self.__ids = ids
+
+        if len(obj.id) > self.__ids.dtype.itemsize // 4:
+            self.__ids = self.__ids.astype(f"<U{len(obj.id)}")
+
+        self.__columns[:, row] = self.key(obj)
+        self.__ids[row] = obj.id
+        self.__objs.append(obj)
+        self.__rows[obj.id] = row
+
+    def remove(self, obj) -> None:
+        """Removes an object, its row is filled with the last row"""
+        row = self.__rows.pop(obj.id, None)
+
+        if row is None:
+            return
+
+        last = len(self.__objs) - 1
+
+        if row != last:
+            self.__columns[:, row] = self.__columns[:, last]
+            self.__ids[row] = self.__ids[last]
+            self.__objs[row] = self.__objs[last]
+            self.__rows[self.__objs[row].id] = row
+
+        self.__columns[:, last] = np.nan
+        self.__ids[last] = ""
+        self.__objs.pop()
+
+    def update(self, obj) -> None:
+        """Writes the current values of an object in its row"""
+        row = self.__rows.get(obj.id)
+
+        if row is None:
+            self.add(obj)
+        else:
+            self.__columns[:, row] = self.key(obj)
+            self.__objs[row] = obj
+
+    def covers(self, *fields: str) -> bool:
+        """Whether every field is a column of the store"""
+        return all(field in self.__positions for field in fields)
+
+    def column(self, field: str) -> np.ndarray:
+        """Returns the values of a field, one per row"""
+        return self.__columns[self.__positions[field], :len(self.__objs)]
+
+    def mask(
+        self,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> np.ndarray:
+        """
+        Returns whether each row is inside the `(low, high)` ranges and
+        the `(south, west, north, east)` box of the latitude and
+        longitude columns, a None bound is unbounded
+        """
+        mask = np.ones(len(self.__objs), dtype=bool)
+
+        for field, (low, high) in ranges.items():
+            column = self.column(field)
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        if box is not None:
+            south, west, north, east = box
+            lat, lon = self.column("latitude"), self.column("longitude")
+            mask &= (lat >= south) & (lat <= north)
+            if west <= east:
+                mask &= (lon >= west) & (lon <= east)
+            else:
+                mask &= (lon >= west) | (lon <= east)
+
+        return mask
+
+    def select(
+        self,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+        descending: bool = False,
+    ) -> list:
+        """
+        Returns the objects inside the ranges and the box, ordered by id
+        or by the sort field and then by id, rows without a value for
+        the sort field last
+        """
+        rows = np.flatnonzero(self.mask(ranges, box))
+        rows = rows[np.argsort(self.__ids[rows], kind="stable")]
+
+        if sort is not None:
+            values = self.column(sort)[rows]
+            # A stable sort keeps the id order of equal values
+            order = np.argsort(
+                -values if descending else values, kind="stable"
+            )
+            rows = rows[order]
+
+        return [self.__objs[row] for row in rows]
+
+    def aggregate(
+        self,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        Returns the number of rows inside the ranges and the box, and
+        the min, max and mean of each field over them, ignoring NaN
+        """
+        mask = self.mask(ranges, box)
+        summary: dict[str, Any] = {"count": int(mask.sum())}
+
+        for field in fields:
+            values = self.column(field)[mask]
+            values = values[~np.isnan(values)]
+            summary[field] = {
+                "min": float(values.min()) if len(values) else None,
+                "max": float(values.max()) if len(values) else None,
+                "avg": float(values.mean()) if len(values) else None,
+            }
+
+        return summary
+
+    def __len__(self) -> int:
+        """Number of objects in the store"""
+        return len(self.__objs)
+
+
+def build_indexes() -> dict[str, list]:
+    """Declares the secondary indexes of each model"""
+    indexes = {
+        "city": [HashIndex("country_code")],
+        "place": [
+            HashIndex("city_id"),
+            HashIndex("host_id"),
+            GridIndex(),
+            SortedIndex("price_per_night", cast=float),
+            SortedIndex("max_guests", cast=float),
+            SortedIndex("number_of_rooms", cast=float),
+            SortedIndex("number_of_bathrooms", cast=float),
+            TextIndex(*SEARCH_FIELDS["place"]),
+        ],
+        "review": [
+            HashIndex("place_id"),
+            HashIndex("user_id"),
+            TextIndex(*SEARCH_FIELDS["review"]),
+        ],
+        "user": [HashIndex("email")],
+        "placeamenity": [
+            HashIndex("place_id", "amenity_id"),
+            HashIndex("place_id"),
+            HashIndex("amenity_id"),
+        ],
+    }
+
+    for model, fields in COLUMN_STORE_FIELDS.items():
+        indexes.setdefault(model, []).append(ColumnStore(*fields))
+
+    return indexes
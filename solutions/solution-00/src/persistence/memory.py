@@ -3,9 +3,30 @@ This module exports a Repository that does not persist data,
 it only stores it in memory
 """
 
+from contextlib import contextmanager
 from datetime import datetime
+from functools import partial
+import threading
+from typing import Callable, Iterator
 from src.models.base import Base
-from src.persistence.repository import Repository
+from src.persistence.indexes import (
+    ColumnStore,
+    GridIndex,
+    HashIndex,
+    SortedIndex,
+    TextIndex,
+    build_indexes,
+    parse_query,
+)
+from src.persistence.repository import (
+    Repository,
+    in_ranges,
+    sort_by,
+    sort_key,
+    summarize,
+)
+from utils.constants import INDEX_SCAN_FRACTION
+from utils.geo import in_box
 from utils.populate import populate_memory
 
 
@@ -13,68 +34,408 @@ class MemoryRepository(Repository):
     """
     A Repository that does not persist data, it only stores it in memory
 
-
+    Every model keeps an `id -> object` dict, so `get`, `update` and
+    `delete` are O(1) and `get_all` keeps the insertion order.
+    The secondary indexes declared in `build_indexes` are kept up to
+    date on every save, update and delete and are used by `find`, and
+    every model has an index sorted by id to serve `page`.
 
     Every time the server is restarted, the data is lost
     """
 
-    __data: dict[str, list] = {
-        "country": [],
-        "user": [],
-        "amenity": [],
-        "city": [],
-        "review": [],
-        "place": [],
-        "placeamenity": [],
-    }
+    _data: dict[str, dict[str, Base]]
+    _indexes: dict[str, list[HashIndex | SortedIndex]]
+    _order: dict[str, SortedIndex]
+    _lock: threading.RLock
+    _private = True
 
     def __init__(self) -> None:
-        """Calls reload method"""
+        """Creates the storage and calls reload method"""
+        super().__init__()
+        self._data = {
+            "country": {},
+            "user": {},
+            "amenity": {},
+            "city": {},
+            "review": {},
+            "place": {},
+            "placeamenity": {},
+            "ratingstats": {},
+        }
+        self._indexes = build_indexes()
+        self._order = {}
+        for model in self._data:
+            self._order[model] = SortedIndex("id")
+            self._indexes.setdefault(model, []).append(self._order[model])
+        self._lock = threading.RLock()
         self.reload()
 
     def get_all(self, model_name: str) -> list:
         """Get all objects of a given model"""
-        return self.__data.get(model_name, [])
+        return list(self._data.get(model_name, {}).values())
 
     def get(self, model_name: str, obj_id: str):
         """Get an object by its ID"""
-        for obj in self.get_all(model_name):
-            if obj.id == obj_id:
-                return obj
+        return self._data.get(model_name, {}).get(obj_id)
+
+    def find(self, model_name: str, **equals) -> list:
+        """
+        Get all objects of a given model whose fields equal the values,
+        using the index covering most of the given fields
+        """
+        candidates = [
+            index
+            for index in self._indexes.get(model_name, [])
+            if isinstance(index, HashIndex)
+            and set(index.fields) <= equals.keys()
+        ]
+
+        if not candidates:
+            return super().find(model_name, **equals)
+
+        index = max(candidates, key=lambda index: len(index.fields))
+        objs = index.lookup(tuple(equals[field] for field in index.fields))
+
+        return [
+            obj
+            for obj in objs
+            if all(
+                getattr(obj, key, None) == value
+                for key, value in equals.items()
+            )
+        ]
+
+    def find_in(self, model_name: str, field: str, values) -> list:
+        """
+        Get all objects of a model whose field is one of the values,
+        using the id map or an index over that single field
+        """
+        values = set(values)
+
+        if field == "id":
+            objs = self._data.get(model_name, {})
+            return [objs[value] for value in values if value in objs]
+
+        for index in self._indexes.get(model_name, []):
+            if isinstance(index, HashIndex) and index.fields == (field,):
+                return [
+                    obj for value in values for obj in index.lookup((value,))
+                ]
+
+        return super().find_in(model_name, field, values)
+
+    def find_range(self, model_name: str, **ranges: tuple) -> list:
+        """
+        Get all objects of a model, ordered by id, whose fields are
+        inside the given ranges
+
+        Only the objects of the most selective sorted index are read,
+        the other ranges are checked on them, so the cost follows the
+        size of the result and not the size of the model
+        """
+        indexes = {
+            index.field: index
+            for index in self._indexes.get(model_name, [])
+            if isinstance(index, SortedIndex) and index.field in ranges
+        }
+
+        if not indexes:
+            return super().find_range(model_name, **ranges)
+
+        field = min(
+            indexes, key=lambda field: indexes[field].count_between(
+                *ranges[field]
+            )
+        )
+
+        return sorted(
+            (
+                obj
+                for obj in indexes[field].between(*ranges[field])
+                if in_ranges(obj, ranges)
+            ),
+            key=lambda obj: obj.id,
+        )
+
+    def search(self, model_name: str, query: str, limit: int) -> list:
+        """
+        Get the limit best `(object, score)` pairs of a model for a
+        full-text query, from its text index
+        """
+        for index in self._indexes.get(model_name, []):
+            if isinstance(index, TextIndex):
+                return index.search(*parse_query(query), limit)
+
+        return super().search(model_name, query, limit)
+
+    def find_within(
+        self,
+        model_name: str,
+        box: tuple[float, float, float, float],
+    ) -> list:
+        """
+        Get all objects of a model inside the `(south, west, north,
+        east)` box, using the cells of its spatial index
+        """
+        for index in self._indexes.get(model_name, []):
+            if isinstance(index, GridIndex):
+                return [
+                    obj
+                    for obj in index.within(*box)
+                    if in_box(float(obj.latitude), float(obj.longitude), box)
+                ]
+
+        return super().find_within(model_name, box)
+
+    def _columns(self, model_name: str, *fields: str) -> ColumnStore | None:
+        """Returns the column store of a model holding every field"""
+        for index in self._indexes.get(model_name, []):
+            if isinstance(index, ColumnStore) and index.covers(*fields):
+                return index
+
         return None
 
+    def _narrowest(
+        self,
+        model_name: str,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None,
+        limit: float,
+    ) -> tuple[int, Callable[[], list]] | None:
+        """
+        Returns the number of candidates of the most selective sorted or
+        spatial index of a model for the ranges and the box, and the
+        function reading them, None when no index applies. The counts
+        past limit are not exact
+        """
+        candidates = []
+
+        for index in self._indexes.get(model_name, []):
+            if isinstance(index, SortedIndex) and index.field in ranges:
+                bounds = ranges[index.field]
+                candidates.append((
+                    index.count_between(*bounds),
+                    partial(index.between, *bounds),
+                ))
+            elif isinstance(index, GridIndex) and box is not None:
+                candidates.append((
+                    index.count_within(*box, limit=limit),
+                    partial(index.within, *box),
+                ))
+
+        return min(candidates, key=lambda pair: pair[0], default=None)
+
+    def _index_scan(
+        self,
+        model_name: str,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None,
+    ) -> list | None:
+        """
+        Returns the objects of a model selected by the ranges and the
+        box, ordered by id, when an index narrows them to at most
+        INDEX_SCAN_FRACTION of the model, else None
+        """
+        limit = self.count(model_name) * INDEX_SCAN_FRACTION
+        narrowest = self._narrowest(model_name, ranges, box, limit)
+
+        if narrowest is None or narrowest[0] > limit:
+            return None
+
+        return sorted(
+            (
+                obj
+                for obj in narrowest[1]()
+                if in_ranges(obj, ranges) and (
+                    box is None
+                    or in_box(float(obj.latitude), float(obj.longitude), box)
+                )
+            ),
+            key=lambda obj: obj.id,
+        )
+
+    def select(
+        self,
+        model_name: str,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+    ) -> list:
+        """
+        Get the objects of a model selected by the ranges and the box,
+        ordered by the sort field then by id. A selective range or box
+        reads the few objects of its index, the others are answered with
+        vectorized masks over the column store when it holds the fields
+        """
+        field, descending = sort_key(sort)
+        objs = self._index_scan(model_name, ranges, box)
+
+        if objs is not None:
+            return sort_by(objs, field, descending)
+
+        store = self._columns(
+            model_name,
+            *ranges,
+            *(("latitude", "longitude") if box is not None else ()),
+            *((field,) if field is not None else ()),
+        )
+
+        if store is None:
+            return super().select(model_name, ranges, box, sort)
+
+        # Writers move the rows of the store while holding the lock
+        with self._lock:
+            return store.select(ranges, box, field, descending)
+
+    def aggregate(
+        self,
+        model_name: str,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        Count the objects of a model selected by the ranges and the box,
+        and get the min, max and mean of each field over them, from the
+        columns of the column store when it holds the fields, unless a
+        selective range or box reads the few objects of its index
+        """
+        objs = self._index_scan(model_name, ranges, box)
+
+        if objs is not None:
+            return summarize(objs, fields)
+
+        store = self._columns(
+            model_name,
+            *fields,
+            *ranges,
+            *(("latitude", "longitude") if box is not None else ()),
+        )
+
+        if store is None:
+            return super().aggregate(model_name, fields, ranges, box)
+
+        with self._lock:
+            return store.aggregate(fields, ranges, box)
+
+    def page(self, model_name: str, after: str | None, limit: int):
+        """Get up to limit objects of a model with an id after the cursor"""
+        objs = self._order[model_name].page(
+            None if after is None else (after, after), limit + 1
+        )
+        next_cursor = objs[limit - 1].id if len(objs) > limit else None
+
+        return objs[:limit], next_cursor
+
+    def count(self, model_name: str) -> int:
+        """Number of objects of a model"""
+        return len(self._data.get(model_name, {}))
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """
+        Holds off the other writers, of this process and of the others
+        sharing the versions, while the caller reads and saves objects
+        """
+        with self._writing(), self._lock:
+            yield
+
     def reload(self):
         """Populates the database with some dummy data"""
         populate_memory(self)
 
-    def save(self, obj: Base):
-        """Save an object"""
-        cls = obj.__class__.__name__.lower()
+    def _put(self, cls: str, obj) -> None:
+        """
+        Stores an object under its id and refreshes the indexes,
+        an object already stored with that id keeps its position
+        """
+        with self._lock:
+            old = self._data[cls].get(obj.id)
+            self._data[cls][obj.id] = obj
+
+            for index in self._indexes.get(cls, []):
+                if old is not None and old is not obj:
+                    index.remove(old)
+                index.update(obj)
+
+            self._bump(cls)
+
+    def _replace(self, cls: str, objs: list) -> None:
+        """
+        Replaces every object of a model, e.g. by the ones written by
+        another process, indexed aside and swapped in at once
+        """
+        order = SortedIndex("id")
+        indexes = build_indexes().get(cls, []) + [order]
+        data = {}
+
+        for obj in objs:
+            data[obj.id] = obj
+            for index in indexes:
+                index.update(obj)
 
-        if obj not in self.__data[cls]:
-            # print(f"Saving {obj}, {cls}")
-            self.__data[cls].append(obj)
+        with self._lock:
+            self._data[cls] = data
+            self._indexes[cls] = indexes
+            self._order[cls] = order
+
+    def _pop(self, cls: str, obj_id: str):
+        """Removes an object by its id, returns it if it was stored"""
+        with self._lock:
+            obj = self._data[cls].pop(obj_id, None)
+
+            if obj is not None:
+                for index in self._indexes.get(cls, []):
+                    index.remove(obj)
+
+                self._bump(cls)
+
+        return obj
+
+    def save(self, obj: Base, durable: bool = False):
+        """
+        Save an object
+
+        `durable` is accepted for compatibility with the repositories
+        that write to disk, memory has nothing to wait for
+        """
+        self._put(obj.__class__.__name__.lower(), obj)
+        self._record("save", [obj])
 
         return obj
 
-    def update(self, obj: Base):
+    def save_many(self, objs: list, durable: bool = False) -> list:
+        """Save several objects, storing them can't fail"""
+        with self._lock:
+            for obj in objs:
+                self._put(obj.__class__.__name__.lower(), obj)
+
+        self._record("save", objs)
+
+        return [None] * len(objs)
+
+    def update(
+        self, obj: Base, durable: bool = False, fields: set | None = None
+    ):
         """Update an object"""
         cls = obj.__class__.__name__.lower()
 
-        for i, o in enumerate(self.__data[cls]):
-            if o.id == obj.id:
-                obj.updated_at = datetime.now()
-                self.__data[cls][i] = obj
-                return obj
+        if obj.id not in self._data[cls]:
+            return None
 
-        return None
+        obj.updated_at = datetime.now()
+        self._put(cls, obj)
+        self._record("update", [obj], fields)
 
-    def delete(self, obj: Base) -> bool:
+        return obj
+
+    def delete(self, obj: Base, durable: bool = False) -> bool:
         """Delete an object"""
         cls = obj.__class__.__name__.lower()
 
-        if obj in self.__data[cls]:
-            self.__data[cls].remove(obj)
-            return True
+        if self._pop(cls, obj.id) is None:
+            return False
+
+        self._record("delete", [obj])
 
-        return False
+        return True
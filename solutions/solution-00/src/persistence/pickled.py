@@ -1,77 +1,256 @@
 """
-This module exports a Repository that persists data in a pickle file
+This module exports a Repository that persists data in pickle files
 """
 
+from concurrent.futures import ThreadPoolExecutor
+import os
 import pickle
-from src.persistence.repository import Repository
-from utils.constants import PICKLE_STORAGE_FILENAME
+import threading
+import zlib
+from src.persistence.flusher import Flusher, create_flusher, write_atomically
+from src.persistence.memory import MemoryRepository
+from utils.constants import (
+    PICKLE_SHARD_BUCKETS,
+    PICKLE_STORAGE_DIRNAME,
+    PICKLE_STORAGE_FILENAME,
+)
 
 
-class PickleRepository(Repository):
-    """Pickle Repository"""
+def shard_filename(model: str, bucket: int) -> str:
+    """Returns the file name of a shard inside the storage directory"""
+    if PICKLE_SHARD_BUCKETS.get(model, 1) == 1:
+        return f"{model}.pkl"
+    return f"{model}.{bucket:03d}.pkl"
 
+
+def shard_of(model: str, obj_id: str) -> tuple[str, int]:
+    """Returns the shard (model, bucket) an object is stored in"""
+    buckets = PICKLE_SHARD_BUCKETS.get(model, 1)
+
+    if buckets == 1:
+        return model, 0
+    return model, zlib.crc32(obj_id.encode()) % buckets
+
+
+def convert_single_file(filename: str, dirname: str) -> None:
+    """
+    Converts the single file layout (one pickled dict of lists) to the
+    sharded layout, the old file is kept renamed as `<filename>.bak`
+    """
+    with open(filename, "rb") as file:
+        file_data: dict[str, list] = pickle.load(file)
+
+    shards: dict[tuple[str, int], list] = {}
+
+    for model, objs in file_data.items():
+        for obj in objs:
+            shards.setdefault(shard_of(model, obj.id), []).append(obj)
+
+    os.makedirs(dirname, exist_ok=True)
+
+    for (model, bucket), objs in shards.items():
+        write_atomically(
+            os.path.join(dirname, shard_filename(model, bucket)),
+            pickle.dumps(objs),
+        )
+
+    os.replace(filename, f"{filename}.bak")
+
+
+class PickleRepository(MemoryRepository):
+    """
+    Pickle Repository
+
+    The objects and their indexes live in memory like in the
+    MemoryRepository. On disk every model has its own pickle file, and
+    the models in PICKLE_SHARD_BUCKETS are split by a hash of the id,
+    so a change only rewrites the shard it touched. Indexes are rebuilt
+    when the shards are loaded, in parallel.
+
+    When STORAGE_FLUSH_WINDOW_MS is set the writes are batched by a
+    background Flusher, pass `durable=True` to wait for the write
+    """
+
+    _private = False
     __filename = PICKLE_STORAGE_FILENAME
-    __data: dict[str, list] = {
-        "country": [],
-        "user": [],
-        "amenity": [],
-        "city": [],
-        "review": [],
-        "place": [],
-        "placeamenity": [],
-    }
+    __dirname = PICKLE_STORAGE_DIRNAME
+
+    _flusher: Flusher | None
 
     def __init__(self) -> None:
-        """Calls reload method"""
-        self.reload()
+        """Creates the flusher and calls reload method"""
+        self.__io_lock = threading.Lock()
+        self.__shards: dict[tuple[str, int], dict] = {}
+        self.__dirty: set[tuple[str, int]] = set()
+        self._flusher = create_flusher(self._save_to_file)
+
+        super().__init__()
+
+    def _put(self, cls: str, obj) -> None:
+        """Stores an object and marks its shard as changed"""
+        with self._lock:
+            super()._put(cls, obj)
+
+            shard = shard_of(cls, obj.id)
+            self.__shards.setdefault(shard, {})[obj.id] = obj
+            self.__dirty.add(shard)
+
+    def _pop(self, cls: str, obj_id: str):
+        """Removes an object and marks its shard as changed"""
+        with self._lock:
+            obj = super()._pop(cls, obj_id)
+
+            if obj is not None:
+                shard = shard_of(cls, obj_id)
+                self.__shards[shard].pop(obj_id, None)
+                self.__dirty.add(shard)
+
+        return obj
+
+    def _replace(self, cls: str, objs: list) -> None:
+        """Replaces every object of a model and its shards"""
+        with self._lock:
+            super()._replace(cls, objs)
+
+            for shard in [shard for shard in self.__shards if shard[0] == cls]:
+                del self.__shards[shard]
+                self.__dirty.discard(shard)
+
+            for obj in objs:
+                shard = shard_of(cls, obj.id)
+                self.__shards.setdefault(shard, {})[obj.id] = obj
 
     def _save_to_file(self):
-        """Helper method to save the current object data to the file"""
-        with open(self.__filename, "wb") as file:
-            pickle.dump(self.__data, file)
+        """Helper method to write the changed shards to their files"""
+        with self.__io_lock:
+            with self._lock:
+                dirty, self.__dirty = self.__dirty, set()
+                blobs = {
+                    shard: pickle.dumps(
+                        list(self.__shards.get(shard, {}).values())
+                    )
+                    for shard in dirty
+                }
 
-    def get_all(self, model_name: str) -> list:
-        """Get all objects of a given model"""
-        return self.__data[model_name]
+            os.makedirs(self.__dirname, exist_ok=True)
 
-    def get(self, model_name: str, obj_id: str):
-        """Get an object by its ID"""
-        for obj in self.__data[model_name]:
-            if obj.id == obj_id:
-                return obj
-        return None
+            for shard, data in blobs.items():
+                write_atomically(
+                    os.path.join(self.__dirname, shard_filename(*shard)),
+                    data,
+                )
+
+    def _persist(self, durable: bool = False) -> None:
+        """Writes the changed shards to disk, or asks the flusher to do it"""
+        # The other processes reload what they see in the files, so the
+        # writes are synchronous when the versions are shared
+        if self._flusher and self._shared is None:
+            self._flusher.request(durable)
+        else:
+            self._save_to_file()
+
+    def _load_shard(self, filename: str) -> list:
+        """Reads and unpickles one shard file"""
+        with open(os.path.join(self.__dirname, filename), "rb") as file:
+            return pickle.load(file)
+
+    def _refresh(self, model_names: list[str]) -> None:
+        """Reloads the shards of the models written by other processes"""
+        try:
+            filenames = [
+                name
+                for name in os.listdir(self.__dirname)
+                if name.endswith(".pkl") and name.split(".")[0] in model_names
+            ]
+        except FileNotFoundError:
+            filenames = []
+
+        objs: dict[str, list] = {model: [] for model in model_names}
+
+        for filename in filenames:
+            objs[filename.split(".")[0]].extend(self._load_shard(filename))
+
+        for model, model_objs in objs.items():
+            self._replace(model, model_objs)
 
     def reload(self):
-        """Reloads the data from the pickle file"""
+        """Reloads the data from the shard files"""
+        if os.path.exists(self.__filename):
+            convert_single_file(self.__filename, self.__dirname)
+
         try:
-            with open(self.__filename, "rb") as file:
-                self.__data = pickle.load(file)
+            filenames = sorted(
+                name
+                for name in os.listdir(self.__dirname)
+                if name.endswith(".pkl")
+            )
         except FileNotFoundError:
+            filenames = []
+
+        if not filenames:
             from src.models.country import Country
 
-            self.__data["country"] = [Country("Uruguay", "UY")]
+            self.save(Country("Uruguay", "UY"))
+            return
+
+        with ThreadPoolExecutor() as executor:
+            shards = list(executor.map(self._load_shard, filenames))
+
+        for objs in shards:
+            for obj in objs:
+                self._put(obj.__class__.__name__.lower(), obj)
+
+        expected = {shard_filename(*shard) for shard in self.__shards}
+        stale = [name for name in filenames if name not in expected]
+
+        with self._lock:
+            # Shards of models whose bucket count changed are rewritten
+            stale_models = {name.split(".")[0] for name in stale}
+            self.__dirty = {
+                shard for shard in self.__shards if shard[0] in stale_models
+            }
+
+        if stale:
             self._save_to_file()
+            for name in stale:
+                os.remove(os.path.join(self.__dirname, name))
 
-    def save(self, obj, save_to_file=True):
+    def save(self, obj, save_to_file=True, durable=False):
         """Save an object"""
-        self.__data[obj.__class__.__name__.lower()].append(obj)
-        if save_to_file:
-            self._save_to_file()
+        with self._writing():
+            super().save(obj)
+
+            if save_to_file:
+                self._persist(durable)
+
+        return obj
 
-    def update(self, obj):
-        """Update an object"""
-        for i, o in enumerate(self.__data[obj.__class__.__name__.lower()]):
-            if o.id == obj.id:
-                self.__data[obj.__class__.__name__.lower()][i] = obj
-                self._save_to_file()
-                return
+    def save_many(self, objs: list, durable=False) -> list:
+        """Save several objects with a single write of their shards"""
+        with self._writing():
+            errors = super().save_many(objs)
 
-    def delete(self, obj) -> bool:
+            if objs:
+                self._persist(durable)
+
+        return errors
+
+    def update(self, obj, durable=False, fields=None):
+        """Update an object, its whole shard is written again"""
+        with self._writing():
+            if super().update(obj, fields=fields) is None:
+                return None
+
+            self._persist(durable)
+
+        return obj
+
+    def delete(self, obj, durable=False) -> bool:
         """Delete an object"""
-        for i, o in enumerate(self.__data[obj.__class__.__name__.lower()]):
-            if o.id == obj.id:
-                del self.__data[obj.__class__.__name__.lower()][i]
-                break
+        with self._writing():
+            if not super().delete(obj):
+                return False
+
+            self._persist(durable)
 
-        self._save_to_file()
         return True
@@ -1,11 +1,227 @@
 """ Repository pattern for data access layer """
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from itertools import count
+from time import time
+from typing import Iterator
+import uuid
+
+from src.persistence.changes import ChangeLog, SharedChangeLog
+from src.persistence.indexes import TextIndex, parse_query
+from src.persistence.versions import SharedVersions
+from utils.constants import SEARCH_FIELDS
+from utils.geo import in_box
+
+
+def in_ranges(obj, ranges: dict[str, tuple]) -> bool:
+    """
+    Whether the fields of an object are inside the `(low, high)` ranges,
+    a None bound is unbounded and a non numeric value never matches
+    """
+    for field, (low, high) in ranges.items():
+        try:
+            value = float(getattr(obj, field))
+        except (AttributeError, TypeError, ValueError):
+            return False
+
+        if (low is not None and value < low) or (
+            high is not None and value > high
+        ):
+            return False
+
+    return True
+
+
+def number(obj, field: str) -> float | None:
+    """Value of a field as a float, None when unset or non numeric"""
+    try:
+        value = float(getattr(obj, field))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+    return None if value != value else value
+
+
+def sort_key(sort: str | None) -> tuple[str | None, bool]:
+    """Splits a `field` or `-field` sort into the field and descending"""
+    if sort and sort.startswith("-"):
+        return sort[1:], True
+
+    return sort, False
+
+
+def sort_by(objs: list, field: str | None, descending: bool) -> list:
+    """
+    Orders objects sorted by id by a field, keeping the id order between
+    equal values, the objects without a value for the field last
+    """
+    if field is None:
+        return objs
+
+    valued = [obj for obj in objs if number(obj, field) is not None]
+    valued.sort(key=lambda obj: number(obj, field), reverse=descending)
+
+    return valued + [obj for obj in objs if number(obj, field) is None]
+
+
+def summarize(objs: list, fields: tuple[str, ...]) -> dict:
+    """
+    Counts the objects and gets the min, max and mean (`avg`) of each
+    field over them, None when no object has a value
+    """
+    summary: dict = {"count": len(objs)}
+
+    for field in fields:
+        values = [
+            value
+            for value in (number(obj, field) for obj in objs)
+            if value is not None
+        ]
+        summary[field] = {
+            "min": min(values) if values else None,
+            "max": max(values) if values else None,
+            "avg": sum(values) / len(values) if values else None,
+        }
+
+    return summary
 
 
 class Repository(ABC):
     """Abstract class for repository pattern"""
 
+    epoch: str
+    # Log of the writes, shared by the workers sharing the versions
+    changes: ChangeLog | SharedChangeLog
+    _versions: dict[str, tuple[int, float]]
+    _shared: SharedVersions | None = None
+    # Shared version of each model when this repository last caught up
+    _seen: dict[str, int]
+    # Whether the data only lives in this process, no other one writes it
+    _private = False
+
+    def __init__(self) -> None:
+        """Starts the write versions of the models"""
+        # Tells apart the versions of two repositories, e.g. across restarts
+        self.epoch = uuid.uuid4().hex[:8]
+        self._writes = count(1)
+        self._started = time()
+        self._versions = {}
+        self._seen = {}
+        self.changes = ChangeLog()
+
+    def version(self, model_name: str) -> tuple[int, float]:
+        """
+        Returns the version of a model and the time of its last write
+
+        The version changes on every save, update and delete of an
+        object of the model and only grows while the repository lives,
+        or while the file of its shared versions lives
+        """
+        if self._shared is not None:
+            shared = self._shared.read(model_name)
+            if shared is not None:
+                return shared
+
+        return self._versions.get(model_name, (0, self._started))
+
+    def _bump(self, model_name: str) -> None:
+        """Gives a new version to a model after a write"""
+        self._versions[model_name] = (next(self._writes), time())
+
+        if self._shared is not None:
+            bumped = self._shared.bump(model_name)
+
+            # Behind another process, the next sync catches up
+            if bumped and self._seen.get(model_name) == bumped[0]:
+                self._seen[model_name] = bumped[1]
+
+    def _record(
+        self, op: str, objs: list, fields: set[str] | None = None
+    ) -> None:
+        """Appends the changes of a write to the change log"""
+        ids: dict[str, list[str]] = {}
+
+        for obj in objs:
+            ids.setdefault(obj.__class__.__name__.lower(), []).append(obj.id)
+
+        for model_name, model_ids in ids.items():
+            self.changes.append(model_name, op, model_ids, fields)
+
+    @property
+    def sees_every_write(self) -> bool:
+        """
+        Whether the versions change on every write of the data, also
+        those of the other processes: they are shared by the processes
+        of the server, or the data lives in this process only
+        """
+        return self._shared is not None or self._private
+
+    def share_versions(self, shared: SharedVersions) -> None:
+        """
+        Keeps the versions in a table shared by the processes of the
+        server, to see the writes of the others on `sync`. Call it
+        holding the lock of the table, once the data is loaded
+        """
+        self._shared = shared
+        self.epoch = shared.epoch
+        self._seen = shared.snapshot()
+
+    def sync(self) -> list[str]:
+        """
+        Catches up with the writes of the other processes sharing the
+        versions, reloading the models they changed, which are returned.
+        Only reads the shared table when nothing changed
+        """
+        if self._shared is None or self._shared.snapshot() == self._seen:
+            return []
+
+        with self._shared.lock():
+            versions = self._shared.snapshot()
+            stale = [
+                model
+                for model, version in versions.items()
+                if self._seen.get(model) != version
+            ]
+
+            if stale:
+                self._refresh(stale)
+            self._seen = versions
+
+        return stale
+
+    def _refresh(self, model_names: list[str]) -> None:
+        """
+        Reloads models written by other processes, repositories keeping
+        their data in memory should override it
+        """
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        Holds the lock of the shared versions during a write, after
+        catching up with the other processes, so a write never starts
+        from stale data nor interleaves with the writes of the others
+        """
+        if self._shared is None:
+            yield
+            return
+
+        with self._shared.lock():
+            self.sync()
+            yield
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """
+        Holds off the other writers while the caller reads, changes and
+        saves back some objects, so its writes start from current data.
+        This holds the lock of the shared versions, if any, repositories
+        with writers of their own in this process should override it
+        """
+        with self._writing():
+            yield
+
     @abstractmethod
     def reload(self) -> None:
         """Reload data to the repository"""
@@ -14,18 +230,223 @@ class Repository(ABC):
     def get_all(self, model_name: str) -> list:
         """Get all objects of a model"""
 
+    def iter_all(self, model_name: str) -> Iterator:
+        """
+        Iterate over all objects of a model
+
+        Used to stream the list endpoints, repositories that can fetch
+        the objects in batches should override this method
+        """
+        yield from self.get_all(model_name)
+
     @abstractmethod
     def get(self, model_name: str, id: str) -> None:
         """Get an object by id"""
 
+    def detach(self, obj):
+        """
+        What a CachingRepository keeps of an object across requests,
+        None when it can't be kept. The in-process repositories keep
+        the object itself
+        """
+        return obj
+
+    def attach(self, model_name: str, kept):
+        """Object served by a CachingRepository from what detach kept"""
+        return kept
+
+    @abstractmethod
+    def page(self, model_name: str, after: str | None, limit: int):
+        """
+        Get up to limit objects of a model ordered by id, starting after
+        the id given as cursor. Returns the objects and the cursor of the
+        next page, None on the last page
+        """
+
+    def count(self, model_name: str) -> int:
+        """Number of objects of a model"""
+        return len(self.get_all(model_name))
+
     @abstractmethod
-    def save(self, obj) -> None:
-        """Save an object"""
+    def save(self, obj, durable: bool = False) -> None:
+        """
+        Save an object
+
+        Repositories that write to disk in the background only wait
+        for the write to complete when durable is True
+        """
+
+    def save_many(self, objs: list, durable: bool = False) -> list:
+        """
+        Save several objects at once
+
+        Returns, for every object, None when it was saved or the error
+        that prevented it. This fallback saves them one by one,
+        repositories that can write them in one batch should override it
+        """
+        errors = []
+
+        for obj in objs:
+            try:
+                self.save(obj, durable=durable)
+                errors.append(None)
+            except Exception as e:
+                errors.append(e)
+
+        return errors
 
     @abstractmethod
-    def update(self, obj) -> None:
-        """Update an object"""
+    def update(
+        self, obj, durable: bool = False, fields: set[str] | None = None
+    ) -> None:
+        """
+        Update an object
+
+        fields names the fields the update changed, repositories writing
+        a change log only record those, None when they are unknown
+        """
 
     @abstractmethod
-    def delete(self, obj) -> bool:
+    def delete(self, obj, durable: bool = False) -> bool:
         """Delete an object"""
+
+    def find(self, model_name: str, **equals) -> list:
+        """
+        Get all objects of a model whose fields equal the given values
+
+        This fallback scans every object, repositories that can
+        use an index should override this method
+        """
+        return [
+            obj
+            for obj in self.get_all(model_name)
+            if all(
+                getattr(obj, key, None) == value
+                for key, value in equals.items()
+            )
+        ]
+
+    def find_in(self, model_name: str, field: str, values) -> list:
+        """
+        Get all objects of a model whose field is one of the values
+
+        This fallback scans every object, repositories that can
+        use an index should override this method
+        """
+        values = set(values)
+
+        return [
+            obj
+            for obj in self.get_all(model_name)
+            if getattr(obj, field, None) in values
+        ]
+
+    def find_range(self, model_name: str, **ranges: tuple) -> list:
+        """
+        Get all objects of a model, ordered by id, whose fields are
+        inside the given `(low, high)` ranges, a None bound is unbounded
+
+        This fallback scans every object, repositories that can
+        use a sorted index should override this method
+        """
+        return sorted(
+            (
+                obj
+                for obj in self.get_all(model_name)
+                if in_ranges(obj, ranges)
+            ),
+            key=lambda obj: obj.id,
+        )
+
+    def find_within(
+        self,
+        model_name: str,
+        box: tuple[float, float, float, float],
+    ) -> list:
+        """
+        Get all objects of a model whose latitude and longitude are
+        inside the `(south, west, north, east)` box
+
+        This fallback scans every object, repositories that can
+        use a spatial index should override this method. The objects
+        without a numeric position are left out
+        """
+        box = tuple(float(bound) for bound in box)
+
+        return [
+            obj
+            for obj in self.get_all(model_name)
+            if number(obj, "latitude") is not None
+            and number(obj, "longitude") is not None
+            and in_box(float(obj.latitude), float(obj.longitude), box)
+        ]
+
+    def search(self, model_name: str, query: str, limit: int) -> list:
+        """
+        Get the limit best `(object, score)` pairs of a model for a
+        full-text query over its SEARCH_FIELDS, best first
+
+        The query is made of words and "quoted phrases", an object
+        matches when its fields contain all of them. This fallback
+        indexes every object on each call, repositories that keep a
+        text index should override this method
+        """
+        index = TextIndex(*SEARCH_FIELDS[model_name])
+
+        for obj in self.get_all(model_name):
+            index.add(obj)
+
+        return index.search(*parse_query(query), limit)
+
+    def select(
+        self,
+        model_name: str,
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+        sort: str | None = None,
+    ) -> list:
+        """
+        Get the objects of a model whose fields are inside the `(low,
+        high)` ranges and, when given, whose position is inside the
+        `(south, west, north, east)` box. They are ordered by the sort
+        field (descending for `-field`) then by id, the objects without
+        a value for the sort field last
+
+        This fallback reads the objects returned by find_within or
+        find_range, repositories that can filter and sort the fields
+        as columns should override it
+        """
+        if box is None:
+            objs = self.find_range(model_name, **ranges)
+        else:
+            objs = sorted(
+                (
+                    obj
+                    for obj in self.find_within(model_name, box)
+                    if in_ranges(obj, ranges)
+                ),
+                key=lambda obj: obj.id,
+            )
+
+        return sort_by(objs, *sort_key(sort))
+
+    def aggregate(
+        self,
+        model_name: str,
+        fields: tuple[str, ...],
+        ranges: dict[str, tuple],
+        box: tuple[float, float, float, float] | None = None,
+    ) -> dict:
+        """
+        Count the objects of a model selected by the ranges and the box,
+        and get the min, max and mean (`avg`) of each field over them,
+        None when no object has a value
+
+        This fallback reads the selected objects, repositories that
+        can aggregate the fields as columns should override it
+        """
+        return summarize(self.select(model_name, ranges, box), fields)
+
+    def find_one(self, model_name: str, **equals):
+        """Get the first object of a model whose fields equal the values"""
+        return next(iter(self.find(model_name, **equals)), None)
@@ -0,0 +1,173 @@
+"""
+Write versions of the models shared by the processes of a server
+
+Under gunicorn every worker holds its own repository, a write handled
+by one worker is not seen by the memory of the others. The
+SharedVersions table is a small file every worker maps in memory: a
+header with the epoch of the table, then a slot per model holding the
+version and the time of its last write. Reading it is a few bytes read
+from the mapping, without a system call, so the workers check it on
+each request and only reload the models whose version moved.
+
+Bumping a version and the writes of the repositories holding their data
+in memory run under an exclusive lock of the file (flock), so the
+workers write one at a time, each after catching up with the others.
+"""
+
+from contextlib import contextmanager
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from time import time
+from typing import Iterable, Iterator
+import uuid
+
+# Magic and epoch
+HEADER = struct.Struct("<8s8s")
+# Version and time of the last write of a model
+SLOT = struct.Struct("<Qd")
+
+
+class MappedFile:
+    """
+    A file of a fixed size mapped by every process using it, starting
+    with the magic of its layout and an epoch. It is created with a new
+    epoch when missing or made for another layout
+    """
+
+    magic: bytes
+    filename: str
+    epoch: str
+
+    def __init__(self, filename: str, size: int) -> None:
+        """Maps the file, creating it when missing"""
+        self.filename = filename
+
+        self.__size = size
+        self.__lock = threading.RLock()
+        self.__depth = 0
+        self.__pid: int | None = None
+        self.__fd = -1
+        self.__map: mmap.mmap | None = None
+
+        self.epoch = HEADER.unpack_from(self._mapping())[1].decode()
+
+    def __open(self) -> None:
+        """
+        Opens and maps the file, a forked process opens its own since
+        the lock of a file is shared by the descriptors copied by a fork
+        """
+        if self.__map is not None:
+            self.__map.close()
+            os.close(self.__fd)
+
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        try:
+            header = os.pread(fd, HEADER.size, 0)
+
+            if (
+                os.fstat(fd).st_size != self.__size
+                or header[:len(self.magic)] != self.magic
+            ):
+                # Missing, or made for another layout, start a new epoch
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, self.__size)
+                epoch = uuid.uuid4().hex[:8].encode()
+                os.pwrite(fd, HEADER.pack(self.magic, epoch), 0)
+
+            self.__map = mmap.mmap(fd, self.__size)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+        self.__fd = fd
+        self.__pid = os.getpid()
+
+    def _mapping(self) -> mmap.mmap:
+        """Mapping of the file in this process"""
+        if self.__pid != os.getpid():
+            with self.__lock:
+                if self.__pid != os.getpid():
+                    self.__open()
+
+        return self.__map
+
+    @contextmanager
+    def lock(self) -> Iterator[mmap.mmap]:
+        """
+        Holds the exclusive lock of the file, against the other threads
+        and the other processes, and gives its mapping. It can be taken
+        again by its holder
+        """
+        mapping = self._mapping()
+
+        with self.__lock:
+            if self.__depth == 0:
+                fcntl.flock(self.__fd, fcntl.LOCK_EX)
+            self.__depth += 1
+
+            try:
+                yield mapping
+            finally:
+                self.__depth -= 1
+                if self.__depth == 0:
+                    fcntl.flock(self.__fd, fcntl.LOCK_UN)
+
+
+class SharedVersions(MappedFile):
+    """
+    Table of the write versions of the models, in a file mapped by every
+    process using it, created with a new epoch when missing
+    """
+
+    magic = b"HBNBVER1"
+    models: tuple[str, ...]
+
+    def __init__(self, filename: str, models: Iterable[str]) -> None:
+        """Maps the table of the file, creating it when missing"""
+        self.models = tuple(models)
+        self.__offsets = {
+            model: HEADER.size + i * SLOT.size
+            for i, model in enumerate(self.models)
+        }
+
+        super().__init__(
+            filename, HEADER.size + SLOT.size * len(self.models)
+        )
+
+    def read(self, model: str) -> tuple[int, float] | None:
+        """Version and time of the last write of a model, None if unknown"""
+        offset = self.__offsets.get(model)
+
+        if offset is None:
+            return None
+
+        return SLOT.unpack_from(self._mapping(), offset)
+
+    def snapshot(self) -> dict[str, int]:
+        """Version of every model"""
+        mapping = self._mapping()
+
+        return {
+            model: SLOT.unpack_from(mapping, offset)[0]
+            for model, offset in self.__offsets.items()
+        }
+
+    def bump(self, model: str) -> tuple[int, int] | None:
+        """
+        Gives a new version to a model after a write, returns its
+        previous and new versions, None if the model is unknown
+        """
+        offset = self.__offsets.get(model)
+
+        if offset is None:
+            return None
+
+        with self.lock() as mapping:
+            previous = SLOT.unpack_from(mapping, offset)[0]
+            SLOT.pack_into(mapping, offset, previous + 1, time())
+
+        return previous, previous + 1
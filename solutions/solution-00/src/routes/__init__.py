@@ -1,8 +1,20 @@
 """ """
-from flask import jsonify
+from collections import OrderedDict
+from datetime import datetime, timezone
+import threading
+from typing import Iterable, Iterator
+from flask import Response, current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt
 from functools import wraps
 
+from utils.constants import RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_MAX_BYTES
+
+# URL -> (ETag, body, status, headers) of the last conditional responses,
+# only kept when the repository versions see every write: the versions
+# of a single process miss the writes of the other workers
+_responses: OrderedDict[str, tuple] = OrderedDict()
+_responses_lock = threading.Lock()
+
 
 def admin_required(fn):
     @wraps(fn)
@@ -14,3 +26,96 @@ def admin_required(fn):
             return jsonify({ "message": "Forbidden!" }), 403
         return fn(*args, **kwargs)
     return wrapper
+
+
+def _store(key: str, entry: tuple) -> None:
+    """Keeps a response, dropping the least recently used ones"""
+    with _responses_lock:
+        _responses[key] = entry
+        _responses.move_to_end(key)
+
+        while len(_responses) > RESPONSE_CACHE_ENTRIES:
+            _responses.popitem(last=False)
+
+
+def _collect(
+    chunks: Iterable, key: str, etag: str, headers: list
+) -> Iterator:
+    """
+    Yields the chunks of a streamed body and keeps the whole body once
+    sent, unless it grows beyond RESPONSE_CACHE_MAX_BYTES
+    """
+    parts, size = [], 0
+
+    for chunk in chunks:
+        yield chunk
+
+        if size <= RESPONSE_CACHE_MAX_BYTES:
+            chunk = chunk.encode() if isinstance(chunk, str) else chunk
+            size += len(chunk)
+            parts.append(chunk)
+
+    if size <= RESPONSE_CACHE_MAX_BYTES:
+        _store(key, (etag, b"".join(parts), 200, headers))
+
+
+def conditional(*models: str):
+    """
+    Makes a GET route conditional on the versions of the models it reads
+
+    The response has an ETag and a Last-Modified built from the
+    repository versions of the models. A request whose If-None-Match is
+    still current gets a 304 without calling the route. When the
+    versions see the writes of every worker, a response is served again
+    from memory while the versions of its models don't change.
+    If-Modified-Since is ignored, two writes in the same second
+    share their Last-Modified
+    """
+    def decorator(fn):
+        """Wraps the route"""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            """Answers from the versions or the cache, else calls fn"""
+            from src.persistence import repo
+
+            versions = [repo.version(model) for model in models]
+            etag = f"{repo.epoch}-" + ".".join(str(v) for v, _ in versions)
+            modified = datetime.fromtimestamp(
+                max(t for _, t in versions), timezone.utc
+            ).replace(microsecond=0)
+
+            fresh = request.if_none_match.contains(etag)
+
+            key = request.full_path
+            shared = repo.sees_every_write
+            cached = _responses.get(key) if shared else None
+
+            if fresh:
+                response = Response(status=304)
+            elif cached and cached[0] == etag:
+                _, body, status, headers = cached
+                response = Response(body, status, headers)
+            else:
+                response = current_app.make_response(fn(*args, **kwargs))
+
+                if response.status_code != 200:
+                    return response
+
+                headers = list(response.headers)
+
+                if shared and response.is_streamed:
+                    response.response = _collect(
+                        response.response, key, etag, headers
+                    )
+                elif shared and (
+                    response.content_length <= RESPONSE_CACHE_MAX_BYTES
+                ):
+                    _store(key, (etag, response.get_data(), 200, headers))
+
+            response.set_etag(etag)
+            response.last_modified = modified
+            response.cache_control.no_cache = True
+
+            return response
+        return wrapper
+    return decorator
@@ -7,16 +7,22 @@ from src.controllers.amenities import (
     create_amenity,
     delete_amenity,
     get_amenity_by_id,
+    get_amenity_places,
     get_amenities,
     update_amenity,
 )
-from src.routes import admin_required
+from src.routes import admin_required, conditional
 
 amenities_bp = Blueprint("amenities", __name__, url_prefix="/amenities")
 
-amenities_bp.route("/", methods=["GET"])(get_amenities)
+amenities_bp.route("/", methods=["GET"])(
+    conditional("amenity")(get_amenities))
 amenities_bp.route("/", methods=["POST"])(admin_required(create_amenity))
 
-amenities_bp.route("/<amenity_id>", methods=["GET"])(get_amenity_by_id)
+amenities_bp.route("/<amenity_id>", methods=["GET"])(
+    conditional("amenity")(get_amenity_by_id))
 amenities_bp.route("/<amenity_id>", methods=["PUT"])(admin_required(update_amenity))
 amenities_bp.route("/<amenity_id>", methods=["DELETE"])(admin_required(delete_amenity))
+amenities_bp.route("/<amenity_id>/places", methods=["GET"])(
+    conditional("amenity", "placeamenity", "place", "ratingstats")(
+        get_amenity_places))
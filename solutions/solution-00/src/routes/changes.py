@@ -0,0 +1,10 @@
+"""
+This module contains the routes for the change feed endpoint
+"""
+
+from flask import Blueprint
+from src.controllers.changes import get_changes
+
+changes_bp = Blueprint("changes", __name__, url_prefix="/changes")
+
+changes_bp.route("/", methods=["GET"])(get_changes)
@@ -8,9 +8,13 @@ from src.controllers.countries import (
     get_country_by_code,
     get_country_cities,
 )
+from src.routes import conditional
 
 countries_bp = Blueprint("countries", __name__, url_prefix="/countries")
 
-countries_bp.route("/", methods=["GET"])(get_countries)
-countries_bp.route("/<code>", methods=["GET"])(get_country_by_code)
-countries_bp.route("/<code>/cities", methods=["GET"])(get_country_cities)
+countries_bp.route("/", methods=["GET"])(
+    conditional("country")(get_countries))
+countries_bp.route("/<code>", methods=["GET"])(
+    conditional("country")(get_country_by_code))
+countries_bp.route("/<code>/cities", methods=["GET"])(
+    conditional("country", "city")(get_country_cities))
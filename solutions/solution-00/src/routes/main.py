@@ -5,6 +5,7 @@ from flask_jwt_extended import jwt_required
 from flask import Blueprint
 from src.controllers.main import (
     post_login,
+    get_cache_stats,
     get_protected,
     get_restricted
 )
@@ -14,4 +15,5 @@ main_bp = Blueprint("main", __name__, url_prefix="/")
 
 main_bp.route("/login", methods=["POST"])(post_login)
 main_bp.route("/protected", methods=["GET"])(jwt_required()(get_protected))
-main_bp.route("/restricted", methods=["GET"])(admin_required(get_restricted))
\ No newline at end of file
+main_bp.route("/restricted", methods=["GET"])(admin_required(get_restricted))
+main_bp.route("/cache/stats", methods=["GET"])(admin_required(get_cache_stats))
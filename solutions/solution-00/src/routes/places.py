@@ -3,22 +3,54 @@ This module contains the routes for the places blueprint
 """
 from flask_jwt_extended import jwt_required
 from flask import Blueprint
+from src.controllers.amenities import (
+    add_place_amenities_bulk,
+    add_place_amenity,
+    delete_place_amenities_bulk,
+    delete_place_amenity,
+    get_place_amenities,
+)
 from src.controllers.places import (
     create_place,
+    create_places_bulk,
     delete_place,
     get_place_by_id,
+    get_place_stats,
     get_places,
+    get_places_stats,
     update_place,
 )
+from src.routes import conditional
 
 places_bp = Blueprint("places", __name__, url_prefix="/places")
 
-places_bp.route("/", methods=["GET"])(get_places)
+places_bp.route("/", methods=["GET"])(
+    conditional("place", "ratingstats")(get_places))
 places_bp.route("/", methods=["POST"])(
     jwt_required()(create_place))
 
-places_bp.route("/<place_id>", methods=["GET"])(get_place_by_id)
+places_bp.route("/stats", methods=["GET"])(
+    conditional("place")(get_places_stats))
+
+places_bp.route("/bulk", methods=["POST"])(
+    jwt_required()(create_places_bulk))
+
+places_bp.route("/<place_id>", methods=["GET"])(
+    conditional("place", "ratingstats")(get_place_by_id))
+places_bp.route("/<place_id>/stats", methods=["GET"])(
+    conditional("place", "ratingstats")(get_place_stats))
 places_bp.route("/<place_id>", methods=["PUT"])(
     jwt_required()(update_place))
 places_bp.route("/<place_id>", methods=["DELETE"])(
     jwt_required()(delete_place))
+
+places_bp.route("/<place_id>/amenities", methods=["GET"])(
+    conditional("place", "placeamenity", "amenity")(get_place_amenities))
+places_bp.route("/<place_id>/amenities", methods=["POST"])(
+    jwt_required()(add_place_amenity))
+places_bp.route("/<place_id>/amenities/bulk", methods=["POST"])(
+    jwt_required()(add_place_amenities_bulk))
+places_bp.route("/<place_id>/amenities/bulk", methods=["DELETE"])(
+    jwt_required()(delete_place_amenities_bulk))
+places_bp.route("/<place_id>/amenities/<amenity_id>", methods=["DELETE"])(
+    jwt_required()(delete_place_amenity))
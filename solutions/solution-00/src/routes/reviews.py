@@ -6,6 +6,7 @@ from flask_jwt_extended import jwt_required
 from flask import Blueprint
 from src.controllers.reviews import (
     create_review,
+    create_reviews_bulk,
     delete_review,
     get_reviews_from_place,
     get_reviews_from_user,
@@ -13,17 +14,24 @@ from src.controllers.reviews import (
     get_reviews,
     update_review,
 )
+from src.routes import conditional
 
 reviews_bp = Blueprint("reviews", __name__)
 
 reviews_bp.route("/places/<place_id>/reviews", methods=["POST"])(
     jwt_required()(create_review))
-reviews_bp.route("/places/<place_id>/reviews")(get_reviews_from_place)
-reviews_bp.route("/users/<user_id>/reviews")(get_reviews_from_user)
+reviews_bp.route("/places/<place_id>/reviews")(
+    conditional("place", "review")(get_reviews_from_place))
+reviews_bp.route("/users/<user_id>/reviews")(
+    conditional("user", "review")(get_reviews_from_user))
 
-reviews_bp.route("/reviews", methods=["GET"])(get_reviews)
+reviews_bp.route("/reviews", methods=["GET"])(
+    conditional("review")(get_reviews))
+reviews_bp.route("/reviews/bulk", methods=["POST"])(
+    jwt_required()(create_reviews_bulk))
 
-reviews_bp.route("/reviews/<review_id>", methods=["GET"])(get_review_by_id)
+reviews_bp.route("/reviews/<review_id>", methods=["GET"])(
+    conditional("review")(get_review_by_id))
 reviews_bp.route("/reviews/<review_id>", methods=["PUT"])(
     jwt_required()(update_review))
 reviews_bp.route("/reviews/<review_id>", methods=["DELETE"])(
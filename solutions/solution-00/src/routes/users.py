@@ -4,8 +4,10 @@ This module contains the routes for the users endpoints.
 
 from flask import Blueprint
 from flask_jwt_extended import jwt_required
+from src.routes import admin_required
 from src.controllers.users import (
     create_user,
+    create_users_bulk,
     delete_user,
     get_user_by_id,
     get_users,
@@ -17,6 +19,8 @@ users_bp = Blueprint("users", __name__, url_prefix="/users")
 users_bp.route("/", methods=["GET"])(get_users)
 users_bp.route("/", methods=["POST"])(create_user)
 
+users_bp.route("/bulk", methods=["POST"])(admin_required(create_users_bulk))
+
 users_bp.route("/<user_id>", methods=["GET"])(get_user_by_id)
 users_bp.route("/<user_id>", methods=["PUT"])(jwt_required()(update_user))
 users_bp.route("/<user_id>", methods=["DELETE"])(jwt_required()(delete_user))
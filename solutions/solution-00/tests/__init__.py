@@ -1 +1,8 @@
 """  """
+import os
+
+from utils.constants import REPOSITORY_ENV_VAR
+
+# The tests build their own repositories, the global one selected
+# in src.persistence must not need a database or an app context
+os.environ[REPOSITORY_ENV_VAR] = "memory"
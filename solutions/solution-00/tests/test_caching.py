@@ -0,0 +1,171 @@
+""" Checks the read-through cache in front of the repositories"""
+
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.persistence.caching import CachingRepository
+from src.persistence.memory import MemoryRepository
+
+
+class Clock:
+    """Time of the caches, moved forward by the tests"""
+
+    def __init__(self) -> None:
+        """Starts at 0"""
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        """Current time"""
+        return self.now
+
+
+class TestCaching(unittest.TestCase):
+    """CachingRepository around a MemoryRepository"""
+
+    def setUp(self):
+        """Wraps an empty repository in a small cache"""
+        self.clock = Clock()
+        self.inner = MemoryRepository()
+        self.repo = CachingRepository(
+            self.inner,
+            {
+                "city": {"size": 2, "ttl": 10},
+            },
+            negative_ttl=1,
+            clock=self.clock,
+        )
+
+    def reads(self, method: str) -> mock.MagicMock:
+        """Counts the calls of a method of the wrapped repository"""
+        patcher = mock.patch.object(
+            self.inner, method, wraps=getattr(self.inner, method)
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_hits_and_eviction(self):
+        """The least recently used object is evicted past the size"""
+        cities = [City(f"City {i}", "UY") for i in range(3)]
+        self.repo.save_many(cities)
+        get = self.reads("get")
+
+        for city in cities[:2]:
+            self.assertIs(self.repo.get("city", city.id), city)
+        self.repo.get("city", cities[0].id)
+        self.repo.get("city", cities[2].id)
+        self.repo.get("city", cities[0].id)
+        self.repo.get("city", cities[1].id)
+
+        self.assertEqual(get.call_count, 4)
+        self.assertEqual(
+            self.repo.stats()["city"],
+            {"entries": 2, "size": 2, "hits": 2, "negative_hits": 0,
+             "misses": 4, "evictions": 2, "expirations": 0},
+        )
+
+    def test_expiration(self):
+        """Objects are read again once their TTL ends"""
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+        get = self.reads("get")
+
+        self.repo.get("city", city.id)
+        self.clock.now = 9
+        self.repo.get("city", city.id)
+        self.clock.now = 10
+        self.repo.get("city", city.id)
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(self.repo.stats()["city"]["expirations"], 1)
+
+    def test_negative_caching(self):
+        """Missing ids are remembered until saved or expired"""
+        get = self.reads("get")
+
+        self.assertIsNone(self.repo.get("city", "c1"))
+        self.assertIsNone(self.repo.get("city", "c1"))
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(self.repo.stats()["city"]["negative_hits"], 1)
+
+        city = City("Montevideo", "UY", id="c1")
+        self.repo.save(city)
+        self.assertIs(self.repo.get("city", "c1"), city)
+
+        self.repo.delete(city)
+        self.assertIsNone(self.repo.get("city", "c1"))
+        self.clock.now = 1
+        self.assertIsNone(self.repo.get("city", "c1"))
+        self.assertEqual(get.call_count, 4)
+
+    def test_find_in_reads_missing_ids(self):
+        """find_in by id only reads the ids that aren't cached"""
+        cities = [City(f"City {i}", "UY") for i in range(2)]
+        self.repo.save_many(cities)
+        self.repo.get("city", cities[0].id)
+        find_in = self.reads("find_in")
+
+        ids = [city.id for city in cities] + ["x"]
+        found = self.repo.find_in("city", "id", ids)
+
+        self.assertCountEqual(found, cities)
+        find_in.assert_called_once()
+        self.assertCountEqual(find_in.call_args.args[2], [cities[1].id, "x"])
+        self.assertIsNone(self.repo.get("city", "x"))
+
+    def test_read_racing_a_write_is_not_kept(self):
+        """An object read before a write isn't cached after it"""
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+        inner_get = self.inner.get
+
+        def get_then_write(model_name, obj_id):
+            """Another thread updates the object during the read"""
+            obj = inner_get(model_name, obj_id)
+            self.repo.update(obj)
+            return obj
+
+        with mock.patch.object(self.inner, "get", get_then_write):
+            self.repo.get("city", city.id)
+
+        self.assertEqual(self.repo.stats()["city"]["entries"], 0)
+
+    def test_objects_not_detached_are_not_kept(self):
+        """Objects the repository can't detach are read every time"""
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+        get = self.reads("get")
+
+        with mock.patch.object(self.inner, "detach", return_value=None):
+            self.repo.get("city", city.id)
+            self.repo.get("city", city.id)
+            self.assertIsNone(self.repo.get("city", "c1"))
+            self.assertIsNone(self.repo.get("city", "c1"))
+
+        self.assertEqual(get.call_count, 3)
+
+    def test_writes_pass_durable_by_keyword(self):
+        """durable reaches the repositories taking other flags first"""
+        city = City("Montevideo", "UY")
+        save = self.reads("save")
+
+        self.repo.save(city, durable=True)
+
+        save.assert_called_once_with(city, durable=True)
+
+    def test_other_methods_pass_through(self):
+        """Everything else is answered by the wrapped repository"""
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+        get_all = self.reads("get_all")
+
+        self.assertEqual(self.repo.get_all("city"), [city])
+        get_all.assert_called_once()
+        self.assertEqual(self.repo.count("city"), 1)
+        self.assertEqual(self.repo.epoch, self.inner.epoch)
+        self.assertEqual(self.repo.version("city"),
+                         self.inner.version("city"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+""" Checks the change log of the repositories and its feed"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from src import register_handlers
+from src.models.city import City
+from src.persistence.changes import ChangeLog, SharedChangeLog
+from src.persistence.memory import MemoryRepository
+from src.routes.changes import changes_bp
+from utils.constants import MODEL_NAMES
+
+
+class ChangeLogMixin:
+    """since of a log keeping the last 3 changes"""
+
+    def log(self):
+        """An empty log"""
+        raise NotImplementedError
+
+    def test_since(self):
+        """The changes after a sequence number, oldest first"""
+        log = self.log()
+        self.assertEqual(log.since(0, 10), [])
+
+        log.append("city", "save", ["c1", "c2"])
+        log.append("city", "update", ["c1"], {"name"})
+
+        self.assertEqual(log.last(), 3)
+        self.assertEqual(log.since(1, 10), [
+            {"seq": 2, "model": "city", "id": "c2", "op": "save",
+             "fields": None},
+            {"seq": 3, "model": "city", "id": "c1", "op": "update",
+             "fields": ["name"]},
+        ])
+        self.assertEqual([c["seq"] for c in log.since(0, 2)], [1, 2])
+
+    def test_no_fields(self):
+        """An update of no field isn't read back as one of every field"""
+        log = self.log()
+        log.append("city", "update", ["c1"], set())
+        log.append("city", "update", ["c2"])
+
+        self.assertEqual([c["fields"] for c in log.since(0, 10)], [[], None])
+
+    def test_retention(self):
+        """The cursors older than the kept changes, or unknown, expire"""
+        log = self.log()
+        log.append("place", "save", ["p1", "p2", "p3", "p4"])
+
+        self.assertIsNone(log.since(0, 10))
+        self.assertEqual([c["id"] for c in log.since(1, 10)],
+                         ["p2", "p3", "p4"])
+        self.assertEqual(log.since(4, 10), [])
+        self.assertIsNone(log.since(5, 10))
+
+
+class TestChangeLog(ChangeLogMixin, unittest.TestCase):
+    """ChangeLog of a process"""
+
+    def log(self):
+        """An empty log"""
+        return ChangeLog(3)
+
+
+class TestSharedChangeLog(ChangeLogMixin, unittest.TestCase):
+    """SharedChangeLog in a file"""
+
+    def log(self):
+        """An empty log in a temporary directory"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "changes")
+
+        return SharedChangeLog(self.filename, MODEL_NAMES, 3)
+
+    def test_shared(self):
+        """Every log mapping the file sees the same changes"""
+        log = self.log()
+        other = SharedChangeLog(self.filename, MODEL_NAMES, 3)
+
+        log.append("review", "delete", ["r1"])
+        other.append("review", "save", ["r2"])
+
+        self.assertEqual(other.epoch, log.epoch)
+        self.assertEqual([c["id"] for c in log.since(0, 10)], ["r1", "r2"])
+
+    def test_long_fields(self):
+        """Fields too long for a slot are left out"""
+        log = self.log()
+        log.append("place", "update", ["p1"], {f"f{i}" for i in range(50)})
+
+        self.assertIsNone(log.since(0, 1)[0]["fields"])
+
+
+class TestRepositoryChanges(unittest.TestCase):
+    """The writes of a repository and GET /changes"""
+
+    def setUp(self):
+        """Serves the feed of an empty repository"""
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        app.register_blueprint(changes_bp)
+        register_handlers(app)
+        self.client = app.test_client()
+
+    def test_writes_are_recorded(self):
+        """Saves, updates and deletes append their changes"""
+        since = self.repo.changes.last()
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+        City.update(city.id, {"name": "Salto"})
+        City.update(city.id, {"name": "Salto"})
+        self.repo.delete(city)
+
+        self.assertEqual(
+            [(c["op"], c["fields"])
+             for c in self.repo.changes.since(since, 10)],
+            [("save", None), ("update", ["name"]), ("delete", None)],
+        )
+
+    def test_feed(self):
+        """The feed pages the changes and expires the unknown cursors"""
+        since = self.repo.changes.last()
+        cities = [City(f"City {i}", "UY") for i in range(3)]
+        self.repo.save_many(cities)
+
+        response = self.client.get(f"/changes/?since={since}&limit=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["id"] for c in response.json],
+                         [city.id for city in cities[:2]])
+
+        cursor = response.headers["X-Next-Cursor"]
+        epoch = response.headers["X-Changes-Epoch"]
+        response = self.client.get(f"/changes/?since={cursor}&epoch={epoch}")
+        self.assertEqual([c["id"] for c in response.json], [cities[2].id])
+
+        self.assertEqual(
+            self.client.get(f"/changes/?since={cursor}&epoch=x").status_code,
+            410,
+        )
+        self.assertEqual(
+            self.client.get("/changes/?since=100").status_code, 410
+        )
+        self.assertEqual(
+            self.client.get("/changes/?limit=0").status_code, 400
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
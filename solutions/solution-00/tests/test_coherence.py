@@ -0,0 +1,168 @@
+""" Checks that workers sharing their versions see each other's writes"""
+
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+
+def serve(kind: str, cached: bool, conn) -> None:
+    """
+    Runs a worker: a repository sharing its versions in the current
+    directory, catching up before each command like before a request
+    """
+    from src.models.city import City
+    from src.persistence.caching import CachingRepository
+    from src.persistence.file import FileRepository
+    from src.persistence.pickled import PickleRepository
+    from src.persistence.versions import SharedVersions
+    from utils.constants import MODEL_NAMES
+
+    shared = SharedVersions("versions", MODEL_NAMES)
+
+    with shared.lock():
+        if kind == "pickle":
+            repo = PickleRepository()
+        else:
+            repo = FileRepository(journal=kind == "journal")
+        repo.share_versions(shared)
+
+    if cached:
+        repo = CachingRepository(repo)
+
+    while (command := conn.recv()) is not None:
+        repo.sync()
+        op, *args = command
+
+        if op == "create":
+            for city_id in args:
+                repo.save(City(f"City {city_id}", "UY", id=city_id))
+            result = None
+        elif op == "rename":
+            city = repo.get("city", args[0])
+            city.name = args[1]
+            result = repo.update(city) is not None
+        elif op == "delete":
+            result = repo.delete(repo.get("city", args[0]))
+        elif op == "get":
+            city = repo.get("city", args[0])
+            result = city.name if city else None
+        elif op == "ids":
+            result = sorted(city.id for city in repo.get_all("city"))
+        else:
+            result = repo.version("city")
+
+        conn.send(result)
+
+
+class Worker:
+    """A process serving a repository to the test"""
+
+    def __init__(self, kind: str, cached: bool = False) -> None:
+        """Starts the worker in the current directory"""
+        context = multiprocessing.get_context("spawn")
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=serve, args=(kind, cached, child), daemon=True
+        )
+        self.process.start()
+
+    def send(self, *command):
+        """Sends a command without waiting for its result"""
+        self.conn.send(command)
+
+    def recv(self):
+        """Waits for the result of the last command"""
+        return self.conn.recv()
+
+    def __call__(self, *command):
+        """Runs a command and returns its result"""
+        self.send(*command)
+        return self.recv()
+
+    def stop(self) -> None:
+        """Stops the worker"""
+        self.conn.send(None)
+        self.process.join(10)
+
+
+class CoherenceMixin:
+    """Read-your-writes across two workers of a storage kind"""
+
+    kind: str
+    cached = False
+
+    def setUp(self):
+        """Starts two workers in an empty directory"""
+        cwd = os.getcwd()
+        directory = tempfile.TemporaryDirectory()
+        os.chdir(directory.name)
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, cwd)
+
+        self.first = self.worker()
+        self.second = self.worker(self.cached)
+
+    def worker(self, cached: bool = False) -> Worker:
+        """Starts a worker, stopped at the end of the test"""
+        worker = Worker(self.kind, cached)
+        self.addCleanup(worker.stop)
+        return worker
+
+    def test_read_your_writes(self):
+        """A write of a worker is read by the other at once"""
+        self.first("create", "c1")
+        self.assertEqual(self.second("get", "c1"), "City c1")
+
+        self.assertTrue(self.second("rename", "c1", "Montevideo"))
+        self.assertEqual(self.first("get", "c1"), "Montevideo")
+        self.assertEqual(self.second("get", "c1"), "Montevideo")
+
+        self.assertTrue(self.first("delete", "c1"))
+        self.assertIsNone(self.second("get", "c1"))
+        self.assertEqual(self.first("version"), self.second("version"))
+
+    def test_concurrent_writes_are_kept(self):
+        """Workers writing at once never overwrite each other's writes"""
+        first = [f"a{i:02d}" for i in range(20)]
+        second = [f"b{i:02d}" for i in range(20)]
+
+        self.first.send("create", *first)
+        self.second.send("create", *second)
+        self.first.recv()
+        self.second.recv()
+
+        expected = first + second
+        self.assertEqual(self.first("ids"), expected)
+        self.assertEqual(self.second("ids"), expected)
+        # Started afterwards, it only reads the files
+        self.assertEqual(self.worker()("ids"), expected)
+
+
+class TestFileCoherence(CoherenceMixin, unittest.TestCase):
+    """FileRepository rewriting its snapshot"""
+
+    kind = "file"
+
+
+class TestJournalCoherence(CoherenceMixin, unittest.TestCase):
+    """FileRepository appending to its journal"""
+
+    kind = "journal"
+
+
+class TestPickleCoherence(CoherenceMixin, unittest.TestCase):
+    """PickleRepository and its shards"""
+
+    kind = "pickle"
+
+
+class TestCachedCoherence(CoherenceMixin, unittest.TestCase):
+    """The second worker reads through a CachingRepository"""
+
+    kind = "pickle"
+    cached = True
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+""" Checks the conditional GET routes"""
+
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from src.models.city import City
+from src.persistence.memory import MemoryRepository
+from src.routes import conditional
+
+
+class TestConditional(unittest.TestCase):
+    """ETags, 304s and the response cache of `conditional`"""
+
+    def setUp(self):
+        """Serves the cities of an empty repository"""
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.calls = 0
+        app = Flask(__name__)
+
+        @app.get("/cities")
+        @conditional("city")
+        def cities():
+            """Names of the cities"""
+            self.calls += 1
+            return [city.name for city in self.repo.get_all("city")]
+
+        self.client = app.test_client()
+
+    def test_same_second_write(self):
+        """A write in the second of the last GET isn't answered by a 304"""
+        self.repo.save(City("Montevideo", "UY"))
+        response = self.client.get("/cities")
+
+        self.repo.save(City("Salto", "UY"))
+        response = self.client.get("/cities", headers={
+            "If-Modified-Since": response.headers["Last-Modified"],
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+
+    def test_etag(self):
+        """The ETag answers a 304 until a write"""
+        etag = self.client.get("/cities").headers["ETag"]
+        fresh = {"If-None-Match": etag}
+
+        self.assertEqual(self.client.get("/cities", headers=fresh).status_code,
+                         304)
+
+        self.repo.save(City("Montevideo", "UY"))
+        self.assertEqual(self.client.get("/cities", headers=fresh).status_code,
+                         200)
+
+    def test_response_cache(self):
+        """Only the versions seeing every write serve cached responses"""
+        for shared, calls in ((False, 2), (True, 1)):
+            self.calls = 0
+            with mock.patch.object(
+                type(self.repo), "sees_every_write", shared
+            ):
+                self.client.get("/cities?page=" + str(shared))
+                self.client.get("/cities?page=" + str(shared))
+
+            self.assertEqual(self.calls, calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+""" Checks that the updates only write the fields they change"""
+
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.models.place import Place
+from src.models.user import User
+from src.persistence.memory import MemoryRepository
+
+
+class TestDirtyFields(unittest.TestCase):
+    """update of the in-memory models"""
+
+    def setUp(self):
+        """Runs every test against an empty MemoryRepository"""
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.place = Place({
+            "name": "Loft", "host_id": "h", "city_id": "c",
+            "price_per_night": 100,
+        })
+        self.repo.save(self.place)
+
+        patcher = mock.patch.object(
+            self.repo, "update", wraps=self.repo.update
+        )
+        self.update = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_assign(self):
+        """assign only sets and returns the fields that differ"""
+        city = City("Montevideo", "UY")
+        encoded = city.to_json()
+
+        self.assertEqual(city.assign({"name": "Montevideo"}), set())
+        self.assertIs(city.to_json(), encoded)
+
+        self.assertEqual(
+            city.assign({"name": "Salto", "country_code": "UY"}), {"name"}
+        )
+        self.assertEqual(city.name, "Salto")
+
+    def test_changed_fields_are_passed(self):
+        """The repository is told which fields the update changed"""
+        Place.update(self.place.id, {"name": "Loft", "price_per_night": 120})
+
+        self.update.assert_called_once_with(
+            self.place, fields={"price_per_night"}
+        )
+        self.assertEqual(self.place.price_per_night, 120)
+
+    def test_no_op_update_is_skipped(self):
+        """An update changing nothing writes nothing"""
+        updated_at = self.place.updated_at
+        version = self.repo.version("place")
+
+        self.assertIs(
+            Place.update(self.place.id, {"price_per_night": 100}), self.place
+        )
+
+        self.update.assert_not_called()
+        self.assertEqual(self.place.updated_at, updated_at)
+        self.assertEqual(self.repo.version("place"), version)
+
+    def test_normalized_values(self):
+        """The same email in another case changes nothing"""
+        user = User("ana@example.com", "Ana", "Perez", "", False)
+        self.repo.save(user)
+
+        User.update(user.id, {"email": "Ana@Example.com"})
+        self.update.assert_not_called()
+
+        User.update(user.id, {"email": "Eva@Example.com"})
+        self.update.assert_called_once_with(user, fields={"email"})
+        self.assertEqual(user.email, "eva@example.com")
+
+
+if __name__ == "__main__":
+    unittest.main()
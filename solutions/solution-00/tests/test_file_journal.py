@@ -0,0 +1,124 @@
+""" Checks the journal mode of the FileRepository"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.persistence.file import FileRepository
+from utils.constants import FILE_JOURNAL_FILENAME, FILE_STORAGE_FILENAME
+
+
+class TestFileJournal(unittest.TestCase):
+    """FileRepository in journal mode"""
+
+    def setUp(self):
+        """Runs every test in an empty directory"""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_replay(self):
+        """Changes are appended to the journal and replayed on reload"""
+        repo = FileRepository(journal=True)
+        kept = City("Montevideo", "UY")
+        removed = City("Salto", "UY")
+        repo.save(kept)
+        repo.save(removed)
+        kept.name = "Montevideo Centro"
+        repo.update(kept)
+        repo.delete(removed)
+
+        self.assertFalse(os.path.exists(FILE_STORAGE_FILENAME))
+
+        reloaded = FileRepository(journal=True)
+        self.assertEqual(reloaded.get("city", kept.id).name,
+                         "Montevideo Centro")
+        self.assertIsNone(reloaded.get("city", removed.id))
+        self.assertIsNotNone(reloaded.get("country", "UY"))
+
+    def test_update_records_changed_fields(self):
+        """An update of known fields journals a patch of those fields"""
+        repo = FileRepository(journal=True)
+        city = City("Montevideo", "UY")
+        repo.save(city)
+        city.name = "Montevideo Centro"
+        repo.update(city, fields={"name"})
+
+        with open(FILE_JOURNAL_FILENAME, "rb") as file:
+            record = FileRepository._decode(file.readlines()[-1])
+
+        self.assertEqual(record["op"], "patch")
+        self.assertEqual(set(record["data"]), {"name", "updated_at"})
+
+        reloaded = FileRepository(journal=True).get("city", city.id)
+        self.assertEqual(reloaded.name, "Montevideo Centro")
+        self.assertEqual(reloaded.country_code, "UY")
+        self.assertEqual(reloaded.updated_at, city.updated_at)
+
+    def test_save_many_single_write(self):
+        """save_many appends every object with a single write"""
+        repo = FileRepository(journal=True)
+        cities = [City(f"City {i}", "UY") for i in range(3)]
+
+        with mock.patch.object(repo, "_append", wraps=repo._append) as append:
+            self.assertEqual(repo.save_many(cities), [None] * 3)
+
+        append.assert_called_once()
+        reloaded = FileRepository(journal=True)
+        self.assertEqual(
+            [c.id for c in reloaded.find_in("city", "country_code", ["UY"])],
+            [c.id for c in cities],
+        )
+
+    def test_torn_tail_is_dropped(self):
+        """A record cut by a crash is ignored and removed from the log"""
+        repo = FileRepository(journal=True)
+        city = City("Montevideo", "UY")
+        repo.save(city)
+        size = os.path.getsize(FILE_JOURNAL_FILENAME)
+
+        with open(FILE_JOURNAL_FILENAME, "ab") as file:
+            file.write(b'0badc0de {"op": "save", "model": "ci')
+
+        reloaded = FileRepository(journal=True)
+        self.assertIsNotNone(reloaded.get("city", city.id))
+        self.assertEqual(os.path.getsize(FILE_JOURNAL_FILENAME), size)
+
+    def test_compaction(self):
+        """Reaching the threshold folds the journal into the snapshot"""
+        with mock.patch(
+            "src.persistence.file.FILE_JOURNAL_COMPACT_THRESHOLD", 3
+        ):
+            repo = FileRepository(journal=True)
+            repo.save(City("Montevideo", "UY"))
+            repo.save(City("Salto", "UY"))
+
+        self.assertTrue(os.path.exists(FILE_STORAGE_FILENAME))
+        self.assertFalse(os.path.exists(FILE_JOURNAL_FILENAME))
+        self.assertEqual(len(FileRepository(journal=True).get_all("city")),
+                         2)
+
+    def test_batched_writes(self):
+        """Changes batched by the flusher end in the journal"""
+        with mock.patch.dict(os.environ, {"STORAGE_FLUSH_WINDOW_MS": "20"}):
+            repo = FileRepository(journal=True)
+
+        cities = [City(f"City {i}", "UY") for i in range(20)]
+        for city in cities[:-1]:
+            repo.save(city)
+        repo.save(cities[-1], durable=True)
+        repo._flusher.close()
+
+        reloaded = FileRepository(journal=True)
+        self.assertEqual(len(reloaded.get_all("city")), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+""" Checks the group-commit Flusher"""
+
+import threading
+import time
+import unittest
+
+from src.persistence.flusher import Flusher
+
+
+class TestFlusher(unittest.TestCase):
+    """Flusher batching and durability"""
+
+    def setUp(self):
+        """Counts the flushes"""
+        self.flushes = 0
+
+    def flush(self):
+        """Flush callback"""
+        self.flushes += 1
+
+    def test_requests_are_coalesced(self):
+        """Requests made during a window share a single flush"""
+        flusher = Flusher(self.flush, window=0.05, max_ops=1000)
+
+        for _ in range(50):
+            flusher.request()
+        flusher.request(durable=True)
+        flusher.close()
+
+        self.assertEqual(self.flushes, 1)
+
+    def test_max_ops_flushes_early(self):
+        """Reaching max_ops does not wait for the end of the window"""
+        flusher = Flusher(self.flush, window=10, max_ops=5)
+
+        start = time.monotonic()
+        for _ in range(4):
+            flusher.request()
+        flusher.request(durable=True)
+
+        self.assertLess(time.monotonic() - start, 5)
+        flusher.close()
+
+    def test_durable_waits_for_flush(self):
+        """A durable request returns once its flush has completed"""
+        done = threading.Event()
+        flusher = Flusher(done.set, window=0.01, max_ops=100)
+
+        flusher.request(durable=True)
+
+        self.assertTrue(done.is_set())
+        flusher.close()
+
+    def test_durable_raises_flush_error(self):
+        """The error of the flush is raised to durable requests"""
+        def fail():
+            """Failing flush callback"""
+            raise OSError("disk full")
+
+        flusher = Flusher(fail, window=0.01, max_ops=100)
+
+        with self.assertRaises(OSError):
+            flusher.request(durable=True)
+        flusher.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
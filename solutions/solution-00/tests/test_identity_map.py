@@ -0,0 +1,115 @@
+""" Checks the request scoped identity map of the models"""
+
+import unittest
+from unittest import mock
+
+from flask import Flask, g
+
+from src.models.amenity import Amenity
+from src.models.identity_map import debug_headers
+from src.models.place import Place
+from src.models.rating_stats import RatingStats
+from src.persistence.memory import MemoryRepository
+
+
+class TestIdentityMap(unittest.TestCase):
+    """Base.get and Base.get_many through the identity map"""
+
+    def setUp(self):
+        """Serves the models from an empty repository"""
+        self.app = Flask(__name__)
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.wifi = Amenity("Wifi")
+        self.repo.save(self.wifi)
+
+    def reads(self, method: str) -> mock.MagicMock:
+        """Counts the calls of a method of the repository"""
+        patcher = mock.patch.object(
+            self.repo, method, wraps=getattr(self.repo, method)
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_get_once_per_request(self):
+        """An id is read from the repository once per request"""
+        get = self.reads("get")
+
+        with self.app.test_request_context():
+            self.assertIs(Amenity.get(self.wifi.id), self.wifi)
+            self.assertIs(Amenity.get(self.wifi.id), self.wifi)
+            self.assertEqual(debug_headers(), {
+                "X-Identity-Map-Lookups": "2",
+                "X-Identity-Map-Saved": "1",
+            })
+
+        with self.app.test_request_context():
+            Amenity.get(self.wifi.id)
+            self.assertEqual(debug_headers()["X-Identity-Map-Saved"], "0")
+
+        self.assertEqual(get.call_count, 2)
+
+    def test_outside_of_requests(self):
+        """Without a request every lookup reads the repository"""
+        get = self.reads("get")
+
+        Amenity.get(self.wifi.id)
+        Amenity.get(self.wifi.id)
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(debug_headers(), {})
+
+    def test_missing_and_deleted_ids(self):
+        """Missing ids aren't kept and deleted objects are forgotten"""
+        pool = Amenity("Pool")
+
+        with self.app.test_request_context():
+            self.assertIsNone(Amenity.get(pool.id))
+            self.repo.save(pool)
+            self.assertIs(Amenity.get(pool.id), pool)
+
+            self.assertTrue(Amenity.delete(pool.id))
+            self.assertIsNone(Amenity.get(pool.id))
+
+    def test_get_many_reads_missing_ids(self):
+        """get_many only reads the ids not found yet"""
+        pool = Amenity("Pool")
+        self.repo.save(pool)
+        find_in = self.reads("find_in")
+
+        with self.app.test_request_context():
+            Amenity.get(self.wifi.id)
+            found = Amenity.get_many([self.wifi.id, pool.id, "x"])
+            self.assertEqual(found, {self.wifi.id: self.wifi, pool.id: pool})
+            self.assertIs(Amenity.get(pool.id), pool)
+
+            self.assertEqual(debug_headers()["X-Identity-Map-Saved"], "2")
+
+        find_in.assert_called_once()
+        self.assertCountEqual(find_in.call_args.args[2], [pool.id, "x"])
+
+    def test_listing_places_keeps_nothing(self):
+        """The places serialized read their stats once, past the map"""
+        places = [
+            Place({"name": f"Loft {i}", "host_id": "h", "city_id": "c"})
+            for i in range(3)
+        ]
+        self.repo.save_many(places)
+        self.repo.save(RatingStats("place", places[0].id, 1, 4.0,
+                                   [0, 0, 0, 1, 0]))
+        get = self.reads("get")
+
+        with self.app.test_request_context():
+            for place in places:
+                place.to_json()
+
+            self.assertNotIn("identity_map", g)
+
+        self.assertEqual(get.call_count, len(places))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+""" Checks that the in-process repositories keep their indexes consistent"""
+
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.models.place import Place
+from src.models.review import Review
+from src.persistence.memory import MemoryRepository
+from src.persistence.repository import Repository
+from utils.geo import bounding_box, haversine_km
+
+
+class TestIndexes(unittest.TestCase):
+    """Secondary indexes of the MemoryRepository"""
+
+    def setUp(self):
+        """Creates an empty repository"""
+        self.repo = MemoryRepository()
+
+    def test_find_uses_saved_objects(self):
+        """find returns only the objects matching every field"""
+        first = Review("p1", "u1", "Nice", 5)
+        second = Review("p1", "u2", "Bad", 1)
+        self.repo.save(first)
+        self.repo.save(second)
+        self.repo.save(Review("p2", "u1", "Ok", 3))
+
+        self.assertEqual(self.repo.find("review", place_id="p1"),
+                         [first, second])
+        self.assertEqual(
+            self.repo.find("review", place_id="p1", user_id="u2"), [second]
+        )
+        self.assertEqual(self.repo.find("review", place_id="p3"), [])
+
+    def test_update_moves_object(self):
+        """An object modified in place is moved on update"""
+        city = City("Montevideo", "UY")
+        self.repo.save(city)
+
+        city.country_code = "AR"
+        self.repo.update(city)
+
+        self.assertEqual(self.repo.find("city", country_code="UY"), [])
+        self.assertEqual(self.repo.find("city", country_code="AR"), [city])
+
+    def test_delete_removes_object(self):
+        """A deleted object is no longer found"""
+        review = Review("p1", "u1", "Nice", 5)
+        self.repo.save(review)
+        self.repo.delete(review)
+
+        self.assertEqual(self.repo.find("review", place_id="p1"), [])
+
+    def test_find_without_index(self):
+        """Fields without index fall back to a scan"""
+        review = Review("p1", "u1", "Nice", 5)
+        self.repo.save(review)
+
+        self.assertEqual(self.repo.find("review", rating=5), [review])
+
+    def test_page_follows_cursor(self):
+        """page walks every object once, ordered by id"""
+        reviews = [Review("p1", "u1", "Nice", 5) for _ in range(5)]
+        for review in reviews:
+            self.repo.save(review)
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = self.repo.page("review", cursor, 2)
+            self.assertLessEqual(len(page), 2)
+            seen.extend(page)
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, sorted(reviews, key=lambda r: r.id))
+        self.assertEqual(self.repo.count("review"), 5)
+
+    def place(self, lat: float, lon: float) -> Place:
+        """Saves a place at the given position"""
+        place = Place({"city_id": "c1", "host_id": "u1",
+                       "latitude": lat, "longitude": lon})
+        self.repo.save(place)
+        return place
+
+    def test_find_within(self):
+        """find_within returns the places inside the box, also moved"""
+        montevideo = self.place(-34.90, -56.16)
+        colonia = self.place(-34.47, -57.84)
+        fiji = self.place(-17.7, 179.9)
+
+        box = bounding_box(-34.90, -56.16, 50)
+        self.assertEqual(self.repo.find_within("place", box), [montevideo])
+
+        colonia.latitude, colonia.longitude = -34.88, -56.18
+        self.repo.update(colonia)
+        self.assertCountEqual(self.repo.find_within("place", box),
+                              [montevideo, colonia])
+
+        # A box crossing the antimeridian
+        self.assertEqual(
+            self.repo.find_within("place", (-20, 179, -15, -179)), [fiji]
+        )
+
+        # The scan of the base class, also given strings
+        colonia.latitude, colonia.longitude = "-34.88", "-56.18"
+        self.assertCountEqual(
+            Repository.find_within(
+                self.repo, "place", tuple(str(bound) for bound in box)
+            ),
+            [montevideo, colonia],
+        )
+
+    def test_find_range(self):
+        """find_range intersects the ranges of several sorted indexes"""
+        places = []
+        for price, guests in ((50, 2), (80, 4), (120, 4), (80, 6)):
+            place = self.place(0, 0)
+            place.price_per_night, place.max_guests = price, guests
+            self.repo.update(place)
+            places.append(place)
+
+        self.assertEqual(
+            self.repo.find_range("place", price_per_night=(60, 100),
+                                 max_guests=(None, 4)),
+            [places[1]],
+        )
+        self.assertEqual(
+            self.repo.find_range("place", price_per_night=(80, None)),
+            sorted(places[1:], key=lambda place: place.id),
+        )
+
+    def test_select_matches_scan(self):
+        """The column store answers select like the scan over the objects"""
+        places = []
+        for i, (price, guests) in enumerate(
+            ((50, 2), (80, 4), (120, 4), (80, 6), (30, 1))
+        ):
+            place = self.place(-34.9 + i / 100, -56.16)
+            place.price_per_night, place.max_guests = price, guests
+            self.repo.update(place)
+            places.append(place)
+
+        self.repo.delete(places[4])
+        places[0].price_per_night = 90
+        self.repo.update(places[0])
+        # Ids of any length keep their order
+        long_id = Place({"city_id": "c1", "host_id": "u1",
+                         "latitude": -34.9, "longitude": -56.16},
+                        id="0" * 60)
+        self.repo.save(long_id)
+        places.append(long_id)
+
+        box = bounding_box(-34.90, -56.16, 50)
+        queries = [
+            ({"price_per_night": (60, 100)}, None, None),
+            ({}, box, "-price_per_night"),
+            ({"max_guests": (4, None)}, box, "price_per_night"),
+        ]
+        for ranges, within, sort in queries:
+            self.assertEqual(
+                self.repo.select("place", ranges, within, sort),
+                Repository.select(self.repo, "place", ranges, within, sort),
+            )
+
+        self.assertEqual(
+            [p.price_per_night for p in self.repo.select(
+                "place", {}, sort="-price_per_night")],
+            [120, 90, 80, 80, 0],
+        )
+
+    def test_selective_queries_read_the_indexes(self):
+        """Narrow ranges and boxes read their index, not the columns"""
+        for i in range(1000):
+            place = self.place(-80 + i * 0.1, -56.16)
+            place.price_per_night = i
+            self.repo.update(place)
+
+        store = self.repo._columns("place", "price_per_night")
+        narrow = [
+            ({"price_per_night": (10, 11)}, None, "-price_per_night"),
+            ({}, (-50.05, -56.2, -49.95, -56.1), None),
+            ({"price_per_night": (5, 5)}, (-90.0, -180.0, 90.0, 180.0), None),
+        ]
+        with mock.patch.object(store, "select") as select, \
+                mock.patch.object(store, "aggregate") as aggregate:
+            for ranges, box, sort in narrow:
+                self.assertEqual(
+                    self.repo.select("place", ranges, box, sort),
+                    Repository.select(self.repo, "place", ranges, box, sort),
+                )
+                self.assertEqual(
+                    self.repo.aggregate(
+                        "place", ("price_per_night",), ranges, box
+                    )["count"],
+                    len(self.repo.select("place", ranges, box)),
+                )
+            select.assert_not_called()
+            aggregate.assert_not_called()
+
+        self.assertEqual(
+            len(self.repo.select("place", {"price_per_night": (0, 100)})),
+            101,
+        )
+
+    def test_aggregate(self):
+        """aggregate returns the count and the min, max and avg of fields"""
+        for price in (50, 80, 110):
+            place = self.place(0, 0)
+            place.price_per_night = price
+            self.repo.update(place)
+
+        fields = ("price_per_night",)
+        stats = self.repo.aggregate("place", fields, {})
+        self.assertEqual(stats, {
+            "count": 3,
+            "price_per_night": {"min": 50, "max": 110, "avg": 80},
+        })
+        self.assertEqual(
+            stats, Repository.aggregate(self.repo, "place", fields, {})
+        )
+        self.assertEqual(
+            self.repo.aggregate(
+                "place", fields, {"price_per_night": (200, None)}
+            ),
+            {"count": 0,
+             "price_per_night": {"min": None, "max": None, "avg": None}},
+        )
+
+    def test_search(self):
+        """search ranks the matches and follows the updates"""
+        first = Review("p1", "u1", "Quiet flat near the beach", 5)
+        second = Review("p1", "u2", "Beach, beach and more beach", 4)
+        third = Review("p2", "u1", "The flat is near a noisy bar", 2)
+        for review in (first, second, third):
+            self.repo.save(review)
+
+        self.assertEqual(
+            [r for r, _ in self.repo.search("review", "beach", 10)],
+            [second, first],
+        )
+        self.assertEqual(
+            [r for r, _ in self.repo.search("review", '"flat near"', 10)],
+            [first],
+        )
+        self.assertEqual(self.repo.search("review", "beach bar", 10), [])
+
+        first.comment = "Quiet flat"
+        self.repo.update(first)
+        self.repo.delete(second)
+        self.assertEqual(self.repo.search("review", "beach", 10), [])
+
+    def test_haversine(self):
+        """Distances match the known distance between two cities"""
+        # Montevideo to Buenos Aires is about 205 km
+        distance = haversine_km(-34.90, -56.16, [-34.60], [-58.38])[0]
+        self.assertAlmostEqual(distance, 205, delta=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+""" Checks the JSON the models keep encoded"""
+
+import json
+import pickle
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.models.place import Place
+from src.models.rating_stats import RatingStats
+from src.persistence.memory import MemoryRepository
+
+
+class TestJSONCache(unittest.TestCase):
+    """to_json of the in-memory models"""
+
+    def setUp(self):
+        """Runs every test against an empty MemoryRepository"""
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_encoded_once(self):
+        """to_dict is only called again after an attribute is set"""
+        city = City("Montevideo", "UY")
+
+        with mock.patch.object(City, "to_dict", wraps=city.to_dict) as to_dict:
+            first = city.to_json()
+            self.assertIs(city.to_json(), first)
+            self.assertEqual(to_dict.call_count, 1)
+
+            city.name = "Salto"
+            self.assertEqual(json.loads(city.to_json())["name"], "Salto")
+            self.assertEqual(to_dict.call_count, 2)
+
+        self.assertEqual(json.loads(first), json.loads(
+            json.dumps(City("Montevideo", "UY", id=city.id,
+                            created_at=city.created_at,
+                            updated_at=city.updated_at).to_dict())
+        ))
+
+    def test_place_rating(self):
+        """The JSON of a place follows the rating stats of the place"""
+        place = Place({"name": "Loft", "host_id": "h", "city_id": "c"})
+        self.repo.save(place)
+        self.assertEqual(json.loads(place.to_json())["rating"]["count"], 0)
+
+        stats = RatingStats("place", place.id, 1, 4.0, [0, 0, 0, 1, 0])
+        self.repo.save(stats)
+        self.assertEqual(json.loads(place.to_json())["rating"],
+                         {"count": 1, "average": 4.0})
+
+        stats.count, stats.total = 2, 9.0
+        self.assertEqual(json.loads(place.to_json())["rating"],
+                         {"count": 2, "average": 4.5})
+
+    def test_not_pickled(self):
+        """The cached JSON isn't stored with the object"""
+        city = City("Montevideo", "UY")
+        city.to_json()
+
+        self.assertIsNone(pickle.loads(pickle.dumps(city))._json)
+
+
+if __name__ == "__main__":
+    unittest.main()
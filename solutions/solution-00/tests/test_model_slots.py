@@ -0,0 +1,62 @@
+""" Checks the slotted representation of the in-memory models"""
+
+import pickle
+import sys
+import unittest
+
+from src.models.city import City
+from src.models.review import Review
+
+
+class TestModelSlots(unittest.TestCase):
+    """Declared fields, extras and interned strings"""
+
+    def test_no_instance_dict(self):
+        """The objects only store their declared fields"""
+        review = Review("place", "user", "Nice", 4.0)
+
+        self.assertFalse(hasattr(review, "__dict__"))
+        self.assertIsNone(review.extras)
+
+    def test_extras(self):
+        """Undeclared attributes are kept in extras"""
+        review = Review("place", "user", "Nice", 4.0, source="import")
+        review.lang = "en"
+
+        self.assertEqual(review.extras, {"source": "import", "lang": "en"})
+        self.assertEqual(review.lang, "en")
+        with self.assertRaises(AttributeError):
+            review.missing
+
+    def test_interned(self):
+        """Objects referencing the same ids share their strings"""
+        first = City("Montevideo", "".join(["U", "Y"]))
+        second = City("Salto", "".join(["U", "Y"]))
+
+        self.assertIs(first.country_code, second.country_code)
+        self.assertIs(first.country_code, sys.intern("UY"))
+
+    def test_pickle(self):
+        """Objects round trip through pickle, also from an instance dict"""
+        review = Review("place", "user", "Nice", 4.0, source="import")
+        copy = pickle.loads(pickle.dumps(review))
+
+        self.assertEqual(copy.to_dict(), review.to_dict())
+        self.assertEqual(copy.extras, {"source": "import"})
+
+        old = Review.__new__(Review)
+        old.__setstate__(vars(_Legacy(review)))
+        self.assertEqual(old.to_dict(), review.to_dict())
+
+
+class _Legacy:
+    """The attributes of an object as pickled before the slots"""
+
+    def __init__(self, review: Review) -> None:
+        """Copies the fields of a review"""
+        for name in ("id", "created_at", "updated_at", *review.__slots__):
+            setattr(self, name, getattr(review, name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+""" Checks the password hashing pool"""
+
+import threading
+import time
+from types import SimpleNamespace
+import unittest
+from unittest import mock
+
+from src.app_bcrypt import (
+    PasswordPool,
+    PasswordPoolBusy,
+    hash_password,
+    hash_rounds,
+    verify_password,
+)
+from src.config import get_password_workers
+
+
+def app_with(**config) -> SimpleNamespace:
+    """Stands for an app with the given config"""
+    return SimpleNamespace(config=config)
+
+
+class TestPasswords(unittest.TestCase):
+    """PasswordPool workers, saturation and cost factor"""
+
+    def test_hash_and_verify(self):
+        """A hash made in a worker is checked in a worker"""
+        pool = PasswordPool()
+        pool.init_app(app_with(PASSWORD_WORKERS=1, PASSWORD_QUEUE_DEPTH=1))
+        self.addCleanup(pool.shutdown)
+
+        password_hash = pool.run(hash_password, "secret", 4)
+
+        self.assertEqual(hash_rounds(password_hash), 4)
+        self.assertTrue(pool.run(verify_password, password_hash, "secret"))
+        self.assertFalse(pool.run(verify_password, password_hash, "wrong"))
+        self.assertFalse(verify_password(None, "secret"))
+
+    def test_inline_without_workers(self):
+        """Without workers the functions run in the calling thread"""
+        pool = PasswordPool()
+        pool.init_app(app_with(BCRYPT_LOG_ROUNDS=4, PASSWORD_WORKERS=0))
+
+        self.assertEqual(pool.rounds, 4)
+        self.assertEqual(pool.run(threading.get_ident),
+                         threading.get_ident())
+
+    def test_busy_when_saturated(self):
+        """Calls beyond the workers and their queue are rejected at once"""
+        pool = PasswordPool()
+        pool.init_app(app_with(PASSWORD_WORKERS=1, PASSWORD_QUEUE_DEPTH=1))
+        self.addCleanup(pool.shutdown)
+
+        waiting = [
+            threading.Thread(target=pool.run, args=(time.sleep, 0.5))
+            for _ in range(2)
+        ]
+        for thread in waiting:
+            thread.start()
+        time.sleep(0.1)
+
+        start = time.monotonic()
+        with self.assertRaises(PasswordPoolBusy):
+            pool.run(time.sleep, 0)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        for thread in waiting:
+            thread.join()
+        self.assertIsNone(pool.run(time.sleep, 0))
+
+    def test_hash_rounds(self):
+        """The cost factor is read from the hash"""
+        self.assertEqual(hash_rounds("$2b$12$" + "x" * 53), 12)
+        self.assertIsNone(hash_rounds("plaintext"))
+        self.assertIsNone(hash_rounds(None))
+
+    @mock.patch("os.cpu_count", return_value=8)
+    def test_workers_split_the_cores(self, _):
+        """The server workers share the cores unless the pool size is set"""
+        for env, workers in (
+            ({}, 8),
+            ({"WEB_CONCURRENCY": "2"}, 4),
+            ({"WEB_CONCURRENCY": "16"}, 1),
+            ({"WEB_CONCURRENCY": "2", "PASSWORD_WORKERS": "3"}, 3),
+        ):
+            with mock.patch.dict("os.environ", env, clear=True):
+                self.assertEqual(get_password_workers(), workers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+""" Checks the sharded layout of the PickleRepository"""
+
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from src.models.amenity import Amenity
+from src.models.country import Country
+from src.models.review import Review
+from src.persistence.pickled import PickleRepository
+from utils.constants import PICKLE_STORAGE_DIRNAME, PICKLE_STORAGE_FILENAME
+
+
+class TestPickleShards(unittest.TestCase):
+    """PickleRepository shard files"""
+
+    def setUp(self):
+        """Runs every test in an empty directory"""
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_write_only_touches_its_shard(self):
+        """Saving an amenity does not rewrite the review shards"""
+        repo = PickleRepository()
+        for i in range(50):
+            repo.save(Review(f"p{i}", "u", "Nice", 5))
+
+        with mock.patch(
+            "src.persistence.pickled.write_atomically"
+        ) as write:
+            repo.save(Amenity("Wifi"))
+
+        written = [call.args[0] for call in write.call_args_list]
+        self.assertEqual(
+            written, [os.path.join(PICKLE_STORAGE_DIRNAME, "amenity.pkl")]
+        )
+
+        reloaded = PickleRepository()
+        self.assertEqual(len(reloaded.get_all("review")), 50)
+        self.assertEqual(len(reloaded.find("review", place_id="p7")), 1)
+
+    def test_single_file_is_converted(self):
+        """The single data.pkl layout is split into shards on load"""
+        review = Review("p", "u", "Nice", 5)
+        with open(PICKLE_STORAGE_FILENAME, "wb") as file:
+            pickle.dump(
+                {"country": [Country("Uruguay", "UY")], "review": [review]},
+                file,
+            )
+
+        repo = PickleRepository()
+
+        self.assertFalse(os.path.exists(PICKLE_STORAGE_FILENAME))
+        self.assertTrue(os.path.exists(f"{PICKLE_STORAGE_FILENAME}.bak"))
+        self.assertEqual(repo.get("review", review.id).comment, "Nice")
+        self.assertIsNotNone(repo.get("country", "UY"))
+
+    def test_bucket_count_change(self):
+        """Shards written with another bucket count are rewritten"""
+        with mock.patch.dict(
+            "src.persistence.pickled.PICKLE_SHARD_BUCKETS", {"review": 1}
+        ):
+            repo = PickleRepository()
+            repo.save(Review("p", "u", "Nice", 5))
+
+        repo = PickleRepository()
+
+        self.assertEqual(len(repo.get_all("review")), 1)
+        self.assertNotIn("review.pkl", os.listdir(PICKLE_STORAGE_DIRNAME))
+
+
+if __name__ == "__main__":
+    unittest.main()
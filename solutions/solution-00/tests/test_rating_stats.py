@@ -0,0 +1,109 @@
+""" Checks the rating stats kept by the reviews"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from src.models.city import City
+from src.models.place import Place
+from src.models.rating_stats import RatingStats
+from src.models.review import Review
+from src.models.user import User
+from src.persistence.memory import MemoryRepository
+
+
+class TestRatingStats(unittest.TestCase):
+    """Rating stats of the places, hosts and cities"""
+
+    def setUp(self):
+        """Runs every test against an empty MemoryRepository"""
+        self.repo = MemoryRepository()
+        patcher = mock.patch("src.persistence.repo", self.repo)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.host = User("host@example.com", "Host", "User", "", False)
+        self.guests = [
+            User(f"guest{i}@example.com", "Guest", "User", "", False)
+            for i in range(3)
+        ]
+        self.city = City("Montevideo", "UY")
+        self.place = Place({"name": "Loft", "host_id": self.host.id,
+                            "city_id": self.city.id})
+        self.repo.save_many([self.host, *self.guests, self.city, self.place])
+
+    def review(self, guest: User, rating: float) -> Review:
+        """Creates a review of the place"""
+        return Review.create({"place_id": self.place.id, "user_id": guest.id,
+                              "comment": "Nice", "rating": rating})
+
+    def test_create_update_delete(self):
+        """Every review change is applied to the three scopes"""
+        first = self.review(self.guests[0], 4.0)
+        second = self.review(self.guests[1], 5.0)
+
+        for scope, target in (("place", self.place.id),
+                              ("host", self.host.id),
+                              ("city", self.city.id)):
+            stats = RatingStats.of(scope, target)
+            self.assertEqual((stats.count, stats.average), (2, 4.5))
+            self.assertEqual(stats.histogram, [0, 0, 0, 1, 1])
+
+        Review.update(first.id, {"rating": 1.0})
+        Review.delete(second.id)
+
+        stats = RatingStats.of("place", self.place.id)
+        self.assertEqual((stats.count, stats.average), (1, 1.0))
+        self.assertEqual(stats.histogram, [1, 0, 0, 0, 0])
+        self.assertEqual(self.place.rating, {"count": 1, "average": 1.0})
+
+    def test_create_many(self):
+        """Bulk created reviews are recorded together"""
+        results = Review.create_many([
+            {"place_id": self.place.id, "user_id": guest.id,
+             "comment": "Nice", "rating": 3}
+            for guest in self.guests
+        ])
+
+        self.assertFalse(any(isinstance(r, Exception) for r in results))
+        self.assertEqual(RatingStats.of("city", self.city.id).count, 3)
+
+    def test_concurrent_records(self):
+        """Reviews recorded at once never add to the same stale stats"""
+        find_in = self.repo.find_in
+
+        def slow_find_in(*args):
+            """Reads the stats, then lets the other thread run"""
+            found = find_in(*args)
+            time.sleep(0.05)
+            return found
+
+        with mock.patch.object(self.repo, "find_in", slow_find_in):
+            threads = [
+                threading.Thread(
+                    target=RatingStats.record, args=([(self.place.id, 5, 1)],)
+                )
+                for _ in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(RatingStats.of("place", self.place.id).count, 2)
+
+    def test_rebuild(self):
+        """rebuild recomputes the stats from the reviews"""
+        self.review(self.guests[0], 2.0)
+        self.review(self.guests[1], 4.0)
+        RatingStats.of("place", self.place.id).count = 10
+
+        self.assertEqual(RatingStats.rebuild(), 2)
+        stats = RatingStats.of("place", self.place.id)
+        self.assertEqual((stats.count, stats.average), (2, 3.0))
+        self.assertIsNone(RatingStats.of("place", "unknown").average)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,107 @@
 """ Export constants for the application """
 
 REPOSITORY_ENV_VAR = "REPOSITORY"
+# Set to "1" to put the repository behind a CachingRepository
+REPOSITORY_CACHE_ENV_VAR = "REPOSITORY_CACHE"
+# Models kept by the CachingRepository, with the number of objects kept
+# and the seconds each one is kept
+REPOSITORY_CACHE_MODELS = {
+    "country": {"size": 512, "ttl": 3600},
+    "amenity": {"size": 1024, "ttl": 600},
+    "city": {"size": 4096, "ttl": 600},
+    "place": {"size": 10_000, "ttl": 60},
+    "user": {"size": 10_000, "ttl": 60},
+}
+# Seconds an id that matched no object is remembered as missing
+REPOSITORY_CACHE_NEGATIVE_TTL = 5
+# File of the write versions shared by the workers of a server, unset
+# (the default) when a single process serves the db, file or pickle data
+REPOSITORY_VERSIONS_ENV_VAR = "REPOSITORY_VERSIONS_FILE"
+# Models given a slot in the shared versions
+MODEL_NAMES = (
+    "country",
+    "user",
+    "amenity",
+    "city",
+    "review",
+    "place",
+    "placeamenity",
+    "ratingstats",
+)
+# Changes kept by the change log of the repository for `GET /changes`
+CHANGE_LOG_SIZE = 10_000
+
+# Page size of the list endpoints when `limit` isn't given, and its maximum
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+# Maximum number of items accepted by the bulk create endpoints
+MAX_BULK_SIZE = 1000
+# Objects serialized together in each chunk of a streamed list
+STREAM_CHUNK_ITEMS = 500
+# Rows fetched per round trip when the DBRepository streams a table
+STREAM_BATCH_SIZE = 1000
+
+# Size in degrees of the cells of the spatial index of the places
+GEO_CELL_DEGREES = 0.1
+# Radius of `GET /places?near=` when `radius_km` isn't given
+GEO_DEFAULT_RADIUS_KM = 10.0
+
+# Filters of `GET /places`, `min_<name>` and `max_<name>` bound the field
+PLACE_RANGE_FILTERS = {
+    "price": "price_per_night",
+    "guests": "max_guests",
+    "rooms": "number_of_rooms",
+    "bathrooms": "number_of_bathrooms",
+}
+
+# Responses of the conditional GET routes kept, by URL, with their ETag,
+# and the largest body kept, bigger collections are streamed every time
+RESPONSE_CACHE_ENTRIES = 256
+RESPONSE_CACHE_MAX_BYTES = 1 << 20
+
+# Numeric fields the in-process repositories also keep in NumPy columns,
+# to filter, sort and aggregate them without reading the objects.
+# Remove a model to serve its queries from the other indexes
+COLUMN_STORE_FIELDS = {
+    "place": (
+        "price_per_night",
+        "latitude",
+        "longitude",
+        "max_guests",
+        "number_of_rooms",
+        "number_of_bathrooms",
+    ),
+}
+# Largest share of the objects of a model an index narrowing a range or
+# box query may return to be read instead of the columns: past it one
+# vectorized scan of the columns is cheaper than checking each object
+INDEX_SCAN_FRACTION = 0.01
+
+# Text fields searched by `GET /search`, by model
+SEARCH_FIELDS = {
+    "place": ("name", "description"),
+    "review": ("comment",),
+}
+# Results of each model returned by `GET /search` when `limit` isn't given
+SEARCH_DEFAULT_LIMIT = 20
 
 FILE_STORAGE_FILENAME = "data.json"
+FILE_JOURNAL_FILENAME = "data.journal"
+# Set to "journal" to append every change to FILE_JOURNAL_FILENAME
+# instead of rewriting FILE_STORAGE_FILENAME on each write
+FILE_STORAGE_MODE_ENV_VAR = "FILE_STORAGE_MODE"
+# Number of journal records that triggers a compaction into the snapshot
+FILE_JOURNAL_COMPACT_THRESHOLD = 10_000
+# Single file layout of the PickleRepository, converted on first load
 PICKLE_STORAGE_FILENAME = "data.pkl"
+# Directory holding one pickle file per model (or per bucket of ids)
+PICKLE_STORAGE_DIRNAME = "data_pkl"
+# Models split in buckets of ids, the others use a single file
+PICKLE_SHARD_BUCKETS = {"review": 16, "place": 8, "user": 8}
+
+# Milliseconds the file and pickle repositories wait to batch changes
+# into a single write, 0 (the default) writes synchronously on each change
+STORAGE_FLUSH_WINDOW_ENV_VAR = "STORAGE_FLUSH_WINDOW_MS"
+# Pending changes that trigger a write before the window ends
+STORAGE_FLUSH_MAX_OPS_ENV_VAR = "STORAGE_FLUSH_MAX_OPS"
+STORAGE_FLUSH_MAX_OPS = 100
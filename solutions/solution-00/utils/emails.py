@@ -0,0 +1,12 @@
+""" Export the email helpers of the user lookups """
+
+
+def normalize_email(email: str) -> str:
+    """
+    Returns the case-folded email without surrounding spaces, the users
+    are stored and looked up by it so that an address matches in any case
+    """
+    if not isinstance(email, str):
+        return email
+
+    return email.strip().casefold()
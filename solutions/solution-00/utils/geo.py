@@ -0,0 +1,61 @@
+""" Export geographic helpers for the spatial queries on places """
+
+from math import cos, radians
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * np.pi / 180
+
+
+def bounding_box(
+    lat: float, lon: float, radius_km: float
+) -> tuple[float, float, float, float]:
+    """
+    Returns the `(south, west, north, east)` box containing the circle of
+    radius_km around a point. `west > east` when the box crosses the
+    antimeridian, and the box spans every longitude near the poles
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    if south == -90.0 or north == 90.0:
+        return south, -180.0, north, 180.0
+
+    dlon = dlat / max(cos(radians(max(abs(south), abs(north)))), 1e-12)
+
+    if dlon >= 180.0:
+        return south, -180.0, north, 180.0
+
+    west = (lon - dlon + 180.0) % 360.0 - 180.0
+    east = (lon + dlon + 180.0) % 360.0 - 180.0
+
+    return south, west, north, east
+
+
+def in_box(
+    lat: float, lon: float, box: tuple[float, float, float, float]
+) -> bool:
+    """Whether a point is inside a `(south, west, north, east)` box"""
+    south, west, north, east = box
+
+    if not south <= lat <= north:
+        return False
+    if west <= east:
+        return west <= lon <= east
+    return lon >= west or lon <= east
+
+
+def haversine_km(
+    lat: float, lon: float, lats: np.ndarray, lons: np.ndarray
+) -> np.ndarray:
+    """Distances in km from a point to every point of the arrays"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -40,10 +40,12 @@ def main():
     r3 = test_functions(
         [
             test_amenities.test_get_amenities,
+            test_amenities.test_get_amenities_conditional,
             test_amenities.test_get_amenity,
             test_amenities.test_post_amenity,
             test_amenities.test_put_amenity,
             test_amenities.test_delete_amenity,
+            test_amenities.test_place_amenities,
         ]
     )
 
@@ -51,8 +53,14 @@ def main():
     r4 = test_functions(
         [
             test_places.test_get_places,
+            test_places.test_get_places_paginated,
+            test_places.test_get_places_near,
+            test_places.test_get_places_filtered,
+            test_places.test_get_places_stats,
+            test_places.test_search_places,
             test_places.test_get_place,
             test_places.test_post_place,
+            test_places.test_post_places_bulk,
             test_places.test_put_place,
             test_places.test_delete_place,
         ]
@@ -67,6 +75,7 @@ def main():
             test_reviews.test_post_review,
             test_reviews.test_put_review,
             test_reviews.test_delete_review,
+            test_reviews.test_place_stats,
         ]
     )
 
@@ -1,8 +1,10 @@
 """ Implement the Amenity Management Endpoints """
 import uuid
 
-from tests import test_functions
-from tests import assertStatus
+import requests
+
+from tests import API_URL, test_functions
+from tests import assertStatus, auth_headers
 from tests.client import Client
 
 
@@ -19,6 +21,29 @@ def test_get_amenities(client: Client):
     ), f"Expected response to be a list but got {type(response.json())}"
 
 
+def test_get_amenities_conditional(client: Client):
+    """
+    Test the conditional GET of the amenities
+    Sends a GET request to /amenities with the ETag of a previous response and checks
+    that it gets a 304 until an amenity is created.
+    """
+    response = client.get("/amenities")
+    assertStatus(response, 200)
+    etag = response.headers.get("ETag")
+    assert etag, "ETag not in response"
+    assert response.headers.get("Last-Modified"), "Last-Modified not in response"
+
+    response = requests.get(f"{API_URL}/amenities", headers={"If-None-Match": etag})
+    assertStatus(response, 304)
+    assert response.content == b"", "Expected an empty body for a 304"
+
+    client.factory.create_unique_amenity()
+
+    response = requests.get(f"{API_URL}/amenities", headers={"If-None-Match": etag})
+    assertStatus(response, 200)
+    assert response.headers.get("ETag") != etag, "Expected a new ETag after a write"
+
+
 def test_post_amenity(client: Client):
     """
     Test to create a new amenity
@@ -123,14 +148,77 @@ def test_delete_amenity(client: Client):
     assertStatus(response, 204)
 
 
+def test_place_amenities(client: Client):
+    """
+    Test to link amenities to a place
+    Links amenities one by one and in bulk, checks /places/{id}/amenities and
+    /amenities/{id}/places, then unlinks them one by one and in bulk.
+    """
+    place_id = client.factory.create_place()
+    host_token = client.user2.access_token
+    amenity_ids = [client.factory.create_unique_amenity() for _ in range(3)]
+
+    # not the host -> 403
+    response = client.post(f"/places/{place_id}/amenities", {"amenity_id": amenity_ids[0]}, client.user.access_token)
+    assertStatus(response, 403)
+
+    response = client.post(f"/places/{place_id}/amenities", {"amenity_id": amenity_ids[0]}, host_token)
+    assertStatus(response, 201)
+    response = client.post(f"/places/{place_id}/amenities", {"amenity_id": amenity_ids[0]}, host_token)
+    assertStatus(response, 400)
+    response = client.post(f"/places/{place_id}/amenities", {"amenity_id": str(uuid.uuid4())}, host_token)
+    assertStatus(response, 404)
+
+    response = client.post(
+        f"/places/{place_id}/amenities/bulk",
+        [{"amenity_id": amenity_ids[1]}, {"amenity_id": amenity_ids[2]}, {"amenity_id": amenity_ids[0]}],
+        host_token,
+    )
+    assertStatus(response, 207)
+    assert len(response.json()["created"]) == 2, f"Expected 2 links but got {response.json()}"
+    assert [e["index"] for e in response.json()["errors"]] == [2], \
+        f"Expected the already linked amenity to be rejected but got {response.json()}"
+
+    response = client.get(f"/places/{place_id}/amenities")
+    assertStatus(response, 200)
+    assert sorted(a["id"] for a in response.json()) == sorted(amenity_ids), \
+        f"Expected the 3 amenities but got {response.json()}"
+
+    response = client.get(f"/amenities/{amenity_ids[1]}/places")
+    assertStatus(response, 200)
+    assert [p["id"] for p in response.json()] == [place_id], \
+        f"Expected the place but got {response.json()}"
+
+    response = client.delete(f"/places/{place_id}/amenities/{amenity_ids[0]}", host_token)
+    assertStatus(response, 204)
+    response = client.delete(f"/places/{place_id}/amenities/{amenity_ids[0]}", host_token)
+    assertStatus(response, 404)
+
+    response = requests.delete(
+        f"{API_URL}/places/{place_id}/amenities/bulk",
+        json=[{"amenity_id": amenity_ids[1]}, {"amenity_id": amenity_ids[2]}],
+        headers=auth_headers(host_token),
+    )
+    assertStatus(response, 200)
+
+    response = client.get(f"/places/{place_id}/amenities")
+    assertStatus(response, 200)
+    assert response.json() == [], f"Expected no amenities but got {response.json()}"
+
+    response = client.get(f"/places/{uuid.uuid4()}/amenities")
+    assertStatus(response, 404)
+
+
 if __name__ == "__main__":
     # Run the tests
     test_functions(
         [
             test_get_amenities,
+            test_get_amenities_conditional,
             test_post_amenity,
             test_get_amenity,
             test_put_amenity,
             test_delete_amenity,
+            test_place_amenities,
         ]
     )
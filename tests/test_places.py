@@ -1,6 +1,12 @@
 """ Implement the Places Management Endpoints """
+import json
+import random
+import uuid
+
+import requests
+
 from tests import test_functions
-from tests import assertStatus
+from tests import API_URL, assertStatus, auth_headers
 from tests.client import Client
 
 
@@ -17,6 +23,305 @@ def test_get_places(client: Client):
     ), f"Expected response to be a list but got {type(response.json())}"
 
 
+def test_get_places_paginated(client: Client):
+    """
+    Test to retrieve the places page by page
+    Creates a few places, then walks /places?limit=2 following the
+    X-Next-Cursor header and checks that every place is returned once
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    for i in range(3):
+        response = client.post(
+            "/places",
+            {
+                "name": f"Paged place {i}",
+                "description": "A place to test the pagination.",
+                "address": f"{i} Page Street",
+                "latitude": 10.0,
+                "longitude": 10.0,
+                "host_id": user["id"],
+                "city_id": city_id,
+                "price_per_night": 50,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": 2,
+            },
+            access_token,
+        )
+        assertStatus(response, 201)
+
+    response = client.get("/places?limit=0")
+    assertStatus(response, 400)
+
+    all_ids = [place["id"] for place in client.get("/places").json()]
+
+    response = client.get("/places?limit=2&count=true")
+    assertStatus(response, 200)
+    assert int(response.headers["X-Total-Count"]) == len(all_ids), \
+        f"Expected X-Total-Count to be {len(all_ids)}"
+
+    paged_ids = []
+    while True:
+        page = response.json()
+        assert len(page) <= 2, f"Expected at most 2 places but got {len(page)}"
+        paged_ids.extend(place["id"] for place in page)
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        response = client.get(f"/places?limit=2&cursor={cursor}")
+        assertStatus(response, 200)
+
+    assert paged_ids == sorted(all_ids), \
+        "Expected the pages to return every place once, ordered by id"
+
+
+def test_get_places_near(client: Client):
+    """
+    Test to search the places around a point and inside a box
+    Creates places at known distances from a random point and checks
+    /places?near= sorts them by distance and /places?bbox= filters them
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    lat, lon = random.uniform(-60, 60), random.uniform(-170, 170)
+    # One degree of latitude is about 111 km
+    offsets_km = [5, 1, 50]
+    ids = []
+    for offset in offsets_km:
+        response = client.post(
+            "/places",
+            {
+                "name": f"Geo place {uuid.uuid4()}",
+                "description": "A place to test the spatial search.",
+                "address": "Somewhere",
+                "latitude": lat + offset / 111.2,
+                "longitude": lon,
+                "host_id": user["id"],
+                "city_id": city_id,
+                "price_per_night": 50,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": 2,
+            },
+            access_token,
+        )
+        assertStatus(response, 201)
+        ids.append(response.json()["id"])
+
+    response = client.get(f"/places?near={lat},{lon}&radius_km=10")
+    assertStatus(response, 200)
+    places = response.json()
+    assert [place["id"] for place in places] == [ids[1], ids[0]], \
+        f"Expected the 2 closest places sorted by distance but got {places}"
+    assert abs(places[0]["distance_km"] - 1) < 0.1, \
+        f"Expected a distance of 1 km but got {places[0]['distance_km']}"
+
+    response = client.get(f"/places?near={lat},{lon}&radius_km=10&limit=1")
+    assertStatus(response, 200)
+    assert [place["id"] for place in response.json()] == [ids[1]], \
+        "Expected the closest place on the first page"
+    response = client.get(
+        f"/places?near={lat},{lon}&radius_km=10&limit=1"
+        f"&cursor={response.headers['X-Next-Cursor']}"
+    )
+    assert [place["id"] for place in response.json()] == [ids[0]], \
+        "Expected the second closest place on the next page"
+    assert "X-Next-Cursor" not in response.headers, \
+        "Expected no cursor after the last page"
+
+    response = client.get(
+        f"/places?bbox={lat - 0.1},{lon - 0.1},{lat + 0.5},{lon + 0.1}"
+    )
+    assertStatus(response, 200)
+    assert sorted(place["id"] for place in response.json()) == sorted(ids), \
+        "Expected the 3 places inside the box"
+
+    response = client.get("/places?near=100,0")
+    assertStatus(response, 400)
+    response = client.get("/places?bbox=1,2,3")
+    assertStatus(response, 400)
+
+
+def test_get_places_filtered(client: Client):
+    """
+    Test to filter the places by price and capacity
+    Creates places with unique prices and checks /places?min_price=...
+    returns only the places inside every range
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    base = random.randint(10**6, 10**7)
+    ids = []
+    for price, guests in ((base, 2), (base + 10, 4), (base + 20, 6)):
+        response = client.post(
+            "/places",
+            {
+                "name": f"Filtered place {uuid.uuid4()}",
+                "description": "A place to test the filters.",
+                "address": "Somewhere",
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "host_id": user["id"],
+                "city_id": city_id,
+                "price_per_night": price,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": guests,
+            },
+            access_token,
+        )
+        assertStatus(response, 201)
+        ids.append(response.json()["id"])
+
+    response = client.get(f"/places?min_price={base}&max_price={base + 20}")
+    assertStatus(response, 200)
+    assert sorted(place["id"] for place in response.json()) == sorted(ids), \
+        "Expected the 3 places inside the price range"
+
+    response = client.get(
+        f"/places?min_price={base}&max_price={base + 15}&min_guests=3"
+    )
+    assertStatus(response, 200)
+    assert [place["id"] for place in response.json()] == [ids[1]], \
+        f"Expected only the second place but got {response.json()}"
+
+    response = client.get(
+        f"/places?min_price={base}&max_price={base + 20}&sort=-price"
+    )
+    assertStatus(response, 200)
+    assert [place["id"] for place in response.json()] == ids[::-1], \
+        "Expected the places sorted by descending price"
+
+    response = client.get(
+        f"/places?min_price={base}&max_price={base + 20}&sort=-price"
+        "&limit=2&count=true"
+    )
+    assertStatus(response, 200)
+    assert [place["id"] for place in response.json()] == ids[:0:-1], \
+        "Expected the 2 most expensive places on the first page"
+    assert response.headers.get("X-Total-Count") == "3", \
+        "Expected the number of filtered places in X-Total-Count"
+    response = client.get(
+        f"/places?min_price={base}&max_price={base + 20}&sort=-price"
+        f"&limit=2&cursor={response.headers['X-Next-Cursor']}"
+    )
+    assert [place["id"] for place in response.json()] == [ids[0]], \
+        "Expected the cheapest place on the last page"
+
+    response = client.get("/places?min_price=cheap")
+    assertStatus(response, 400)
+
+    response = client.get("/places?sort=name")
+    assertStatus(response, 400)
+
+
+def test_get_places_stats(client: Client):
+    """
+    Test the price and capacity stats of the places
+    Creates places with unique prices and checks /places/stats?min_price=...
+    returns their count and the min, max and average of each field
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    base = random.randint(10**7, 10**8)
+    for price, guests in ((base, 2), (base + 30, 4)):
+        response = client.post(
+            "/places",
+            {
+                "name": f"Stats place {uuid.uuid4()}",
+                "description": "A place to test the stats.",
+                "address": "Somewhere",
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "host_id": user["id"],
+                "city_id": city_id,
+                "price_per_night": price,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": guests,
+            },
+            access_token,
+        )
+        assertStatus(response, 201)
+
+    response = client.get(f"/places/stats?min_price={base}&max_price={base + 30}")
+    assertStatus(response, 200)
+    stats = response.json()
+    assert stats["count"] == 2, f"Expected 2 places but got {stats['count']}"
+    assert stats["price"] == {"min": base, "max": base + 30, "avg": base + 15}, \
+        f"Unexpected price stats {stats['price']}"
+    assert stats["guests"]["avg"] == 3, f"Unexpected guests stats {stats['guests']}"
+
+    response = client.get("/places/stats?max_guests=many")
+    assertStatus(response, 400)
+
+
+def test_search_places(client: Client):
+    """
+    Test to search the places by the words of their name and description
+    Creates places with unique words and checks /search?q= finds them,
+    ranks them, matches phrases and follows their updates
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    word = f"w{uuid.uuid4().hex}"
+    descriptions = [
+        f"A {word} house with a garden",
+        f"{word} {word}, the garden {word} of the city",
+        "A house without the word",
+    ]
+    ids = []
+    for description in descriptions:
+        response = client.post(
+            "/places",
+            {
+                "name": f"Search place {uuid.uuid4()}",
+                "description": description,
+                "address": "Somewhere",
+                "latitude": 0.0,
+                "longitude": 0.0,
+                "host_id": user["id"],
+                "city_id": city_id,
+                "price_per_night": 50,
+                "number_of_rooms": 1,
+                "number_of_bathrooms": 1,
+                "max_guests": 2,
+            },
+            access_token,
+        )
+        assertStatus(response, 201)
+        ids.append(response.json()["id"])
+
+    response = client.get(f"/search?q={word}&type=place")
+    assertStatus(response, 200)
+    places = response.json()["places"]
+    assert [place["id"] for place in places] == [ids[1], ids[0]], \
+        f"Expected the places with {word}, most relevant first"
+
+    response = client.get(f'/search?q="{word} house"')
+    assertStatus(response, 200)
+    assert [place["id"] for place in response.json()["places"]] == [ids[0]], \
+        "Expected only the place with the phrase"
+
+    response = client.put(
+        f"/places/{ids[1]}", {"description": "Renamed"}, access_token
+    )
+    assertStatus(response, 200)
+    response = client.get(f"/search?q={word}&type=place")
+    assert [place["id"] for place in response.json()["places"]] == [ids[0]], \
+        "Expected the updated place to be out of the results"
+
+    response = client.get("/search")
+    assertStatus(response, 400)
+
+
 def test_post_place(client: Client):
     """
     Test to create a new place
@@ -59,6 +364,66 @@ def test_post_place(client: Client):
     return place_data["id"]  # Return the ID of the created place for further tests
 
 
+def test_post_places_bulk(client: Client):
+    """
+    Test to create several places at once
+    Sends a JSON array and an NDJSON body to /places/bulk with valid and
+    invalid places and checks that only the invalid ones are rejected
+    """
+    city_id = client.factory.create_city()
+    user = client.factory.create_unique_user()
+    access_token = client.login(user)
+    places = [
+        {
+            "name": f"Bulk place {uuid.uuid4()}",
+            "description": "A place created in bulk.",
+            "address": "1 Bulk Street",
+            "latitude": 1.0,
+            "longitude": 2.0,
+            "host_id": user["id"],
+            "city_id": city_id,
+            "price_per_night": 80,
+            "number_of_rooms": 1,
+            "number_of_bathrooms": 1,
+            "max_guests": 2,
+        }
+        for _ in range(3)
+    ]
+    places[1]["city_id"] = "unknown"
+
+    # no login -> 401
+    response = client.post("/places/bulk", places)
+    assertStatus(response, 401)
+
+    # some invalid -> 207
+    response = client.post("/places/bulk", places, access_token)
+    assertStatus(response, 207)
+    data = response.json()
+    assert [place["name"] for place in data["created"]] == [
+        places[0]["name"], places[2]["name"]
+    ], f"Expected places 0 and 2 to be created but got {data['created']}"
+    assert [error["index"] for error in data["errors"]] == [1], \
+        f"Expected place 1 to be rejected but got {data['errors']}"
+
+    for place in data["created"]:
+        response = client.get(f"/places/{place['id']}")
+        assertStatus(response, 200)
+
+    # NDJSON, all valid -> 201
+    for place in places:
+        place["name"] = f"Bulk place {uuid.uuid4()}"
+    places[1]["city_id"] = city_id
+    response = requests.post(
+        f"{API_URL}/places/bulk",
+        data="\n".join(json.dumps(place) for place in places),
+        headers=auth_headers(access_token)
+        | {"Content-Type": "application/x-ndjson"},
+    )
+    assertStatus(response, 201)
+    assert len(response.json()["created"]) == 3, \
+        f"Expected 3 places to be created but got {response.json()}"
+
+
 def test_get_place(client: Client):
     """
     Test to retrieve a specific place by ID
@@ -211,7 +576,12 @@ if __name__ == "__main__":
     test_functions(
         [
             test_get_places,
+            test_get_places_paginated,
+            test_get_places_near,
+            test_get_places_filtered,
+            test_search_places,
             test_post_place,
+            test_post_places_bulk,
             test_get_place,
             test_put_place,
             test_delete_place,
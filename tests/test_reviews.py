@@ -1,4 +1,5 @@
 """ Implement the Review Management Endpoints """
+import uuid
 from tests import test_functions
 from tests import assertStatus
 from tests.client import Client
@@ -212,6 +213,45 @@ def test_delete_review(client: Client):
     assertStatus(response, 204)
 
 
+def test_place_stats(client: Client):
+    """
+    Test the rating stats of a place
+    Creates, updates and deletes reviews of a new place and checks the stats
+    returned by /places/{id}/stats and the rating of the place payload.
+    """
+    place_id = client.factory.create_place()
+    review_ids = []
+    for rating in (4.0, 5.0):
+        user = client.factory.create_unique_user()
+        new_review = {"user_id": user['id'], "comment": "Nice", "rating": rating}
+        response = client.post(f"/places/{place_id}/reviews", new_review, client.superuser.access_token)
+        assertStatus(response, 201)
+        review_ids.append(response.json()["id"])
+
+    response = client.get(f"/places/{place_id}/stats")
+    assertStatus(response, 200)
+    stats = response.json()["place"]
+    assert stats["count"] == 2, f"Expected 2 reviews but got {stats['count']}"
+    assert stats["average"] == 4.5, f"Expected average 4.5 but got {stats['average']}"
+    assert stats["histogram"]["4"] == 1 and stats["histogram"]["5"] == 1, \
+        f"Unexpected histogram {stats['histogram']}"
+    assert response.json()["city"]["count"] == 2, "City stats not updated"
+    assert response.json()["host"]["count"] >= 2, "Host stats not updated"
+
+    response = client.put(f"/reviews/{review_ids[0]}", {"rating": 2.0}, client.superuser.access_token)
+    assertStatus(response, 200)
+    response = client.delete(f"/reviews/{review_ids[1]}", client.superuser.access_token)
+    assertStatus(response, 204)
+
+    response = client.get(f"/places/{place_id}")
+    assertStatus(response, 200)
+    rating = response.json()["rating"]
+    assert rating == {"count": 1, "average": 2.0}, f"Unexpected rating {rating}"
+
+    response = client.get(f"/places/{uuid.uuid4()}/stats")
+    assertStatus(response, 404)
+
+
 if __name__ == "__main__":
     # Run the tests
     test_functions(
@@ -222,5 +262,6 @@ if __name__ == "__main__":
             test_get_review,
             test_put_review,
             test_delete_review,
+            test_place_stats,
         ]
     )
@@ -179,6 +179,22 @@ def test_login_user(client: Client):
     })
     assertStatus(response, 201)
 
+    # The emails match in any case, also on signup
+    response = client.post("/login", {
+        "email": f" {user['email'].upper()} ",
+        "password": PASSWORD_USER
+    })
+    assertStatus(response, 201)
+
+    response = client.post("/users", {
+        "email": user['email'].upper(),
+        "first_name": "Test",
+        "last_name": "User",
+        "is_admin": False,
+        "password": PASSWORD_USER
+    })
+    assertStatus(response, 400)
+
 
 def test_login_user_protected_page(client: Client):
     """